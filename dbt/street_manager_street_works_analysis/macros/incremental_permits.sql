@@ -0,0 +1,54 @@
+{# Helpers for the incremental in progress and completed permit lists #}
+
+{% macro current_permit_month() %}
+    {{ return(var('month') ~ '_' ~ var('year')) }}
+{% endmacro %}
+
+{% macro current_permit_table() %}
+    {{ return('raw_data_' ~ var('year') ~ '."' ~ current_permit_month() ~ '"') }}
+{% endmacro %}
+
+{#
+    Restrict an incremental run to permits with an event newer than the latest
+    event already in the model. Touched permits are rebuilt from all of their
+    events, so the rows match a full rebuild.
+#}
+{% macro touched_permits_filter(permit_column='permit_table.permit_reference_number') %}
+    {% if is_incremental() %}
+    AND {{ permit_column }} IN (
+        SELECT touched.permit_reference_number
+        FROM {{ current_permit_table() }} AS touched
+        WHERE (SELECT MAX(event_time) FROM {{ this }}) IS NULL
+            OR touched.event_time > (SELECT MAX(event_time) FROM {{ this }})
+    )
+    {% endif %}
+{% endmacro %}
+
+{# Pre-hook - drop rows built from an earlier month before loading a new one #}
+{% macro delete_permits_from_other_months() %}
+    {% if is_incremental() %}
+        {% set columns = adapter.get_columns_in_relation(this) | map(attribute='name') | list %}
+        {% if 'source_month' in columns %}
+    DELETE FROM {{ this }} WHERE source_month <> '{{ current_permit_month() }}'
+        {% else %}
+    DELETE FROM {{ this }}
+        {% endif %}
+    {% endif %}
+{% endmacro %}
+
+{# Post-hook - drop in progress permits that have since been completed #}
+{% macro delete_completed_permits(same_highway_authority=false) %}
+    {% if is_incremental() %}
+    DELETE FROM {{ this }}
+    WHERE EXISTS (
+        SELECT 1
+        FROM {{ current_permit_table() }} AS p
+        WHERE p.permit_reference_number = "{{ this.identifier }}".permit_reference_number
+        AND p.work_status_ref = 'completed'
+        AND p.event_type = 'WORK_STOP'
+        {% if same_highway_authority %}
+        AND p.highway_authority = "{{ this.identifier }}".highway_authority
+        {% endif %}
+    )
+    {% endif %}
+{% endmacro %}
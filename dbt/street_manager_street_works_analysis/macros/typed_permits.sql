@@ -0,0 +1,12 @@
+{#
+    Promoter SWA code of a permit as an integer, for joining to GeoPlace.
+    Typed loads (main.py --typed) already store it as an INTEGER, so the
+    cast is only needed for VARCHAR permit tables.
+#}
+{% macro promoter_swa_code(table_alias) %}
+    {%- if var('typed_permits') -%}
+        {{ table_alias }}.promoter_swa_code
+    {%- else -%}
+        CAST({{ table_alias }}.promoter_swa_code AS INT)
+    {%- endif -%}
+{% endmacro %}
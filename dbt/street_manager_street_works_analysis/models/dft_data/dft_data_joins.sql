@@ -42,8 +42,11 @@ SELECT
     t."2023" AS traffic_flow_2023,
 
 FROM geoplace_swa_codes.LATEST_ACTIVE g
+-- account_name is lower cased and trimmed at ingest, but keeps any runs of
+-- spaces left where words were removed (e.g. "isle  wight"), so only those
+-- are collapsed here
 LEFT JOIN dft_las_gss_code.dft_las_gss_code_latest d
-    ON REGEXP_REPLACE(REGEXP_REPLACE(LOWER(TRIM(g.account_name)), '\s+', ' '), '\s+$', '') = 
+    ON REGEXP_REPLACE(g.account_name, '\s+', ' ', 'g') = 
     REGEXP_REPLACE(REGEXP_REPLACE(LOWER(TRIM(d.name)), '\s+', ' '), '\s+$', '')
 LEFT JOIN dft_road_lengths.dft_road_lengths_latest r
     ON TRIM(d.ons_code) = TRIM(r.ons_area_code)
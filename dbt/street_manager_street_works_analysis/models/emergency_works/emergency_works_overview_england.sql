@@ -53,7 +53,7 @@ promoter_sector AS (
         END AS sector
     FROM combined_works cw
     LEFT JOIN geoplace_swa_codes.LATEST_ACTIVE g 
-        ON CAST(cw.promoter_swa_code AS INT) = CAST(g.swa_code AS INT)
+        ON {{ promoter_swa_code('cw') }} = CAST(g.swa_code AS INT)
 )
 
 -- Final aggregation with work category counts
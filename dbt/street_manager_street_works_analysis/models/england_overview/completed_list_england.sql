@@ -1,5 +1,12 @@
 {% set table_alias = 'completed_works_list_england_latest' %}
-{{ config(materialized='table', alias=table_alias) }}
+{{ config(
+    materialized='incremental',
+    alias=table_alias,
+    unique_key='permit_reference_number',
+    incremental_strategy='delete+insert',
+    on_schema_change='append_new_columns',
+    pre_hook="{{ delete_permits_from_other_months() }}"
+) }}
 
 {% set current_schema = 'raw_data_' ~ var('year') %}
 {% set current_table = '"' ~ var('month') ~ '_' ~ var('year') ~ '"' %}
@@ -33,10 +40,12 @@ SELECT DISTINCT ON (permit_table.permit_reference_number)
     geo_place.ofcom_licence,
     geo_place.ofwat_licence,
     COALESCE(uprn_counts.uprn_count, 0) as uprn_count,
+    '{{ current_permit_month() }}' AS source_month,
     {{ current_timestamp() }} AS date_processed
 FROM {{ current_schema }}.{{ current_table }} AS permit_table
 LEFT JOIN os_open_usrns.open_usrns_latest AS open_usrn ON permit_table.usrn = open_usrn.usrn
-LEFT JOIN geoplace_swa_codes.LATEST_ACTIVE AS geo_place ON CAST(permit_table.promoter_swa_code AS INT) = CAST(geo_place.swa_code AS INT)
+LEFT JOIN geoplace_swa_codes.LATEST_ACTIVE AS geo_place ON {{ promoter_swa_code('permit_table') }} = CAST(geo_place.swa_code AS INT)
 LEFT JOIN {{ ref('uprn_usrn_count') }} as uprn_counts ON permit_table.usrn = uprn_counts.usrn
 WHERE permit_table.work_status_ref = 'completed'
 AND permit_table.event_type = 'WORK_STOP'
+{{ touched_permits_filter() }}
@@ -2,38 +2,34 @@
 {{ config(materialized='table', alias=table_alias) }}
 
 WITH all_months AS (
-    {% set tables = get_tables() %}
-    {% for table in tables %}
-        {% if not loop.first %}UNION ALL{% endif %}
-        
-        SELECT 
-            permit_table.event_type,
-            permit_table.event_time,
-            permit_table.permit_reference_number,
-            permit_table.promoter_organisation,
-            permit_table.promoter_swa_code,
-            permit_table.highway_authority,
-            permit_table.highway_authority_swa_code,
-            permit_table.work_category,
-            permit_table.works_location_type,
-            permit_table.proposed_start_date,
-            permit_table.proposed_end_date,
-            permit_table.actual_start_date_time,
-            permit_table.actual_end_date_time,
-            permit_table.collaborative_working,
-            permit_table.activity_type,
-            permit_table.is_traffic_sensitive,
-            permit_table.is_ttro_required,
-            permit_table.traffic_management_type_ref,
-            permit_table.street_name,
-            permit_table.road_category,
-            permit_table.usrn,
-            permit_table.work_status_ref
-        FROM {{ table }} AS permit_table
-        WHERE permit_table.work_status_ref = 'completed'
-        AND permit_table.event_type = 'WORK_STOP'
-        AND permit_table.activity_type = 'New service connection'
-    {% endfor %}
+    SELECT 
+        permit_table.event_type,
+        permit_table.event_time,
+        permit_table.permit_reference_number,
+        permit_table.promoter_organisation,
+        permit_table.promoter_swa_code,
+        permit_table.highway_authority,
+        permit_table.highway_authority_swa_code,
+        permit_table.work_category,
+        permit_table.works_location_type,
+        permit_table.proposed_start_date,
+        permit_table.proposed_end_date,
+        permit_table.actual_start_date_time,
+        permit_table.actual_end_date_time,
+        permit_table.collaborative_working,
+        permit_table.activity_type,
+        permit_table.is_traffic_sensitive,
+        permit_table.is_ttro_required,
+        permit_table.traffic_management_type_ref,
+        permit_table.street_name,
+        permit_table.road_category,
+        permit_table.usrn,
+        permit_table.work_status_ref
+    FROM {{ source('permit_history', 'permits') }} AS permit_table
+    WHERE permit_table.year = 2024
+    AND permit_table.work_status_ref = 'completed'
+    AND permit_table.event_type = 'WORK_STOP'
+    AND permit_table.activity_type = 'New service connection'
 )
 
 SELECT DISTINCT ON (main.permit_reference_number)
@@ -68,5 +64,5 @@ SELECT DISTINCT ON (main.permit_reference_number)
     {{ current_timestamp() }} AS date_processed
 FROM all_months AS main
 LEFT JOIN os_open_usrns.open_usrns_latest AS open_usrn ON main.usrn = open_usrn.usrn
-LEFT JOIN geoplace_swa_codes.LATEST_ACTIVE AS geo_place ON CAST(main.promoter_swa_code AS INT) = CAST(geo_place.swa_code AS INT)
+LEFT JOIN geoplace_swa_codes.LATEST_ACTIVE AS geo_place ON {{ promoter_swa_code('main') }} = CAST(geo_place.swa_code AS INT)
 LEFT JOIN {{ ref('uprn_usrn_count') }} as uprn_counts ON main.usrn = uprn_counts.usrn
\ No newline at end of file
@@ -1,11 +1,11 @@
 {% set table_alias = 'uprn_usrn_counts_latest' %}
 {{ config(materialized='table', alias=table_alias) }}
 
+-- usrn_uprn_counts_latest is aggregated while the LIDS CSV is ingested, so
+-- this only joins two USRN sized tables instead of scanning LIDS
 SELECT
     usrn.usrn,
-    COUNT(uprn.CORRELATION_ID) as uprn_count
+    counts.uprn_count
 FROM
     os_open_usrns.open_usrns_latest usrn
-    JOIN os_open_linked_identifiers.os_open_linked_identifiers_uprn_usrn_latest uprn ON usrn.usrn = uprn.IDENTIFIER_2
-GROUP BY
-    usrn.usrn
\ No newline at end of file
+    JOIN os_open_linked_identifiers.usrn_uprn_counts_latest counts ON usrn.usrn = counts.usrn
@@ -0,0 +1,285 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from loguru import logger
+
+from database.checkpoints import LoadCheckpoint
+from database.motherduck import MotherDuckManager
+from database.permit_history import PermitHistory
+from database.throttling import ThrottledConnection
+from data_sources.data_source_config import DataProcessorType, TimeRange
+from data_sources.street_manager import StreetManager
+from data_processors.batching import BatchSizer
+from data_processors.street_manager import process_data
+from metrics import metrics
+from profiling import profiler
+
+
+def is_month_loaded(connection, url: str, schema: str, table: str) -> bool:
+    """
+    Check whether a month has already been loaded.
+
+    A checkpointed month is loaded once its checkpoint is complete. Tables
+    loaded before checkpoints existed count as loaded when they hold rows.
+
+    Args:
+        connection: DuckDB connection
+        url: Download link for the month
+        schema: Schema name
+        table: Table name
+
+    Returns:
+        Boolean indicating the month can be skipped
+    """
+    exists = connection.execute(
+        "SELECT COUNT(*) FROM information_schema.tables "
+        "WHERE table_schema = ? AND table_name = ?",
+        [schema, table],
+    ).fetchone()[0]
+    if not exists:
+        return False
+
+    state = LoadCheckpoint(connection, url, schema, table).load()
+    if state is not None:
+        return state[2]
+
+    row_count = connection.execute(
+        f'SELECT COUNT(*) FROM "{schema}"."{table}"'
+    ).fetchone()[0]
+    return row_count > 0
+
+
+def load_month(
+    config: StreetManager,
+    url: str,
+    table_name: str,
+    token: str,
+    database: str,
+    writer_slots: threading.BoundedSemaphore,
+    skip_loaded: bool,
+    decode_workers: int = 0,
+) -> dict:
+    """
+    Load a single month of a historic Street Manager config and copy it
+    into the permit history.
+
+    Args:
+        config: Historic StreetManager configuration
+        url: Download link for the month
+        table_name: Table name for the month
+        token: MotherDuck token
+        database: MotherDuck database name
+        writer_slots: Semaphore capping concurrent MotherDuck writes
+        skip_loaded: Skip the month if it is already loaded, otherwise
+            resume it from its checkpoint - when False the month is reloaded
+        decode_workers: Decode worker processes for the month - 0 decodes
+            on the month's thread
+
+    Returns:
+        Dictionary describing the outcome and throughput of the month
+    """
+    schema = config.schema_name
+
+    with MotherDuckManager(token, database) as motherduck_manager:
+        connection = motherduck_manager.connection
+
+        history = PermitHistory(ThrottledConnection(connection, writer_slots))
+
+        if skip_loaded and is_month_loaded(connection, url, schema, table_name):
+            logger.info(f"Skipping {schema}.{table_name} - already loaded")
+            # Months loaded before the history table existed are copied over
+            if not history.has_month(table_name):
+                history.replace_month(schema, table_name)
+            return {"table": table_name, "status": "skipped"}
+
+        motherduck_manager.create_table(
+            schema, table_name, config.db_template, replace=not skip_loaded
+        )
+
+        start = time.perf_counter()
+        with metrics.scope(table_name):
+            process_data(
+                url=url,
+                batch_size=BatchSizer.from_env(config.batch_limit or 200000),
+                conn=ThrottledConnection(connection, writer_slots),
+                schema_name=schema,
+                table_name=table_name,
+                db_template=config.db_template,
+                resumable=True,
+                typed_columns=config.typed_columns,
+                workers=decode_workers,
+            )
+        seconds = time.perf_counter() - start
+
+        rows = connection.execute(
+            f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
+        ).fetchone()[0]
+        history.replace_month(schema, table_name)
+
+    return {
+        "table": table_name,
+        "status": "loaded",
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds, 2) if seconds else None,
+    }
+
+
+def run_historic_backfill(
+    config: StreetManager,
+    token: str,
+    database: str,
+    max_downloads: int = 3,
+    max_writers: int = 2,
+    skip_loaded: bool = True,
+    decode_workers: int = 0,
+) -> list[dict]:
+    """
+    Load every month of a HISTORIC Street Manager config concurrently.
+
+    Each month is downloaded and decoded on its own thread and connection.
+    At most max_downloads months are in flight at once and at most
+    max_writers inserts run against MotherDuck at the same time.
+
+    Args:
+        config: StreetManager configuration with TimeRange.HISTORIC
+        token: MotherDuck token
+        database: MotherDuck database name
+        max_downloads: Maximum number of months downloading at once
+        max_writers: Maximum number of concurrent MotherDuck inserts
+        skip_loaded: Skip loaded months and resume partially loaded ones
+        decode_workers: Decode worker processes per month - 0 decodes on
+            the month's thread
+
+    Returns:
+        List of per month result dictionaries in download link order
+    """
+    if config.time_range != TimeRange.HISTORIC:
+        raise ValueError("Backfill requires a HISTORIC Street Manager config")
+
+    # Only the schemas and shared tables are created up front -
+    # setup_for_data_source would replace the tables of loaded months
+    with MotherDuckManager(token, database) as motherduck_manager:
+        motherduck_manager.create_schema_if_not_exists(config.schema_name)
+        LoadCheckpoint.create_table_if_not_exists(motherduck_manager.connection)
+        PermitHistory.create_table_if_not_exists(
+            motherduck_manager.connection, config.db_template
+        )
+
+    writer_slots = threading.BoundedSemaphore(max_writers)
+    months = list(zip(config.download_links, config.table_names))
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=max_downloads) as executor:
+        futures = {
+            executor.submit(
+                load_month,
+                config,
+                url,
+                table_name,
+                token,
+                database,
+                writer_slots,
+                skip_loaded,
+                decode_workers,
+            ): table_name
+            for url, table_name in months
+        }
+
+        for future in as_completed(futures):
+            table_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Backfill of {table_name} failed: {e}")
+                result = {"table": table_name, "status": "failed", "error": str(e)}
+            results[table_name] = result
+
+            if result["status"] == "loaded":
+                logger.success(
+                    f"Loaded {table_name}: {result['rows']} rows in "
+                    f"{result['seconds']}s ({result['rows_per_second']} rows/s)"
+                )
+
+    ordered_results = [results[table_name] for _, table_name in months]
+    failed = [
+        result["table"] for result in ordered_results if result["status"] == "failed"
+    ]
+    if failed:
+        logger.error(f"Backfill finished with failed months: {failed}")
+    else:
+        logger.success(f"Backfill of {config.schema_name} complete")
+    return ordered_results
+
+
+def main():
+    from auth.get_credentials import get_secrets
+    from auth.creds import secret_name
+
+    parser = argparse.ArgumentParser(description="Street Manager historic backfill")
+    parser.add_argument("year", type=int, help="Year to backfill")
+    parser.add_argument("--start-month", type=int, default=1)
+    parser.add_argument("--end-month", type=int, default=13)
+    parser.add_argument("--batch-limit", type=int, default=150000)
+    parser.add_argument("--max-downloads", type=int, default=3)
+    parser.add_argument("--max-writers", type=int, default=2)
+    parser.add_argument("--reload", action="store_true", help="Reload loaded months")
+    parser.add_argument(
+        "--decode-workers",
+        type=int,
+        default=int(os.getenv("DECODE_WORKERS", "0")),
+        help="Decode worker processes per month - 0 decodes serially",
+    )
+    parser.add_argument(
+        "--typed",
+        action="store_true",
+        help="Load dates, flags, usrn and promoter_swa_code as typed columns "
+        "instead of VARCHAR",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("METRICS_FILE"),
+        help="Write per-stage timings and throughput to this JSON file",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Write CPU stack samples and memory timelines per month here",
+    )
+    args = parser.parse_args()
+    if args.profile_dir:
+        profiler.enable(args.profile_dir)
+
+    secrets = get_secrets(secret_name)
+    config = StreetManager(
+        processor_type=DataProcessorType.MOTHERDUCK,
+        time_range=TimeRange.HISTORIC,
+        batch_limit=args.batch_limit,
+        year=args.year,
+        start_month=args.start_month,
+        end_month=args.end_month,
+        typed=args.typed,
+    )
+    logger.info(f"street_manager_config: {config}")
+
+    results = []
+    try:
+        results = run_historic_backfill(
+            config,
+            secrets["motherduck_token"],
+            "sm_permit",
+            max_downloads=args.max_downloads,
+            max_writers=args.max_writers,
+            skip_loaded=not args.reload,
+            decode_workers=args.decode_workers,
+        )
+    finally:
+        if args.metrics_file:
+            metrics.write(args.metrics_file, extra={"months": results})
+            logger.info(f"Wrote backfill metrics to {args.metrics_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import random
+import tempfile
+import zipfile
+
+import numpy as np
+import openpyxl
+import pyogrio.raw
+import shapely
+from msoffcrypto.format.ooxml import OOXMLFile
+
+WORK_CATEGORIES = ["Standard", "Minor", "Major", "Immediate - urgent"]
+FLAGS = ["Yes", "No"]
+COUNCILS = [
+    "LONDON BOROUGH OF CAMDEN",
+    "KENT COUNTY COUNCIL",
+    "MANCHESTER CITY COUNCIL",
+    "ROYAL BOROUGH OF GREENWICH",
+    "CITY OF YORK COUNCIL",
+    "BRIGHTON & HOVE CITY COUNCIL",
+]
+
+
+def street_manager_event(i: int, rng: random.Random) -> dict:
+    """
+    Build a nested Street Manager permit event.
+
+    Args:
+        i: Event number, used as the event reference
+        rng: Random source
+
+    Returns:
+        Event in the layout of the Street Manager archive
+    """
+    permit = f"TSR{i // 3:07d}-{i % 3:02d}"
+    return {
+        "event_reference": i,
+        "event_type": rng.choice(["WORK_START", "WORK_STOP", "PERMIT_GRANTED"]),
+        "event_time": f"2024-03-{1 + i % 28:02d}T{i % 24:02d}:15:00.000Z",
+        "object_type": "PERMIT",
+        "object_reference": permit,
+        "version": 1,
+        "object_data": {
+            "work_reference_number": permit[:-3],
+            "work_category": rng.choice(WORK_CATEGORIES),
+            "work_status_ref": rng.choice(["in_progress", "completed"]),
+            "permit_reference_number": permit,
+            "promoter_swa_code": f"{rng.randint(1, 9999):04d}",
+            "promoter_organisation": "Synthetic Utilities Ltd",
+            "highway_authority": rng.choice(COUNCILS),
+            "works_location_coordinates": (
+                f"LINESTRING({rng.uniform(0, 7e5):.2f} {rng.uniform(0, 1.2e6):.2f}, "
+                f"{rng.uniform(0, 7e5):.2f} {rng.uniform(0, 1.2e6):.2f})"
+            ),
+            "street_name": f"Synthetic Street {i % 5000}",
+            "usrn": str(10000000 + rng.randint(0, 500000)),
+            "proposed_start_date": f"2024-03-{1 + i % 28:02d}T00:00:00.000Z",
+            "proposed_end_date": f"2024-04-{1 + i % 28:02d}T00:00:00.000Z",
+            "is_ttro_required": rng.choice(FLAGS),
+            "is_traffic_sensitive": rng.choice(FLAGS),
+            "is_deemed": rng.choice(FLAGS),
+        },
+    }
+
+
+def write_street_manager_zip(path: str, events: int, seed: int = 0) -> str:
+    """
+    Write a Street Manager month archive with one JSON file per event.
+
+    Args:
+        path: Path of the zip to write
+        events: Number of events
+        seed: Random seed
+
+    Returns:
+        Path of the zip
+    """
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for i in range(events):
+            event = street_manager_event(i, rng)
+            zip_file.writestr(f"{i:08d}.json", json.dumps(event, indent=2))
+    return path
+
+
+def write_open_usrn_zip(path: str, features: int, seed: int = 0) -> str:
+    """
+    Write an OS Open USRN style GeoPackage and zip it.
+
+    Args:
+        path: Path of the zip to write
+        features: Number of street features
+        seed: Random seed
+
+    Returns:
+        Path of the zip
+    """
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform([0, 0], [7e5, 1.2e6], size=(features, 2))
+    # Each street is a short line string of 2 to 8 vertices
+    lines = [
+        shapely.LineString(start + np.cumsum(rng.normal(0, 25, (n, 2)), axis=0))
+        for start, n in zip(starts, rng.integers(2, 9, features))
+    ]
+    street_types = np.array(
+        ["Designated Street Name", "Officially Described Street", "Numbered Street"],
+        dtype=object,
+    )[rng.integers(0, 3, features)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        gpkg_path = os.path.join(temp_dir, "osopenusrn.gpkg")
+        pyogrio.raw.write(
+            gpkg_path,
+            shapely.to_wkb(lines),
+            [street_types, np.arange(features, dtype=np.int64) + 10000000],
+            ["street_type", "usrn"],
+            driver="GPKG",
+            geometry_type="LineString",
+            crs="EPSG:27700",
+        )
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.write(gpkg_path, "osopenusrn.gpkg")
+    return path
+
+
+def write_lids_zip(path: str, rows: int, seed: int = 0) -> str:
+    """
+    Write a LIDS BLPU-UPRN to street USRN CSV and zip it.
+
+    Args:
+        path: Path of the zip to write
+        rows: Number of UPRN to USRN rows
+        seed: Random seed
+
+    Returns:
+        Path of the zip
+    """
+    rng = random.Random(seed)
+    lines = [
+        "CORRELATION_ID,IDENTIFIER_1,VERSION_NUMBER_1,VERSION_DATE_1,"
+        "IDENTIFIER_2,VERSION_NUMBER_2,VERSION_DATE_2,CONFIDENCE"
+    ]
+    for i in range(rows):
+        lines.append(
+            f"{i:08x}-corr,{100000000 + i},,20240101,"
+            f"{10000000 + rng.randint(0, rows // 20)},4,20240102,8"
+        )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("BLPU_UPRN_Street_USRN_11.csv", "\n".join(lines) + "\n")
+    return path
+
+
+def write_swa_workbook(path: str, rows: int, seed: int = 0) -> str:
+    """
+    Write a GeoPlace SWA code list encrypted with the default Excel password.
+
+    GeoPlace publish a legacy XLS, which can not be written here, so the
+    same sheet layout is written as an encrypted XLSX instead.
+
+    Args:
+        path: Path of the workbook to write
+        rows: Number of SWA code rows
+        seed: Random seed
+
+    Returns:
+        Path of the workbook
+    """
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Street Works Authority codes"])
+    sheet.append(
+        [
+            "SWA Code",
+            "Account Name",
+            "Prefix",
+            "Account Type",
+            "Registered for Street Manager",
+            "Account Status",
+            "Companies House Number",
+            "Previous Company Names",
+            "Linked/Parent Company",
+            "Website",
+            "Plant Enquiries",
+            "Ofgem Electricity Licence",
+            "Ofgem Gas Licence",
+            "Ofcom Licence",
+            "Ofwat Licence",
+            "Company Subsumed By",
+            "SWA Code of New Company",
+        ]
+    )
+    for i in range(rows):
+        sheet.append(
+            [f"{i:04d}", rng.choice(COUNCILS), f"P{i}", "Highway Authority", "Yes"]
+            + ["Active"]
+            + [None] * 11
+        )
+
+    plain = io.BytesIO()
+    workbook.save(plain)
+    plain.seek(0)
+    with open(path, "wb") as encrypted:
+        OOXMLFile(plain).encrypt("VelvetSweatshop", encrypted)
+    return path
@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+import duckdb
+import psutil
+from loguru import logger
+
+from benchmarks import fixtures
+from benchmarks.server import serve_directory
+from data_processors import geoplace_swa, os_open_usrn, os_usrn_uprn, street_manager
+from data_sources.geoplace_swa import GeoplaceSwa
+from data_sources.os_open_usrn import OsOpenUsrn
+from data_sources.os_usrn_uprn import OsUsrnUprn
+from data_sources.street_manager import StreetManager
+from database.motherduck import MotherDuckManager
+from metrics import metrics
+
+
+class Benchmark:
+    """
+    One processor run against a synthetic fixture.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        file_name: str,
+        write_fixture: Callable[[str, int], str],
+        size: int,
+        config,
+        run: Callable[[str, duckdb.DuckDBPyConnection, object], None],
+    ):
+        """
+        Initialise a benchmark.
+
+        Args:
+            name: Benchmark name
+            file_name: Name the fixture is served under
+            write_fixture: Callable taking (path, size) that writes the fixture
+            size: Fixture size at scale 1 - events, features or rows
+            config: Data source config used for the schema and tables
+            run: Callable taking (url, connection, config) that loads the fixture
+        """
+        self.name = name
+        self.file_name = file_name
+        self.write_fixture = write_fixture
+        self.size = size
+        self.config = config
+        self.run = run
+
+
+def build_benchmarks() -> list[Benchmark]:
+    street_manager_config = StreetManager.create_default_latest()
+    os_usrn_uprn_config = OsUsrnUprn.create_default_latest()
+    return [
+        Benchmark(
+            "street_manager",
+            "permit.zip",
+            fixtures.write_street_manager_zip,
+            20000,
+            street_manager_config,
+            lambda url, conn, config: street_manager.process_data(
+                url,
+                10000,
+                conn,
+                config.schema_name,
+                config.table_names[0],
+                config.db_template,
+            ),
+        ),
+        Benchmark(
+            "os_open_usrn",
+            "osopenusrn.zip",
+            fixtures.write_open_usrn_zip,
+            50000,
+            OsOpenUsrn.create_default_latest(),
+            lambda url, conn, config: os_open_usrn.process_data(
+                url, conn, 25000, config.schema_name, config.table_names[0]
+            ),
+        ),
+        Benchmark(
+            "os_usrn_uprn",
+            "lids.zip",
+            fixtures.write_lids_zip,
+            200000,
+            os_usrn_uprn_config,
+            lambda url, conn, config: os_usrn_uprn.process_data(
+                url,
+                conn,
+                250000,
+                config.schema_name,
+                config.table_names[0],
+                config.db_template,
+                count_table=config.usrn_count_table,
+            ),
+        ),
+        Benchmark(
+            "geoplace_swa",
+            "swa_codes.xlsx",
+            fixtures.write_swa_workbook,
+            3000,
+            GeoplaceSwa.create_default_latest(),
+            lambda url, conn, config: geoplace_swa.process_data(
+                url, conn, config.schema_name, config.table_names[0]
+            ),
+        ),
+    ]
+
+
+class PeakRssSampler:
+    """
+    Samples the resident set size of this process in a background thread.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while not self.stopped.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self.stopped.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stopped.set()
+        self.thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def run_benchmark(
+    benchmark: Benchmark, fixture_path: str, base_url: str, database: str
+) -> dict:
+    """
+    Load a fixture through its processor and measure it.
+
+    Args:
+        benchmark: Benchmark to run
+        fixture_path: Path of the fixture file
+        base_url: Base URL the fixtures are served from
+        database: DuckDB database path, or ":memory:"
+
+    Returns:
+        Dictionary of rows loaded, seconds, rows and MB per second, peak
+        RSS and per-stage metrics for the run
+    """
+    manager = MotherDuckManager("benchmark", "benchmark")
+    manager.connection = duckdb.connect(database)
+    try:
+        manager.setup_for_data_source(benchmark.config)
+        config = benchmark.config
+        url = f"{base_url}/{benchmark.file_name}"
+
+        baseline_rss = psutil.Process().memory_info().rss
+        metrics.reset()
+        with PeakRssSampler() as sampler:
+            start = time.perf_counter()
+            benchmark.run(url, manager.connection, config)
+            seconds = time.perf_counter() - start
+
+        rows = manager.connection.execute(
+            f'SELECT COUNT(*) FROM "{config.schema_name}"."{config.table_names[0]}"'
+        ).fetchone()[0]
+    finally:
+        manager.close()
+
+    megabytes = os.path.getsize(fixture_path) / 1024 / 1024
+    return {
+        "rows": rows,
+        "fixture_mb": round(megabytes, 2),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds),
+        "mb_per_second": round(megabytes / seconds, 2),
+        "peak_rss_mb": round(sampler.peak / 1024 / 1024, 1),
+        "peak_rss_increase_mb": round((sampler.peak - baseline_rss) / 1024 / 1024, 1),
+        "stages": metrics.as_dict()["stages"],
+    }
+
+
+def run_benchmarks(
+    scale: float = 1.0,
+    database: str = ":memory:",
+    only: Optional[list[str]] = None,
+    fixture_dir: Optional[str] = None,
+) -> dict[str, dict]:
+    """
+    Generate every fixture, serve them locally and benchmark each processor.
+
+    Args:
+        scale: Multiplier for the size of every fixture
+        database: DuckDB database path, or ":memory:" - a file database is
+            deleted before each benchmark
+        only: Optional benchmark names to run
+        fixture_dir: Optional directory to keep fixtures in - existing
+            fixtures are reused, so repeated runs skip generation
+
+    Returns:
+        Dictionary of benchmark name to its measurements
+    """
+    # Measure the real download path rather than the local artifact cache
+    os.environ.pop("ARTIFACT_CACHE_DIR", None)
+
+    benchmarks = [
+        benchmark
+        for benchmark in build_benchmarks()
+        if only is None or benchmark.name in only
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixture_dir = fixture_dir or temp_dir
+        os.makedirs(fixture_dir, exist_ok=True)
+        for benchmark in benchmarks:
+            size = max(1, int(benchmark.size * scale))
+            path = os.path.join(fixture_dir, f"{size}_{benchmark.file_name}")
+            if not os.path.exists(path):
+                logger.info(f"Writing {benchmark.name} fixture of {size} records")
+                benchmark.write_fixture(path, size)
+            benchmark.file_name = os.path.basename(path)
+
+        results = {}
+        with serve_directory(fixture_dir) as base_url:
+            for benchmark in benchmarks:
+                if database != ":memory:" and os.path.exists(database):
+                    os.remove(database)
+                path = os.path.join(fixture_dir, benchmark.file_name)
+                results[benchmark.name] = run_benchmark(
+                    benchmark, path, base_url, database
+                )
+                logger.success(f"{benchmark.name}: {results[benchmark.name]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline processor benchmarks")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--database", default=":memory:")
+    parser.add_argument("--only", nargs="+", help="Benchmark names to run")
+    parser.add_argument("--fixture-dir", help="Keep and reuse fixtures here")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale, args.database, args.only, args.fixture_dir)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import functools
+import threading
+from contextlib import contextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that does not log every request to stderr."""
+
+    def log_message(self, format, *args):
+        return None
+
+
+@contextmanager
+def serve_directory(directory: str) -> Iterator[str]:
+    """
+    Serve a directory over HTTP on a free local port.
+
+    Stands in for the Street Manager, OS and GeoPlace download servers so
+    the processors run their real download code without leaving the host.
+
+    Args:
+        directory: Directory of fixture files
+
+    Returns:
+        Base URL of the server, without a trailing slash
+    """
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
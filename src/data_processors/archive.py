@@ -0,0 +1,259 @@
+import io
+import os
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from loguru import logger
+from stream_unzip import stream_unzip
+from tqdm import tqdm
+
+from data_processors.artifact_cache import open_url
+from metrics import metrics
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    Read-only file object over an iterator of byte chunks.
+
+    Lets csv and io.TextIOWrapper consume a streamed zip member directly.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = iter(chunks)
+        self.buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while not self.buffer:
+            try:
+                self.buffer = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+class ArchiveStats:
+    """
+    Byte counts and timings for one streamed archive.
+    """
+
+    def __init__(self):
+        self.compressed_bytes = 0
+        self.uncompressed_bytes = 0
+        self.members = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def seconds(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def as_dict(self) -> dict:
+        """
+        Summarise the archive read.
+
+        Returns:
+            Dictionary of byte counts, members read, elapsed seconds and
+            download throughput in MB per second
+        """
+        seconds = self.seconds
+        return {
+            "compressed_bytes": self.compressed_bytes,
+            "uncompressed_bytes": self.uncompressed_bytes,
+            "members": self.members,
+            "seconds": round(seconds, 2),
+            "mb_per_second": round(
+                self.compressed_bytes / 1024 / 1024 / seconds if seconds else 0.0, 2
+            ),
+        }
+
+
+def iter_members(
+    zipped_chunks: Iterable[bytes],
+    extensions: Optional[tuple[str, ...]] = None,
+    stats: Optional[ArchiveStats] = None,
+) -> Iterator[tuple[str, Optional[int], Iterator[bytes]]]:
+    """
+    Decompress a zip archive from an iterable of chunks, one member at a time.
+
+    Members have to be read through in order, so any member that is filtered
+    out, or not fully consumed by the caller, is drained before moving on.
+
+    Args:
+        zipped_chunks: Iterable of compressed archive bytes
+        extensions: Optional member name suffixes to yield, e.g. (".csv",) -
+            every member is yielded if None
+        stats: Optional stats to record members and uncompressed bytes in
+
+    Returns:
+        Iterator of (member name, uncompressed size, chunks of the member)
+    """
+
+    # Archives can hold millions of small members, so decompression time is
+    # accumulated locally and recorded once the archive has been read
+    unzip_timer = metrics.timer("unzip")
+    uncompressed_bytes = 0
+
+    def counted(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Closure for timing and counting the uncompressed bytes of a member"""
+        nonlocal uncompressed_bytes
+        while True:
+            with unzip_timer:
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            uncompressed_bytes += len(chunk)
+            if stats is not None:
+                stats.uncompressed_bytes += len(chunk)
+            yield chunk
+
+    try:
+        for file_name, size, unzipped_chunks in stream_unzip(zipped_chunks):
+            name = (
+                file_name.decode("utf-8") if isinstance(file_name, bytes) else file_name
+            )
+            member_chunks = counted(iter(unzipped_chunks))
+            if extensions is None or name.endswith(extensions):
+                if stats is not None:
+                    stats.members += 1
+                yield name, size, member_chunks
+            for _ in member_chunks:
+                pass
+    finally:
+        unzip_timer.flush(bytes_out=uncompressed_bytes)
+
+
+def spool_member(chunks: Iterable[bytes], path: str) -> int:
+    """
+    Write a streamed member to disk for readers that need a real file.
+
+    Args:
+        chunks: Chunks of the member
+        path: File path to write to
+
+    Returns:
+        Number of bytes written
+    """
+    bytes_written = 0
+    with open(path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
+            bytes_written += len(chunk)
+    return bytes_written
+
+
+class ArchiveStream:
+    """
+    Streams a zip archive over HTTP and decompresses its members as they
+    arrive, so neither the archive nor unwanted members are written to disk.
+
+    Downloads go through the artifact cache when ARTIFACT_CACHE_DIR is set.
+    Use as a context manager - the response is closed and a throughput
+    summary logged on exit.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        chunk_size: int = 1048576,
+        timeout: Optional[float] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Initialise an archive stream.
+
+        Args:
+            url: URL of the zip archive
+            chunk_size: Number of compressed bytes to read per chunk
+            timeout: Optional requests timeout in seconds
+            progress_callback: Optional callable taking (bytes read, total
+                bytes) after every chunk - defaults to a tqdm progress bar
+        """
+        self.url = url
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.stats = ArchiveStats()
+        self.total_size = 0
+        self.response = None
+
+    def __enter__(self):
+        logger.info(f"Streaming archive from {self.url}")
+        self.response = open_url(self.url, self.timeout)
+        try:
+            self.response.raise_for_status()
+        except Exception:
+            self.response.__exit__(None, None, None)
+            raise
+        final_url = getattr(self.response, "url", self.url)
+        if final_url != self.url:
+            logger.info(f"Redirected to {final_url}")
+        self.total_size = int(self.response.headers.get("content-length", 0))
+        logger.info(f"Streaming {self.total_size / 1024 / 1024:.2f} MB")
+        return self
+
+    def __exit__(self, *args):
+        self.stats.finished = time.perf_counter()
+        self.response.__exit__(*args)
+        logger.info(f"Archive stats for {self.url}: {self.stats.as_dict()}")
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Iterate over the compressed archive, tracking progress in bytes.
+
+        Returns:
+            Iterator of compressed chunks
+        """
+        with tqdm(
+            total=self.total_size,
+            unit="B",
+            unit_scale=True,
+            desc="Streaming",
+            disable=self.progress_callback is not None,
+        ) as pbar:
+            for chunk in metrics.timed_iter(
+                "download", self.response.iter_content(chunk_size=self.chunk_size)
+            ):
+                self.stats.compressed_bytes += len(chunk)
+                pbar.update(len(chunk))
+                if self.progress_callback:
+                    self.progress_callback(self.stats.compressed_bytes, self.total_size)
+                yield chunk
+
+    def members(
+        self, extensions: Optional[tuple[str, ...]] = None
+    ) -> Iterator[tuple[str, Optional[int], Iterator[bytes]]]:
+        """
+        Iterate over the archive members as they are decompressed.
+
+        Args:
+            extensions: Optional member name suffixes to yield
+
+        Returns:
+            Iterator of (member name, uncompressed size, chunks of the member)
+        """
+        return iter_members(self.chunks(), extensions, self.stats)
+
+    def spool_first(self, extension: str, directory: str) -> Optional[str]:
+        """
+        Write the first member with the given extension to disk.
+
+        Args:
+            extension: File extension to look for, e.g. ".gpkg"
+            directory: Directory to write the member to
+
+        Returns:
+            Path to the spooled file, or None if no member matched
+        """
+        path = None
+        for name, _, member_chunks in self.members((extension,)):
+            if path is None:
+                path = os.path.join(directory, os.path.basename(name))
+                spool_member(member_chunks, path)
+        return path
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+import requests
+from loguru import logger
+
+
+class CachedResponse:
+    """
+    File backed stand-in for a streamed requests response, used when the
+    cached copy of a download is still current.
+    """
+
+    status_code = 200
+
+    def __init__(self, path: str, url: str):
+        self.path = path
+        self.url = url
+        self.headers = {"content-length": str(os.path.getsize(path))}
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        with open(self.path, "rb") as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+
+class CachingResponse:
+    """
+    Wraps a live streamed response and writes its body to the cache as it
+    is read, so a cache miss costs no extra pass over the download.
+
+    The body is only added to the cache once it has been read to the end.
+    """
+
+    def __init__(self, cache: "ArtifactCache", response, url: str):
+        self.cache = cache
+        self.response = response
+        self.url = url
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.temp_path: Optional[str] = None
+
+    def raise_for_status(self):
+        self.response.raise_for_status()
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        digest = hashlib.sha256()
+        self.temp_path = self.cache.temp_path()
+        with open(self.temp_path, "wb") as file:
+            for chunk in self.response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+                digest.update(chunk)
+                yield chunk
+        self.cache.store(
+            self.url,
+            self.temp_path,
+            digest.hexdigest(),
+            self.headers.get("ETag"),
+            self.headers.get("Last-Modified"),
+        )
+        self.temp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        # A body that was not read to the end is never cached
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.response.__exit__(*args)
+
+
+class ArtifactCache:
+    """
+    Content addressed local cache of downloaded files, keyed by URL.
+
+    Files are stored once per SHA-256 of their content under
+    <directory>/objects and an index maps every URL to its object along
+    with the ETag and Last-Modified the server sent. Cached URLs are
+    revalidated with a conditional GET, so a download that has not changed
+    upstream transfers no payload. The least recently used entries are
+    evicted once the objects exceed max_bytes.
+    """
+
+    # Shared by every instance - sources download concurrently in threads
+    _lock = threading.Lock()
+
+    def __init__(self, directory: str, max_bytes: int = 20 * 1024**3):
+        """
+        Initialise an artifact cache.
+
+        Args:
+            directory: Root directory of the cache
+            max_bytes: Maximum total size of the cached files
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.json")
+        self.objects_directory = os.path.join(directory, "objects")
+
+    @classmethod
+    def from_env(cls) -> Optional["ArtifactCache"]:
+        """
+        Build a cache from ARTIFACT_CACHE_DIR and ARTIFACT_CACHE_MAX_BYTES.
+
+        Returns:
+            An ArtifactCache, or None when ARTIFACT_CACHE_DIR is not set
+        """
+        directory = os.getenv("ARTIFACT_CACHE_DIR")
+        if not directory:
+            return None
+        return cls(directory, int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", 20 * 1024**3)))
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_directory, sha256)
+
+    def temp_path(self) -> str:
+        os.makedirs(self.objects_directory, exist_ok=True)
+        return os.path.join(
+            self.objects_directory, f".{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+
+    def read_index(self) -> dict:
+        try:
+            with open(self.index_path) as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable artifact cache {self.index_path}: {e}")
+            return {}
+
+    def write_index(self, index: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """
+        Get the index entry of a URL if its file is still on disk.
+
+        Args:
+            url: Download URL
+
+        Returns:
+            The index entry, or None if the URL is not cached
+        """
+        with self._lock:
+            entry = self.read_index().get(url)
+        if entry is None or not os.path.exists(self.object_path(entry["sha256"])):
+            return None
+        return entry
+
+    def store(
+        self,
+        url: str,
+        temp_path: str,
+        sha256: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ):
+        """
+        Move a downloaded file into the cache and record it against its URL.
+
+        Args:
+            url: Download URL
+            temp_path: Path of the downloaded file
+            sha256: SHA-256 of the file content
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+        """
+        path = self.object_path(sha256)
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, path)
+            index = self.read_index()
+            index[url] = {
+                "sha256": sha256,
+                "size": os.path.getsize(path),
+                "etag": etag,
+                "last_modified": last_modified,
+                "last_used": time.time(),
+            }
+            self.evict(index, keep=url)
+            self.write_index(index)
+        logger.success(f"Cached {url} as {sha256}")
+
+    def touch(self, url: str):
+        """Mark a cached URL as used for LRU eviction."""
+        with self._lock:
+            index = self.read_index()
+            if url in index:
+                index[url]["last_used"] = time.time()
+                self.write_index(index)
+
+    def evict(self, index: dict, keep: str):
+        """
+        Drop least recently used entries until the objects fit in max_bytes.
+
+        Args:
+            index: Index to evict from, updated in place
+            keep: URL that is never evicted
+        """
+        sizes = {entry["sha256"]: entry["size"] for entry in index.values()}
+        total = sum(sizes.values())
+        for url in sorted(index, key=lambda url: index[url]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            sha256 = index.pop(url)["sha256"]
+            # Objects are shared by every URL with the same content
+            if all(entry["sha256"] != sha256 for entry in index.values()):
+                total -= sizes[sha256]
+                if os.path.exists(self.object_path(sha256)):
+                    os.remove(self.object_path(sha256))
+            logger.info(f"Evicted {url} from the artifact cache")
+
+    def get(self, url: str, timeout: Optional[float] = None):
+        """
+        Open a download through the cache.
+
+        A cached URL is revalidated with If-None-Match and If-Modified-Since -
+        a 304 is served from disk, anything else replaces the cached copy
+        as the new body is read.
+
+        Args:
+            url: Download URL
+            timeout: Optional requests timeout in seconds
+
+        Returns:
+            A response-like object to stream the body from
+        """
+        entry = self.lookup(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = requests.get(url, stream=True, timeout=timeout, headers=headers)
+        if entry is not None and response.status_code == 304:
+            response.__exit__(None, None, None)
+            logger.info(f"{url} has not changed - reading the cached copy")
+            self.touch(url)
+            return CachedResponse(self.object_path(entry["sha256"]), url)
+        return CachingResponse(self, response, url)
+
+
+def open_url(url: str, timeout: Optional[float] = None):
+    """
+    Open a streamed download, going through the artifact cache when
+    ARTIFACT_CACHE_DIR is set.
+
+    Args:
+        url: Download URL
+        timeout: Optional requests timeout in seconds
+
+    Returns:
+        A streamed requests response or a response-like object from the cache
+    """
+    cache = ArtifactCache.from_env()
+    if cache is None:
+        return requests.get(url, stream=True, timeout=timeout)
+    return cache.get(url, timeout)
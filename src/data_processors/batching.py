@@ -0,0 +1,214 @@
+import os
+import threading
+from typing import Optional, Union
+
+import psutil
+from loguru import logger
+
+# Memory held per row is a multiple of the Arrow size of a batch - the raw
+# events, the decoded table and the insert buffer are alive at the same time
+MEMORY_OVERHEAD = 3
+
+# Share of the container or machine memory batches may grow into by default
+DEFAULT_MEMORY_FRACTION = 0.6
+
+CGROUP_MEMORY_LIMITS = (
+    "/sys/fs/cgroup/memory.max",
+    "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+)
+
+
+def available_memory() -> int:
+    """
+    Memory the process may use, in bytes.
+
+    Returns:
+        The container memory limit when running under a cgroup limit,
+        otherwise the total memory of the machine
+    """
+    total = psutil.virtual_memory().total
+    for path in CGROUP_MEMORY_LIMITS:
+        try:
+            with open(path) as limit_file:
+                limit = limit_file.read().strip()
+        except OSError:
+            continue
+        # Unlimited cgroups report "max" or a huge sentinel value
+        if limit.isdigit() and int(limit) < total:
+            return int(limit)
+    return total
+
+
+class BatchSizer:
+    """
+    Chooses how many rows go into the next batch.
+
+    After every insert the sizer is told how many rows and bytes the batch
+    held and how long the insert took. The batch grows while inserts finish
+    well inside the target latency, so round trips are amortised, and
+    shrinks in proportion when they run over it. Independently, the next
+    batch is capped so that the batches in flight fit in the memory left
+    under the budget, measured from the RSS of the process.
+
+    A sizer whose minimum and maximum are equal never changes size, which
+    is what processors use when they are given a plain integer.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: Optional[int] = None,
+        maximum: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        target_seconds: float = 10.0,
+    ):
+        """
+        Initialise the batch sizer.
+
+        Args:
+            initial: Rows in the first batch
+            minimum: Smallest batch - defaults to initial / 16
+            maximum: Largest batch - defaults to initial * 8
+            memory_budget: RSS in bytes the process should stay under -
+                defaults to 60% of the container or machine memory
+            target_seconds: Insert latency batches are sized towards
+        """
+        self.minimum = minimum or max(1, initial // 16)
+        self.maximum = maximum or initial * 8
+        self.memory_budget = memory_budget or int(
+            available_memory() * DEFAULT_MEMORY_FRACTION
+        )
+        self.target_seconds = target_seconds
+        self.bytes_per_row: Optional[float] = None
+        self.process = psutil.Process()
+        self._size = self.clamp(initial)
+        self._issued = self._size
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fixed(cls, size: int) -> "BatchSizer":
+        return cls(size, minimum=size, maximum=size)
+
+    @classmethod
+    def from_env(cls, initial: int) -> "BatchSizer":
+        """
+        Create a batch sizer configured by environment variables.
+
+        ADAPTIVE_BATCHING=false keeps the size fixed. BATCH_MIN_ROWS,
+        BATCH_MAX_ROWS, BATCH_MEMORY_BUDGET_MB and BATCH_TARGET_SECONDS
+        override the defaults.
+
+        Args:
+            initial: Rows in the first batch, usually the configured limit
+
+        Returns:
+            BatchSizer
+        """
+        if os.getenv("ADAPTIVE_BATCHING", "true").lower() in ("0", "false"):
+            return cls.fixed(initial)
+
+        budget_mb = os.getenv("BATCH_MEMORY_BUDGET_MB")
+        return cls(
+            initial,
+            minimum=int(os.getenv("BATCH_MIN_ROWS", "0")) or None,
+            maximum=int(os.getenv("BATCH_MAX_ROWS", "0")) or None,
+            memory_budget=int(float(budget_mb) * 1024 * 1024) if budget_mb else None,
+            target_seconds=float(os.getenv("BATCH_TARGET_SECONDS", "10")),
+        )
+
+    @property
+    def adaptive(self) -> bool:
+        return self.minimum != self.maximum
+
+    def clamp(self, size: float) -> int:
+        return int(min(self.maximum, max(self.minimum, size)))
+
+    def next_size(self, in_flight: int = 1) -> int:
+        """
+        Rows to put in the next batch.
+
+        Args:
+            in_flight: Batches held in memory at the same time, e.g. queued
+                for decoding or inserting
+
+        Returns:
+            Number of rows
+        """
+        if not self.adaptive:
+            return self.minimum
+
+        with self._lock:
+            size = self._size
+            bytes_per_row = self.bytes_per_row
+        if bytes_per_row:
+            headroom = self.memory_budget - self.process.memory_info().rss
+            per_batch = max(headroom, 0) / in_flight
+            size = min(size, per_batch / (bytes_per_row * MEMORY_OVERHEAD))
+        size = self.clamp(size)
+        with self._lock:
+            self._issued = size
+        return size
+
+    def observe(self, rows: int, nbytes: int, seconds: float):
+        """
+        Adjust the batch size from a finished insert.
+
+        Args:
+            rows: Rows in the batch
+            nbytes: In-memory size of the batch in bytes
+            seconds: Time the insert took
+        """
+        if not self.adaptive or rows <= 0:
+            return
+
+        with self._lock:
+            bytes_per_row = nbytes / rows
+            self.bytes_per_row = (
+                bytes_per_row
+                if self.bytes_per_row is None
+                else 0.7 * self.bytes_per_row + 0.3 * bytes_per_row
+            )
+
+            # Partial batches say little about how a full batch would do
+            if rows < self._issued // 2:
+                return
+
+            # Sizes follow the observed batch, which the memory cap may have
+            # kept below the latency driven size
+            previous = self._size
+            if self.process.memory_info().rss > self.memory_budget:
+                self._size = self.clamp(rows / 2)
+            elif seconds > self.target_seconds:
+                self._size = self.clamp(rows * self.target_seconds / seconds)
+            elif seconds < self.target_seconds / 2:
+                self._size = self.clamp(rows * 1.5)
+
+            if self._size != previous:
+                logger.info(
+                    f"Batch size {previous} -> {self._size} rows "
+                    f"(insert {seconds:.2f}s, {self.bytes_per_row:.0f} bytes/row)"
+                )
+
+    def __str__(self) -> str:
+        if not self.adaptive:
+            return str(self.minimum)
+        return (
+            f"adaptive {self._size} rows ({self.minimum}-{self.maximum}, "
+            f"budget {self.memory_budget // 1024 // 1024} MB, "
+            f"target {self.target_seconds}s)"
+        )
+
+
+def as_batch_sizer(batch_size: Union[int, BatchSizer]) -> BatchSizer:
+    """
+    Accept either a fixed batch size or a batch sizer.
+
+    Args:
+        batch_size: Number of rows per batch or a BatchSizer
+
+    Returns:
+        BatchSizer - fixed when given an integer
+    """
+    if isinstance(batch_size, BatchSizer):
+        return batch_size
+    return BatchSizer.fixed(batch_size)
@@ -1,12 +1,20 @@
+import re
 import duckdb
 from loguru import logger
 from typing import Optional
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import requests
 from io import BytesIO
 from datetime import datetime
 from msoffcrypto import OfficeFile
 
+from data_processors.artifact_cache import open_url
+from database.staging import ParquetStager
+from metrics import metrics
+from profiling import profiled
+
 
 def insert_table_to_motherduck(df, conn, schema, table):
     """
@@ -20,37 +28,100 @@ def insert_table_to_motherduck(df, conn, schema, table):
         schema: The schema of the table.
         table: The name of the table.
     """
+    if isinstance(conn, ParquetStager):
+        with metrics.stage("stage_parquet", rows=len(df)):
+            conn.stage(df, schema, table)
+        return
+
     try:
         insert_sql = f"""INSERT INTO "{schema}"."{table}" SELECT * FROM df"""
-        conn.execute(insert_sql)
+        with metrics.stage("insert", rows=len(df)):
+            conn.execute(insert_sql)
     except (duckdb.DataError, duckdb.Error, Exception) as e:
         logger.error(f"Error inserting DataFrame into DuckDB: {e}")
         raise
 
 
-def clean_name_geoplace(x: str):
+# Authority type words removed from account names - where two overlap the
+# earlier entry wins, as when they were removed one after another
+ACCOUNT_NAME_NOISE = [
+    "LONDON BOROUGH OF",
+    "COUNTY COUNCIL",
+    "BOROUGH COUNCIL",
+    "CITY COUNCIL",
+    "COUNCIL",
+    "ROYAL BOROUGH OF",
+    "COUNCIL OF THE",
+    "CITY OF",
+    "COUNTY",
+    "BOROUGH",
+    "CITY",
+    "METROPOLITAN",
+    "DISTRICT",
+    "CORPORATION",
+    "OF",
+]
+ACCOUNT_NAME_PATTERN = "|".join(re.escape(word) for word in ACCOUNT_NAME_NOISE)
+ACCOUNT_NAME_REGEX = re.compile(ACCOUNT_NAME_PATTERN)
+
+# Cleaned names that differ from the DfT local authority names
+ACCOUNT_NAME_OVERRIDES = {
+    "peter": "peterborough",
+    "bournemouth, christchurch and poole": "bournemouth christchurch and poole",
+    "brighton & hove": "brighton and hove",
+    "telford & wrekin": "telford and wrekin",
+    "hammersmith & fulham": "hammersmith and fulham",
+    "cheshire east": "east cheshire",
+    "cheshire west and chester": "west cheshire",
+    "east riding  yorkshire": "eastridingyorkshire",
+}
+
+
+def clean_name_geoplace(x: str) -> str:
+    """
+    Normalise one GeoPlace account name for joining to DfT authority names.
+
+    Authority type words are removed, the name is trimmed and lower cased
+    and known differences are mapped - normalise_account_names does the
+    same for a whole column.
+
+    Args:
+        x: Account name
+
+    Returns:
+        Normalised account name
+    """
+    x = ACCOUNT_NAME_REGEX.sub("", x).strip().lower()
+    return ACCOUNT_NAME_OVERRIDES.get(x, x)
+
+
+def normalise_account_names(names: pd.Series) -> pd.Series:
     """
-    Used to clean names columns ready for left join in the future
+    Normalise a column of GeoPlace account names in vectorised passes.
+
+    Gives the same result as clean_name_geoplace for every value, with
+    missing names kept as missing.
+
+    Args:
+        names: Series of account names
 
-    # usage: df.loc[:, "account_name"] = df.loc[:, "account_name"].apply(clean_name)
+    Returns:
+        Series of normalised account names with the same index
     """
-    x = x.replace("LONDON BOROUGH OF", "").strip()
-    x = x.replace("COUNTY COUNCIL", "").strip()
-    x = x.replace("BOROUGH COUNCIL", "").strip()
-    x = x.replace("CITY COUNCIL", "").strip()
-    x = x.replace("COUNCIL", "").strip()
-    x = x.replace("ROYAL BOROUGH OF", "").strip()
-    x = x.replace("COUNCIL OF THE", "").strip()
-    x = x.replace("CITY OF", "").strip()
-    x = x.replace("COUNTY", "").strip()
-    x = x.replace("BOROUGH", "").strip()
-    x = x.replace("CITY", "").strip()
-    x = x.replace("METROPOLITAN", "").strip()
-    x = x.replace("DISTRICT", "").strip()
-    x = x.replace("CORPORATION", "").strip()
-    x = x.replace("OF", "").strip()
-    x = str(x).lower()
-    return x
+    cleaned = pc.replace_substring_regex(
+        pa.array(names, pa.string(), from_pandas=True), ACCOUNT_NAME_PATTERN, ""
+    )
+    # Only the ends are trimmed, as the original cleaning did - runs of spaces
+    # left inside a name are collapsed by the dft_data_joins model instead
+    cleaned = pc.utf8_lower(pc.utf8_trim_whitespace(cleaned))
+
+    overrides = pa.array(list(ACCOUNT_NAME_OVERRIDES))
+    replacements = pa.array(list(ACCOUNT_NAME_OVERRIDES.values()))
+    override = pc.take(replacements, pc.index_in(cleaned, overrides))
+    normalised = pc.if_else(pc.is_null(override), cleaned, override)
+    return pd.Series(
+        normalised.to_numpy(zero_copy_only=False), index=names.index, name=names.name
+    )
 
 
 def fetch_swa_codes(url: str) -> Optional[pd.DataFrame]:
@@ -69,42 +140,32 @@ def fetch_swa_codes(url: str) -> Optional[pd.DataFrame]:
         return None
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-
-        result = BytesIO(response.content)
-        office_file = OfficeFile(result)
-        office_file.load_key("VelvetSweatshop")
-
-        decrypted_file = BytesIO()
-        office_file.decrypt(decrypted_file)
-        decrypted_file.seek(0)
-
-        # Read in and do some basic renames and transformation
-        df = pd.read_excel(decrypted_file, header=1, engine="xlrd")
-        df = df.astype(str).replace("nan", None)
+        with open_url(url) as response:
+            response.raise_for_status()
+            result = BytesIO(
+                b"".join(
+                    metrics.timed_iter(
+                        "download", response.iter_content(chunk_size=1048576)
+                    )
+                )
+            )
+
+        with metrics.stage("parse_excel", bytes_in=result.getbuffer().nbytes):
+            office_file = OfficeFile(result)
+            office_file.load_key("VelvetSweatshop")
+
+            decrypted_file = BytesIO()
+            office_file.decrypt(decrypted_file)
+            decrypted_file.seek(0)
+
+            # Read in and do some basic renames and transformation
+            # pandas picks xlrd for the published XLS and openpyxl for XLSX.
+            # Every column is read as text and empty cells stay missing,
+            # which DuckDB inserts as NULL
+            df = pd.read_excel(decrypted_file, header=1, dtype=str)
+        metrics.record("parse_excel", rows=len(df))
         df.columns = df.columns.str.lower().str.replace(" ", "_").str.replace("/", "_")
-        df.loc[:, "account_name"] = df.loc[:, "account_name"].apply(clean_name_geoplace)
-        df.loc[df["account_name"] == "peter", "account_name"] = "peterborough"
-        df.loc[
-            df["account_name"] == "bournemouth, christchurch and poole", "account_name"
-        ] = "bournemouth christchurch and poole"
-        df.loc[df["account_name"] == "brighton & hove", "account_name"] = (
-            "brighton and hove"
-        )
-        df.loc[df["account_name"] == "telford & wrekin", "account_name"] = (
-            "telford and wrekin"
-        )
-        df.loc[df["account_name"] == "hammersmith & fulham", "account_name"] = (
-            "hammersmith and fulham"
-        )
-        df.loc[df["account_name"] == "cheshire east", "account_name"] = "east cheshire"
-        df.loc[df["account_name"] == "cheshire west and chester", "account_name"] = (
-            "west cheshire"
-        )
-        df.loc[df["account_name"] == "east riding  yorkshire", "account_name"] = (
-            "eastridingyorkshire"
-        )
+        df["account_name"] = normalise_account_names(df["account_name"])
 
         # Add date time processed column
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -119,6 +180,7 @@ def fetch_swa_codes(url: str) -> Optional[pd.DataFrame]:
     return None
 
 
+@profiled
 def process_data(url: str, conn, schema_name: str, table_name: str) -> None:
     """
     Main function to fetch and process data stream with Pandas.
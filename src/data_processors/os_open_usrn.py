@@ -1,26 +1,38 @@
-import requests
-import os
+from typing import Callable, Optional, Union
 import tempfile
-import zipfile
-import pandas as pd
-import fiona
-from shapely import wkt
-from shapely.geometry import shape
+import time
+import pyarrow as pa
+import pyogrio
+import shapely
 from loguru import logger
 from tqdm import tqdm
 
+from data_processors.archive import ArchiveStream
+from data_processors.batching import BatchSizer, as_batch_sizer
+from database.staging import ParquetStager
+from metrics import metrics
+from profiling import profiled
+
 
 def insert_into_motherduck(df, conn, schema: str, table: str):
     """
-    Processes dataframe into MotherDuck table
+    Processes dataframe or Arrow table into MotherDuck table
+
+    Columns are matched by name so the order of the GeoPackage fields
+    does not need to follow the table definition.
 
     Args:
-        Dataframe
+        Dataframe or Arrow table
         Connection object
         Schema name
         Table name
     """
 
+    if isinstance(conn, ParquetStager):
+        with metrics.stage("stage_parquet", rows=len(df)):
+            conn.stage(df, schema, table)
+        return None
+
     if conn:
         try:
             logger.info(f"Attempting to insert into schema: {schema}, table: {table}")
@@ -28,13 +40,12 @@ def insert_into_motherduck(df, conn, schema: str, table: str):
             conn.register("df_temp", df)
 
             if schema == "open_usrns_latest" and table == "os_open_usrns":
-                insert_sql = """INSERT INTO open_usrns_latest.os_open_usrns SELECT * FROM df_temp"""
+                insert_sql = """INSERT INTO open_usrns_latest.os_open_usrns BY NAME SELECT * FROM df_temp"""
             else:
-                insert_sql = (
-                    f"""INSERT INTO "{schema}"."{table}" SELECT * FROM df_temp"""
-                )
+                insert_sql = f"""INSERT INTO "{schema}"."{table}" BY NAME SELECT * FROM df_temp"""
 
-            conn.execute(insert_sql)
+            with metrics.stage("insert", rows=len(df)):
+                conn.execute(insert_sql)
             logger.success(f"Inserted {len(df)} rows into {schema}.{table}")
         except Exception as e:
             logger.error(f"Error inserting DataFrame into DuckDB: {e}")
@@ -42,127 +53,147 @@ def insert_into_motherduck(df, conn, schema: str, table: str):
     return None
 
 
-def fetch_redirect_url(url: str) -> str:
+def geometries_to_wkt(wkb_geometries: pa.Array) -> pa.Array:
     """
-    Call the redirect url and then fetch the actual download url.
-    This is suboptimal and will change in future versions.
+    Convert a column of WKB geometries into WKT strings in one vectorised pass.
+
+    Matches shapely.wkt.dumps defaults so the output is identical to the
+    per-feature conversion. Missing or unreadable geometries become null.
+
+    Args:
+        wkb_geometries: PyArrow array of WKB encoded geometries
+
+    Returns:
+        PyArrow string array of WKT geometries
     """
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        redirect_url = response.url
-        logger.success(f"The Redirect URL is: {redirect_url}")
-    except (requests.exceptions.RequestException, ValueError, Exception) as e:
-        logger.error(f"An error retrieving the redirect URL: {e}")
-        raise
-    return redirect_url
+    geometries = shapely.from_wkb(
+        wkb_geometries.to_numpy(zero_copy_only=False), on_invalid="ignore"
+    )
+    return pa.array(
+        shapely.to_wkt(geometries, rounding_precision=-1, trim=False), pa.string()
+    )
 
 
 def load_geopackage_open_usrns(
-    url: str, conn, batch_size: int, schema: str, table: str
+    url: str,
+    conn,
+    batch_size: Union[int, BatchSizer],
+    schema: str,
+    table: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
 ):
     """
-    Function to load OS open usrn data in batches of 50,000 rows.
+    Function to load OS open usrn data in record batches.
+
+    The zip is streamed and only the GeoPackage member is spooled to disk,
+    so the archive itself is never written. The GeoPackage is then read with
+    the GDAL Arrow stream so every batch is converted and inserted without
+    any per-feature Python work.
 
     It taskes a duckdb connection object and the download url required.
 
     Args:
         Url for data
         Connection object
+        Batch size, or a BatchSizer that adapts it to insert latency and memory
+        Schema name
+        Table name
+        Optional download progress callback taking (bytes written, total bytes)
     """
 
-    # This can be changed based on how much memory you want to use overall
-    chunk_size = batch_size
-
     # List to store errors
     errors = []
 
     try:
-        # Download the zip file
-        logger.info("Downloading zip file...")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-
         # Create a temporary directory
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Write the zip file to the temporary directory
-            zip_path = os.path.join(temp_dir, "temp.zip")
-            with open(zip_path, "wb") as zip_file:
-                zip_file.write(response.content)
-
-            logger.info("Extracting zip file...")
-            # Extract the contents of the zip file
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Find the GeoPackage file
-            gpkg_file = None
-            for file_name in os.listdir(temp_dir):
-                if file_name.endswith(".gpkg"):
-                    gpkg_file = os.path.join(temp_dir, file_name)
-                    logger.success(f"The GeoPackage file is: {gpkg_file}")
-                    break
+            # GDAL needs random access, so the GeoPackage member is spooled
+            logger.info("Streaming GeoPackage from zip file...")
+            with ArchiveStream(url, progress_callback=progress_callback) as archive:
+                gpkg_file = archive.spool_first(".gpkg", temp_dir)
+            if gpkg_file:
+                logger.success(f"The GeoPackage file is: {gpkg_file}")
 
             if gpkg_file:
                 try:
-                    # Open the GeoPackage file
-                    with fiona.open(gpkg_file, "r") as src:
-                        # Print some of the metadata to check everything is OK
-                        crs = src.crs
-                        data_schema = src.schema
-
-                        logger.info(f"The CRS is: {crs}")
-                        logger.info(f"The Data Schema is: {data_schema}")
-
-                        # Get total number of features for the progress bar
-                        total_features = len(src)
-                        logger.info(f"Total features to process: {total_features}")
-
-                        # List to store extracted features for DataFrame processing
-                        features = []
-
-                        # Use tqdm for progress tracking
-                        for i, feature in enumerate(
-                            tqdm(src, total=total_features, desc="Processing features")
-                        ):
-                            try:
-                                # Convert geometry to WKT string
-                                geom = shape(feature["geometry"])
-                                feature["properties"]["geometry"] = wkt.dumps(geom)
-                            except Exception as e:
-                                # If there's an error converting the geometry, set it to None
-                                feature["properties"]["geometry"] = None
-                                error_msg = (
-                                    f"Error converting geometry for feature {i}: {e}"
-                                )
-                                logger.warning(error_msg)
-                                errors.append(error_msg)
-
-                            # Append each feature to the list
-                            features.append(feature["properties"])
-
-                            # When the list hits the limit size - e.g. 75,000
-                            # Process list into DataFrame
-                            if len(features) == chunk_size:
-                                # Process the chunk
-                                df_chunk = pd.DataFrame(features)
-                                insert_into_motherduck(df_chunk, conn, schema, table)
-                                logger.info(
-                                    f"Processed features {i-chunk_size+1} to {i}"
+                    # Print some of the metadata to check everything is OK
+                    info = pyogrio.read_info(gpkg_file)
+                    logger.info(f"The CRS is: {info['crs']}")
+                    logger.info(
+                        f"The Data Schema is: {dict(zip(info['fields'], info['dtypes']))}"
+                    )
+
+                    total_features = info["features"]
+                    logger.info(f"Total features to process: {total_features}")
+
+                    null_geometries = 0
+                    processed = 0
+                    sizer = as_batch_sizer(batch_size)
+                    pending = []
+                    pending_rows = 0
+
+                    def insert_pending():
+                        """Closure for inserting the converted batches as one table"""
+                        nonlocal processed, pending, pending_rows
+                        batch_table = pa.concat_tables(pending)
+                        start = time.perf_counter()
+                        insert_into_motherduck(batch_table, conn, schema, table)
+                        sizer.observe(
+                            batch_table.num_rows,
+                            batch_table.nbytes,
+                            time.perf_counter() - start,
+                        )
+                        logger.info(
+                            f"Processed features {processed} to "
+                            f"{processed + pending_rows - 1}"
+                        )
+                        processed += pending_rows
+                        pending = []
+                        pending_rows = 0
+
+                    # The reader yields the smallest batch size and batches
+                    # are gathered up to the current size before inserting
+                    with pyogrio.raw.open_arrow(
+                        gpkg_file, batch_size=sizer.minimum, use_pyarrow=True
+                    ) as (meta, reader):
+                        geometry_name = meta["geometry_name"] or "wkb_geometry"
+
+                        with tqdm(
+                            total=total_features, desc="Processing features"
+                        ) as pbar:
+                            for batch in metrics.timed_iter(
+                                "gpkg_read", reader, rows=True
+                            ):
+                                with metrics.stage("wkt_convert", rows=batch.num_rows):
+                                    geometry = geometries_to_wkt(
+                                        batch.column(geometry_name)
+                                    )
+                                null_geometries += geometry.null_count
+
+                                # Properties keep their layer order with the
+                                # WKT geometry appended, as per feature before
+                                batch_table = pa.Table.from_batches([batch])
+                                pending.append(
+                                    batch_table.drop_columns(
+                                        [geometry_name]
+                                    ).append_column("geometry", geometry)
                                 )
+                                pending_rows += batch.num_rows
+                                pbar.update(batch.num_rows)
 
-                                # Empty the list
-                                features = []
+                                if pending_rows >= sizer.next_size():
+                                    insert_pending()
 
-                        # Process any remaining features outside the loop
-                        if features:
-                            df_chunk = pd.DataFrame(features)
-                            insert_into_motherduck(df_chunk, conn, schema, table)
-                            logger.info(
-                                f"Processed remaining features: {len(features)}"
-                            )
-                            # Empty the list
-                            features = []
+                            if pending:
+                                insert_pending()
+
+                    if null_geometries:
+                        error_msg = (
+                            f"Geometry could not be converted for "
+                            f"{null_geometries} features"
+                        )
+                        logger.warning(error_msg)
+                        errors.append(error_msg)
 
                 except Exception as e:
                     error_msg = f"Error processing GeoPackage: {e}"
@@ -188,12 +219,19 @@ def load_geopackage_open_usrns(
     return None
 
 
-def process_data(url: str, conn, batch_size: int, schema_name: str, table_name: str):
+@profiled
+def process_data(
+    url: str,
+    conn,
+    batch_size: Union[int, BatchSizer],
+    schema_name: str,
+    table_name: str,
+):
     """
     Process the data from the url and insert it into the motherduck table.
     """
     logger.info(
         f"Starting data stream processing from {url} with batch size {batch_size}"
     )
-    redirect_url = fetch_redirect_url(url)
-    load_geopackage_open_usrns(redirect_url, conn, batch_size, schema_name, table_name)
+    # Redirects to the actual download url are followed by the archive stream
+    load_geopackage_open_usrns(url, conn, batch_size, schema_name, table_name)
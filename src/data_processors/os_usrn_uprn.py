@@ -1,12 +1,21 @@
 from loguru import logger
 import time
-import requests
+import uuid
+import io
 import os
 import tempfile
-import zipfile
 import csv
+import duckdb
 import pandas as pd
-from tqdm import tqdm
+import pyarrow as pa
+from collections import Counter
+from typing import Optional, Union
+
+from data_processors.archive import ArchiveStream, ChunkReader, spool_member
+from data_processors.batching import BatchSizer, as_batch_sizer
+from database.staging import ParquetStager
+from metrics import metrics
+from profiling import profiled
 
 
 def insert_into_motherduck(df, conn, schema: str, table: str):
@@ -23,6 +32,11 @@ def insert_into_motherduck(df, conn, schema: str, table: str):
     max_retries = 3
     base_delay = 3
 
+    if isinstance(conn, ParquetStager):
+        with metrics.stage("stage_parquet", rows=len(df)):
+            conn.stage(df, schema, table)
+        return True
+
     if not conn:
         logger.error("No connection provided")
         return None
@@ -35,7 +49,8 @@ def insert_into_motherduck(df, conn, schema: str, table: str):
 
             # Now use the registered name in the SQL
             insert_sql = f"""INSERT INTO "{schema}"."{table}" SELECT * FROM temp_df"""
-            conn.execute(insert_sql)
+            with metrics.stage("insert", rows=len(df)):
+                conn.execute(insert_sql)
 
             if retry_count > 0:  # Log if it succeeded after retries
                 logger.success(
@@ -61,16 +76,139 @@ def insert_into_motherduck(df, conn, schema: str, table: str):
     return False
 
 
-def load_csv_data(url: str, conn, batch_limit: int, schema: str, name: str):
+def bulk_load_csv(
+    csv_file: str, conn, schema: str, table: str, db_template: dict
+) -> tuple[int, list[str]]:
+    """
+    Load a CSV file with DuckDB's native parallel CSV reader.
+
+    The file is typed with the db_template columns and inserted with a
+    single INSERT ... SELECT. Rows that do not match the template types are
+    skipped and reported back instead of failing the load.
+
+    Args:
+        csv_file: Path to the extracted CSV file
+        conn: DuckDB connection object or ParquetStager
+        schema: Database schema
+        table: Table name
+        db_template: Dictionary of column names and their DuckDB types
+
+    Returns:
+        Tuple of (rows inserted, error messages for rejected rows)
+    """
+    # The default reject tables are shared by the connection and appended to
+    # by every scan, so each load gets its own and drops them afterwards
+    suffix = uuid.uuid4().hex
+    rejects_table = f"reject_errors_{suffix}"
+    rejects_scan = f"reject_scans_{suffix}"
+    select_csv = f"""SELECT * FROM read_csv(
+        $csv_file, header = true, columns = $columns, store_rejects = true,
+        rejects_table = '{rejects_table}', rejects_scan = '{rejects_scan}'
+    )"""
+    parameters = {"csv_file": csv_file, "columns": db_template}
+
+    stager = None
+    if isinstance(conn, ParquetStager):
+        stager, conn = conn, conn.connection
+    try:
+        if stager is not None:
+            inserted = stager.stage_query(select_csv, schema, table, parameters)
+        else:
+            inserted = conn.execute(
+                f'INSERT INTO "{schema}"."{table}" {select_csv}', parameters
+            ).fetchone()[0]
+
+        # Line numbers include the header row
+        rejected = conn.execute(
+            f"SELECT line, error_message FROM {rejects_table} ORDER BY line"
+        ).fetchall()
+    finally:
+        conn.execute(f"DROP TABLE IF EXISTS {rejects_table}")
+        conn.execute(f"DROP TABLE IF EXISTS {rejects_scan}")
+    errors = [
+        f"Error processing row {line - 1}: {message}" for line, message in rejected
+    ]
+    return inserted, errors
+
+
+def count_uprns_per_usrn(csv_file: str, db_template: dict) -> pa.Table:
+    """
+    Count the UPRNs correlated with each USRN in a LIDS CSV file.
+
+    Runs on a local DuckDB connection so only the compact result is sent
+    to MotherDuck. Rows that do not match the template types are skipped,
+    as they are by bulk_load_csv.
+
+    Args:
+        csv_file: Path to the extracted CSV file
+        db_template: Dictionary of column names and their DuckDB types
+
+    Returns:
+        PyArrow Table of usrn and uprn_count
+    """
+    with duckdb.connect() as local:
+        return local.execute(
+            """SELECT identifier_2 AS usrn, COUNT(correlation_id) AS uprn_count
+                FROM read_csv(
+                    $csv_file, header = true, columns = $columns, ignore_errors = true
+                )
+                WHERE identifier_2 IS NOT NULL
+                GROUP BY identifier_2""",
+            {"csv_file": csv_file, "columns": db_template},
+        ).arrow()
+
+
+def write_usrn_counts(counts: pa.Table, conn, schema: str, table: str) -> int:
+    """
+    Replace the usrn to uprn_count table in a single statement.
+
+    Args:
+        counts: PyArrow Table of usrn and uprn_count
+        conn: DuckDB connection object or ParquetStager
+        schema: Database schema
+        table: Table name
+
+    Returns:
+        Number of USRNs written
+    """
+    if isinstance(conn, ParquetStager):
+        return conn.stage(counts, schema, table)
+
+    conn.register("usrn_counts", counts)
+    conn.execute(
+        f"""CREATE OR REPLACE TABLE "{schema}"."{table}" AS
+            SELECT usrn::BIGINT AS usrn, uprn_count::BIGINT AS uprn_count
+            FROM usrn_counts
+            ORDER BY usrn"""
+    )
+    conn.unregister("usrn_counts")
+    logger.success(f"Wrote uprn counts for {len(counts)} USRNs to {schema}.{table}")
+    return len(counts)
+
+
+def load_csv_data(
+    url: str,
+    conn,
+    batch_limit: Union[int, BatchSizer],
+    schema: str,
+    name: str,
+    db_template: Optional[dict] = None,
+    count_table: Optional[str] = None,
+):
     """
     Function to stream and process CSV data in batches.
 
     Args:
         url (str): URL of the zipped CSV file
         conn: DuckDB connection object
-        batch_limit (int): Number of rows to process in each batch
+        batch_limit (int): Number of rows to process in each batch, or a
+            BatchSizer that adapts it to insert latency and memory
         schema (str): Database schema
         name (str): Table name
+        db_template (dict): Optional table template - when provided the CSV
+            is bulk loaded by DuckDB's native reader instead of in batches
+        count_table (str): Optional table to write the number of UPRNs per
+            USRN to, counted while the CSV is loaded
     """
     fieldnames = [
         "CORRELATION_ID",
@@ -85,16 +223,17 @@ def load_csv_data(url: str, conn, batch_limit: int, schema: str, name: str):
 
     errors = []
     total_rows_processed = 0
+    usrn_counts = Counter()
+    counts = None
+    sizer = as_batch_sizer(batch_limit)
 
-    def handle_error(message, exception=None, row_num=None):
+    def handle_error(message, exception=None):
         """Closure for consistent error handling"""
         error_msg = f"{message}"
-        if row_num:
-            error_msg = f"Error processing row {row_num}: {exception}"
-        elif exception:
+        if exception:
             error_msg = f"{message}: {exception}"
 
-        logger.warning(error_msg) if row_num else logger.error(error_msg)
+        logger.error(error_msg)
         errors.append(error_msg)
 
     def process_batch(batch, is_final=False):
@@ -106,7 +245,18 @@ def load_csv_data(url: str, conn, batch_limit: int, schema: str, name: str):
 
         try:
             df_chunk = pd.DataFrame(batch)
+            start = time.perf_counter()
             insert_into_motherduck(df_chunk, conn, schema, name)
+            sizer.observe(
+                len(df_chunk),
+                df_chunk.memory_usage(deep=True).sum(),
+                time.perf_counter() - start,
+            )
+            # Only rows that reached the table are counted
+            if count_table:
+                for row in batch:
+                    if row["IDENTIFIER_2"] and row["CORRELATION_ID"]:
+                        usrn_counts[int(row["IDENTIFIER_2"])] += 1
 
             batch_size = len(batch)
             total_rows_processed += batch_size
@@ -119,74 +269,84 @@ def load_csv_data(url: str, conn, batch_limit: int, schema: str, name: str):
                 "Error processing final batch" if is_final else "Error processing batch"
             )
             handle_error(message, e)
+            # Counts are only written for a complete load, so a skipped batch
+            # fails the load instead of leaving counts for rows not loaded
+            if count_table:
+                raise
 
-    try:
-        # Get and process the data
-        logger.info(f"Downloading file from {url}")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Download and extract zip file
-            zip_path = os.path.join(temp_dir, "temp.zip")
-
-            # Add progress bar for download
-            total_size = int(response.headers.get("content-length", 0))
-            logger.info(f"Downloading {total_size/1024/1024:.2f} MB")
-
-            with open(zip_path, "wb") as zip_file:
-                with tqdm(
-                    total=total_size, unit="B", unit_scale=True, desc="Downloading"
-                ) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        zip_file.write(chunk)
-                        pbar.update(len(chunk))
-
-            logger.info("Extracting zip file")
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            # Find CSV file
-            csv_file = next(
-                (
-                    os.path.join(temp_dir, f)
-                    for f in os.listdir(temp_dir)
-                    if f.endswith(".csv")
-                ),
-                None,
-            )
+    def process_rows(unzipped_chunks):
+        """Closure for batching rows read straight from the unzipped stream"""
+        text = io.TextIOWrapper(
+            io.BufferedReader(ChunkReader(unzipped_chunks), buffer_size=1048576),
+            encoding="utf-8",
+            newline="",
+        )
+        reader = csv.DictReader(text, fieldnames=fieldnames)
+        next(reader)  # Skip header
+
+        current_batch = []
+        current_limit = sizer.next_size()
+        for row in reader:
+            current_batch.append(row)
+            if len(current_batch) >= current_limit:
+                process_batch(current_batch)
+                current_batch = []
+                current_limit = sizer.next_size()
+
+        # Process remaining rows
+        if current_batch:
+            process_batch(current_batch, is_final=True)
+
+        return pa.table(
+            {
+                "usrn": pa.array(list(usrn_counts.keys()), pa.int64()),
+                "uprn_count": pa.array(list(usrn_counts.values()), pa.int64()),
+            }
+        )
 
-            if not csv_file:
+    try:
+        # Stream the zip and unzip the CSV member as it arrives - no copy of
+        # the archive or the extracted CSV is kept on disk
+        with ArchiveStream(url) as archive:
+            csv_found = False
+            for file_name, _, unzipped_chunks in archive.members((".csv",)):
+                if csv_found:
+                    continue
+
+                csv_found = True
+                logger.info(f"Processing {file_name}")
+
+                if db_template is None:
+                    counts = process_rows(unzipped_chunks)
+                    continue
+
+                # DuckDB's CSV reader needs a file, so only the CSV
+                # member is spooled to disk
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    csv_file = os.path.join(temp_dir, os.path.basename(file_name))
+                    spool_member(unzipped_chunks, csv_file)
+
+                    logger.info("Bulk loading CSV with DuckDB's native reader")
+                    csv_bytes = os.path.getsize(csv_file)
+                    with metrics.stage("bulk_load", bytes_in=csv_bytes):
+                        total_rows_processed, rejected = bulk_load_csv(
+                            csv_file, conn, schema, name, db_template
+                        )
+                    metrics.record("bulk_load", rows=total_rows_processed)
+                    if count_table:
+                        with metrics.stage("count_usrns", bytes_in=csv_bytes):
+                            counts = count_uprns_per_usrn(csv_file, db_template)
+                for error_msg in rejected:
+                    logger.warning(error_msg)
+                errors.extend(rejected)
+
+            if not csv_found:
                 handle_error("No CSV file found in the zip archive")
                 raise FileNotFoundError("No CSV file found in the zip archive")
 
-            # Get total line count for progress bar
-            total_lines = sum(1 for _ in open(csv_file))
-            logger.info(f"Processing {total_lines-1} rows from CSV")  # -1 for header
-
-            # Process CSV data
-            current_batch = []
-            with open(csv_file, "r", newline="") as file:
-                reader = csv.DictReader(file, fieldnames=fieldnames)
-                next(reader)  # Skip header
-
-                for i, row in enumerate(
-                    tqdm(reader, total=total_lines - 1, desc="Processing rows"), 1
-                ):
-                    try:
-                        current_batch.append(row)
-
-                        if len(current_batch) >= batch_limit:
-                            process_batch(current_batch)
-                            current_batch = []
-
-                    except Exception as e:
-                        handle_error("Error processing row", e, i)
-                        continue
-
-                # Process remaining rows
-                if current_batch:
-                    process_batch(current_batch, is_final=True)
+            if count_table:
+                with metrics.stage("write_counts", rows=len(counts)):
+                    write_usrn_counts(counts, conn, schema, count_table)
 
     except Exception as e:
         handle_error("Error processing the zip file", e)
@@ -203,9 +363,23 @@ def load_csv_data(url: str, conn, batch_limit: int, schema: str, name: str):
         )
 
 
-def process_data(url: str, conn, batch_limit: int, schema_name: str, table_name: str):
+@profiled
+def process_data(
+    url: str,
+    conn,
+    batch_limit: Union[int, BatchSizer],
+    schema_name: str,
+    table_name: str,
+    db_template: Optional[dict] = None,
+    count_table: Optional[str] = None,
+):
     """
     Process the data from the url and insert it into the database.
+
+    Passing the config's db_template switches to the native DuckDB bulk load,
+    and passing its usrn_count_table also writes the UPRN count per USRN.
     """
     # Load the data
-    load_csv_data(url, conn, batch_limit, schema_name, table_name)
+    load_csv_data(
+        url, conn, batch_limit, schema_name, table_name, db_template, count_table
+    )
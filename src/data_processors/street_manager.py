@@ -1,12 +1,56 @@
 import json
+import queue
+import re
+import threading
+import time
+import multiprocessing
 import pyarrow as pa
-from typing import Iterator, Any
-import requests
-
-from stream_unzip import stream_unzip
+import pyarrow.compute as pc
+import pyarrow.json as pa_json
+from typing import Iterator, Any, Optional, Union
+from concurrent.futures import Future, ProcessPoolExecutor
 from loguru import logger
 from tqdm import tqdm
 
+from data_processors.archive import ArchiveStats, ArchiveStream, iter_members
+from data_processors.batching import BatchSizer, as_batch_sizer
+from database.checkpoints import HighWaterMark, LoadCheckpoint
+from database.staging import ParquetStager
+from database.throttling import writer_slot
+from metrics import metrics
+from profiling import profiled, profiler
+
+
+# Arrow types for the DuckDB column types used in the db_template dictionaries
+DUCKDB_TO_ARROW_TYPES = {
+    "BIGINT": pa.int64(),
+    "INTEGER": pa.int32(),
+    "DOUBLE": pa.float64(),
+    "BOOLEAN": pa.bool_(),
+    "TIMESTAMP": pa.timestamp("us"),
+    "VARCHAR": pa.string(),
+}
+
+# Street Manager flags are published as "Yes" / "No" strings
+TRUE_STRINGS = pa.array(["yes", "true", "y"])
+FALSE_STRINGS = pa.array(["no", "false", "n"])
+
+# Fields of the Street Manager event envelope - every other template column
+# is nested under 'object_data'
+ENVELOPE_FIELDS = frozenset(
+    [
+        "version",
+        "event_reference",
+        "event_type",
+        "event_time",
+        "object_type",
+        "object_reference",
+    ]
+)
+
+# Top-level event_reference of a raw Street Manager event
+EVENT_REFERENCE_PATTERN = re.compile(rb'"event_reference"\s*:\s*"?(\d+)')
+
 
 def rename_columns(column_names: list[str]) -> list[str]:
     """
@@ -25,7 +69,11 @@ def rename_columns(column_names: list[str]) -> list[str]:
 
 
 def insert_table_to_motherduck(
-    table: pa.Table, conn, schema: str, table_name: str
+    table: pa.Table,
+    conn,
+    schema: str,
+    table_name: str,
+    merge_key: Optional[str] = None,
 ) -> None:
     """
     Inserts a PyArrow table into a MotherDuck table.
@@ -35,7 +83,14 @@ def insert_table_to_motherduck(
         conn: The MotherDuck connection
         schema: The schema of the table
         table_name: The name of the table
+        merge_key: Optional column - rows whose key is already in the
+            table are not inserted again
     """
+    if isinstance(conn, ParquetStager):
+        with metrics.stage("stage_parquet", rows=len(table), bytes_in=table.nbytes):
+            conn.stage(table, schema, table_name)
+        return
+
     try:
         # Register the PyArrow table with DuckDB
         # Use a different name than 'table' to avoid SQL keyword conflicts
@@ -51,15 +106,60 @@ def insert_table_to_motherduck(
         # Create SQL insert statement
         insert_sql = f"""INSERT INTO "{schema}"."{table_name}" ({columns_sql}) 
                         SELECT {placeholders} FROM input_data"""
+        if merge_key is not None:
+            insert_sql += f"""
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM "{schema}"."{table_name}" AS target
+                            WHERE target."{merge_key}" = input_data."{merge_key}"
+                        )"""
 
         # Execute SQL statement
-        conn.execute(insert_sql)
-        logger.success(f"Inserted {len(table)} rows into {schema}.{table_name}")
+        with metrics.stage("insert", rows=len(table), bytes_in=table.nbytes):
+            inserted = conn.execute(insert_sql).fetchone()[0]
+        logger.success(f"Inserted {inserted} rows into {schema}.{table_name}")
     except Exception as e:
         logger.error(f"Error inserting PyArrow Table into DuckDB: {e}")
         raise
 
 
+def commit_batch(
+    table: pa.Table,
+    conn,
+    schema: str,
+    table_name: str,
+    checkpoint: Optional[LoadCheckpoint] = None,
+    members_committed: int = 0,
+    merge_key: Optional[str] = None,
+) -> None:
+    """
+    Insert a batch, recording the checkpoint in the same transaction.
+
+    Args:
+        table: The PyArrow Table to be inserted
+        conn: The MotherDuck connection
+        schema: The schema of the table
+        table_name: The name of the table
+        checkpoint: Optional load checkpoint to advance with the insert
+        members_committed: Number of archive members covered by the batch
+        merge_key: Optional column used to skip rows already in the table
+    """
+    # A throttled connection keeps its writer slot for the whole batch, so
+    # the transaction is never left open waiting for a slot
+    with writer_slot(conn):
+        if checkpoint is None:
+            insert_table_to_motherduck(table, conn, schema, table_name, merge_key)
+            return
+
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            insert_table_to_motherduck(table, conn, schema, table_name)
+            checkpoint.save(members_committed, len(table))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
 def flatten_json(json_data) -> dict:
     """
     Street manager archived open data comes in nested json files
@@ -98,12 +198,71 @@ def process_json_chunk(chunk: bytes) -> dict[str, Any]:
     return flatten_json(json_data)
 
 
-def chunks_to_arrow_table(flattened_data: list[dict[str, Any]]) -> pa.Table:
+def parse_string_column(column: pa.ChunkedArray, column_type: str) -> pa.ChunkedArray:
+    """
+    Parse a column of strings into the Arrow type of a DuckDB column type.
+
+    Blank strings become nulls, timestamps may carry a trailing "Z" and
+    booleans accept "Yes" / "No" as well as "true" / "false".
+
+    Args:
+        column: Column of strings
+        column_type: DuckDB type to parse the column into
+
+    Returns:
+        Parsed column
+    """
+    column_type = column_type.upper()
+    column = pc.utf8_trim_whitespace(column)
+    column = pc.if_else(pc.equal(column, ""), None, column)
+
+    if column_type == "BOOLEAN":
+        lowered = pc.utf8_lower(column)
+        return pc.if_else(
+            pc.is_in(lowered, value_set=TRUE_STRINGS),
+            True,
+            pc.if_else(pc.is_in(lowered, value_set=FALSE_STRINGS), False, None),
+        )
+    if column_type == "TIMESTAMP":
+        column = pc.replace_substring_regex(column, pattern="Z$", replacement="")
+    return column.cast(DUCKDB_TO_ARROW_TYPES[column_type])
+
+
+def parse_typed_columns(table: pa.Table, typed_columns: Optional[dict]) -> pa.Table:
+    """
+    Convert the typed columns of a table from their published strings.
+
+    Args:
+        table: PyArrow Table as decoded from the JSON events
+        typed_columns: Optional dictionary of column names and their DuckDB
+            types - columns missing from the table are ignored
+
+    Returns:
+        PyArrow Table with the typed columns parsed
+    """
+    for name, column_type in (typed_columns or {}).items():
+        if name not in table.column_names:
+            continue
+        index = table.column_names.index(name)
+        column = table.column(index)
+        if pa.types.is_string(column.type):
+            column = parse_string_column(column, column_type)
+        else:
+            column = column.cast(DUCKDB_TO_ARROW_TYPES[column_type.upper()])
+        table = table.set_column(index, name, column)
+    return table
+
+
+def chunks_to_arrow_table(
+    flattened_data: list[dict[str, Any]], typed_columns: Optional[dict] = None
+) -> pa.Table:
     """
     Convert a list of flattened dictionaries to a PyArrow table.
 
     Args:
         flattened_data: List of dictionaries with flattened data
+        typed_columns: Optional dictionary of column names and DuckDB types
+            to parse from strings once the table is built
 
     Returns:
         PyArrow Table
@@ -124,50 +283,216 @@ def chunks_to_arrow_table(flattened_data: list[dict[str, Any]]) -> pa.Table:
     new_names = rename_columns(table.column_names)
     table = table.rename_columns(new_names)
 
-    return table
+    return parse_typed_columns(table, typed_columns)
+
+
+def template_to_arrow_fields(db_template: dict) -> list[pa.Field]:
+    """
+    Convert a db_template dictionary into Arrow fields.
+
+    Args:
+        db_template: Dictionary of column names and their DuckDB types
+
+    Returns:
+        List of PyArrow fields in template order
+    """
+    try:
+        return [
+            pa.field(name, DUCKDB_TO_ARROW_TYPES[column_type.upper()])
+            for name, column_type in db_template.items()
+        ]
+    except KeyError as e:
+        raise ValueError(f"No Arrow type mapping for DuckDB type {e}")
+
+
+def events_to_arrow_table(
+    events: list[bytes], db_template: dict, typed_columns: Optional[dict] = None
+) -> pa.Table:
+    """
+    Decode a batch of raw JSON events straight into a PyArrow table.
+
+    Events are parsed as newline delimited JSON by the Arrow reader against
+    the db_template schema, so no per-event Python dictionary is built.
+    Template columns named in ENVELOPE_FIELDS are read from the event
+    envelope and the rest from 'object_data'.
+
+    Args:
+        events: List of raw JSON documents, one per Street Manager event
+        db_template: Dictionary of column names and their DuckDB types
+        typed_columns: Optional dictionary of column names and DuckDB types
+            that are read as strings and parsed after decoding
+
+    Returns:
+        PyArrow Table with one column per db_template entry
+    """
+    typed_columns = typed_columns or {}
+    fields = template_to_arrow_fields(
+        {
+            name: "VARCHAR" if name in typed_columns else column_type
+            for name, column_type in db_template.items()
+        }
+    )
+    read_fields = [field for field in fields if field.name in ENVELOPE_FIELDS]
+    nested_fields = [field for field in fields if field.name not in ENVELOPE_FIELDS]
+    if nested_fields:
+        read_fields.append(pa.field("object_data", pa.struct(nested_fields)))
+
+    # Whitespace outside of strings is insignificant in JSON, so replacing
+    # line breaks turns each event into a single NDJSON line
+    payload = b"\n".join(
+        event.replace(b"\r", b" ").replace(b"\n", b" ")
+        if b"\n" in event or b"\r" in event
+        else event
+        for event in events
+    )
+
+    try:
+        table = pa_json.read_json(
+            pa.BufferReader(payload),
+            parse_options=pa_json.ParseOptions(
+                explicit_schema=pa.schema(read_fields),
+                unexpected_field_behavior="ignore",
+            ),
+        )
+    except pa.ArrowInvalid as e:
+        # Values that do not match the template types (e.g. a number in a
+        # VARCHAR column) cannot be coerced by the Arrow reader
+        logger.warning(f"Columnar decode failed, falling back to row decode: {e}")
+        return chunks_to_arrow_table(
+            [process_json_chunk(event) for event in events], typed_columns
+        )
+
+    table = table.flatten()
+    table = table.rename_columns(rename_columns(table.column_names))
+    return parse_typed_columns(table.select(list(db_template)), typed_columns)
+
+
+def is_loaded_event(event: bytes, min_event_reference: Optional[int]) -> bool:
+    """
+    Check an event against a high-water mark without decoding the document.
+
+    Args:
+        event: Raw JSON document for one Street Manager event
+        min_event_reference: Highest event reference already loaded
+
+    Returns:
+        True if the event is at or below the mark and can be skipped
+    """
+    if min_event_reference is None:
+        return False
+    match = EVENT_REFERENCE_PATTERN.search(event)
+    return match is not None and int(match.group(1)) <= min_event_reference
 
 
 def batch_processor(
-    zipped_chunks: Iterator, batch_size: int, conn, schema_name: str, table_name: str
+    zipped_chunks: Iterator,
+    batch_size: Union[int, BatchSizer],
+    conn,
+    schema_name: str,
+    table_name: str,
+    db_template: Optional[dict] = None,
+    checkpoint: Optional[LoadCheckpoint] = None,
+    skip_members: int = 0,
+    min_event_reference: Optional[int] = None,
+    merge_key: Optional[str] = None,
+    typed_columns: Optional[dict] = None,
+    archive_stats: Optional[ArchiveStats] = None,
 ) -> None:
     """
     Process data in batches and insert into MotherDuck.
 
     Args:
         zipped_chunks: Iterator of zipped chunks
-        batch_size: Number of items to process in each batch
+        batch_size: Number of items to process in each batch, or a
+            BatchSizer that adapts it to insert latency and memory
         conn: MotherDuck connection
         schema_name: Schema name
         table_name: Table name
+        db_template: Optional table template - when provided events are
+            decoded columnar with events_to_arrow_table
+        checkpoint: Optional load checkpoint advanced with every batch
+        skip_members: Number of leading archive members already committed
+        min_event_reference: Optional high-water mark - events at or below
+            it are skipped before they are decoded
+        merge_key: Optional column used to skip rows already in the table
+        typed_columns: Optional dictionary of column names and DuckDB types
+            parsed from strings at load time
+        archive_stats: Optional stats to record the uncompressed bytes and
+            members read in
     """
     batch_count = 0
+    member_count = 0
+    skipped_events = 0
     flattened_data = []
     current_file = None
     current_item = None
+    sizer = as_batch_sizer(batch_size)
+    batch_limit = sizer.next_size()
+    # Row mode decodes one event at a time, timed per batch
+    decode_timer = metrics.timer("json_decode")
+    decoded_bytes = 0
+
+    def build_table(batch: list) -> pa.Table:
+        """Closure for converting a batch in the configured ingest mode"""
+        nonlocal decoded_bytes
+        if db_template is None:
+            decode_timer.flush(rows=len(batch), bytes_in=decoded_bytes)
+            decoded_bytes = 0
+        with metrics.stage("arrow_convert", rows=len(batch)):
+            if db_template is not None:
+                return events_to_arrow_table(batch, db_template, typed_columns)
+            return chunks_to_arrow_table(batch, typed_columns)
 
     try:
         # Process files in the zip archive
-        for file, size, unzipped_chunks in tqdm(stream_unzip(zipped_chunks)):
-            current_file = file.decode("utf-8") if isinstance(file, bytes) else file
+        for current_file, size, unzipped_chunks in tqdm(
+            iter_members(zipped_chunks, stats=archive_stats)
+        ):
+            member_count += 1
+
+            # Members committed by a previous run are read through to reach
+            # the next one, but are not decoded again
+            if member_count <= skip_members:
+                continue
 
             try:
                 # Join chunks and process
                 bytes_obj = b"".join(unzipped_chunks)
-                current_item = process_json_chunk(bytes_obj)
-                flattened_data.append(current_item)
+                if is_loaded_event(bytes_obj, min_event_reference):
+                    skipped_events += 1
+                    continue
+                if db_template is not None:
+                    # Raw events are decoded together once the batch is full
+                    flattened_data.append(bytes_obj)
+                else:
+                    with decode_timer:
+                        current_item = process_json_chunk(bytes_obj)
+                    decoded_bytes += len(bytes_obj)
+                    flattened_data.append(current_item)
                 batch_count += 1
 
                 # Process batch when it reaches the limit
-                if batch_count >= batch_size:
+                if batch_count >= batch_limit:
                     # Convert to Arrow table and insert
-                    table = chunks_to_arrow_table(flattened_data)
-                    insert_table_to_motherduck(table, conn, schema_name, table_name)
+                    table = build_table(flattened_data)
+                    start = time.perf_counter()
+                    commit_batch(
+                        table,
+                        conn,
+                        schema_name,
+                        table_name,
+                        checkpoint,
+                        member_count,
+                        merge_key,
+                    )
+                    sizer.observe(len(table), table.nbytes, time.perf_counter() - start)
                     logger.success(f"Processed batch of {batch_count} items")
 
                     # Reset for next batch
                     flattened_data = []
                     batch_count = 0
                     current_item = None
+                    batch_limit = sizer.next_size()
 
             except Exception as e:
                 logger.error(f"Error processing file {current_file}: {e}")
@@ -179,47 +504,325 @@ def batch_processor(
 
         # Process any remaining items
         if flattened_data:
-            table = chunks_to_arrow_table(flattened_data)
-            insert_table_to_motherduck(table, conn, schema_name, table_name)
+            table = build_table(flattened_data)
+            commit_batch(
+                table,
+                conn,
+                schema_name,
+                table_name,
+                checkpoint,
+                member_count,
+                merge_key,
+            )
             logger.success(f"Processed final batch of {len(flattened_data)} items")
 
+        if skipped_events:
+            logger.info(f"Skipped {skipped_events} events already loaded")
         logger.success("Data processing complete - all batches have been processed")
 
     except Exception as e:
         logger.error(f"Error during batch processing: {e}")
         if flattened_data:
             logger.error(f"Number of items in current batch: {len(flattened_data)}")
-            if flattened_data:
-                last_item = flattened_data[-1]
-                logger.error("Last processed item:")
+            last_item = flattened_data[-1]
+            logger.error("Last processed item:")
+            if isinstance(last_item, bytes):
+                logger.error(last_item[:1000])
+            else:
                 for k, v in last_item.items():
                     logger.error(f"{k}: {type(v)} = {v}")
         raise
 
 
+def decode_events(
+    events: list[bytes],
+    db_template: Optional[dict],
+    typed_columns: Optional[dict] = None,
+) -> pa.Table:
+    """
+    Decode a batch of raw JSON events into a PyArrow table.
+
+    Module level so it can be pickled and run inside a worker process.
+
+    Args:
+        events: List of raw JSON documents, one per Street Manager event
+        db_template: Optional table template - when provided events are
+            decoded columnar with events_to_arrow_table
+        typed_columns: Optional dictionary of column names and DuckDB types
+            parsed from strings
+
+    Returns:
+        PyArrow Table
+    """
+    if db_template is not None:
+        return events_to_arrow_table(events, db_template, typed_columns)
+    return chunks_to_arrow_table(
+        [process_json_chunk(event) for event in events], typed_columns
+    )
+
+
+def parallel_batch_processor(
+    zipped_chunks: Iterator,
+    batch_size: Union[int, BatchSizer],
+    conn,
+    schema_name: str,
+    table_name: str,
+    db_template: Optional[dict] = None,
+    workers: int = 2,
+    checkpoint: Optional[LoadCheckpoint] = None,
+    skip_members: int = 0,
+    min_event_reference: Optional[int] = None,
+    merge_key: Optional[str] = None,
+    typed_columns: Optional[dict] = None,
+    archive_stats: Optional[ArchiveStats] = None,
+) -> None:
+    """
+    Pipelined version of batch_processor that decodes batches in parallel.
+
+    The calling thread streams and decompresses the zip members, a pool of
+    worker processes decodes each batch into an Arrow table, and a single
+    consumer thread inserts the tables into MotherDuck in submission order.
+    At most 2 * workers batches are queued at any time, which keeps memory
+    bounded when decoding or inserting falls behind the download.
+
+    Args:
+        zipped_chunks: Iterator of zipped chunks
+        batch_size: Number of items to process in each batch, or a
+            BatchSizer that adapts it to insert latency and memory
+        conn: MotherDuck connection
+        schema_name: Schema name
+        table_name: Table name
+        db_template: Optional table template to enable columnar decoding
+        workers: Number of decode worker processes
+        checkpoint: Optional load checkpoint advanced with every batch
+        skip_members: Number of leading archive members already committed
+        min_event_reference: Optional high-water mark - events at or below
+            it are skipped before they are decoded
+        merge_key: Optional column used to skip rows already in the table
+        typed_columns: Optional dictionary of column names and DuckDB types
+            parsed from strings at load time
+        archive_stats: Optional stats to record the uncompressed bytes and
+            members read in
+    """
+    # Each queued item pairs a decode future with the member count it covers
+    pending: queue.Queue[Optional[tuple[Future, int]]] = queue.Queue(
+        maxsize=workers * 2
+    )
+    failed = threading.Event()
+    errors: list[Exception] = []
+    batch_count = 0
+    member_count = 0
+    skipped_events = 0
+    current_file = None
+    events = []
+    sizer = as_batch_sizer(batch_size)
+    # Batches queued, decoding and being inserted all hold memory at once
+    in_flight = workers * 2 + 2
+    batch_limit = sizer.next_size(in_flight)
+
+    # The consumer thread reports its inserts under the caller's scope and
+    # is sampled as part of the caller's profile
+    scope = metrics.current_scope()
+    profile = profiler.current_profile()
+
+    def consume():
+        """Closure for inserting decoded batches in the order they were queued"""
+        with metrics.scope(scope), profiler.track(profile):
+            insert_batches()
+
+    def insert_batches():
+        batch_number = 0
+        while not failed.is_set():
+            try:
+                item = pending.get(timeout=1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+
+            future, members_committed = item
+            batch_number += 1
+            try:
+                # Decoding runs in worker processes - only the wait is timed
+                with metrics.stage("decode_wait"):
+                    table = future.result()
+                start = time.perf_counter()
+                commit_batch(
+                    table,
+                    conn,
+                    schema_name,
+                    table_name,
+                    checkpoint,
+                    members_committed,
+                    merge_key,
+                )
+                sizer.observe(len(table), table.nbytes, time.perf_counter() - start)
+                logger.success(f"Processed batch {batch_number} of {len(table)} items")
+            except Exception as e:
+                logger.error(f"Error processing batch {batch_number}: {e}")
+                errors.append(e)
+                failed.set()
+
+    def enqueue(item: Optional[tuple[Future, int]]):
+        """Closure for queueing work, giving up if the consumer has failed"""
+        while not failed.is_set():
+            try:
+                pending.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise errors[0]
+
+    # Spawned workers avoid forking a process that holds an open HTTP stream
+    # and a running consumer thread
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        consumer = threading.Thread(target=consume, name="motherduck-consumer")
+        consumer.start()
+
+        try:
+            for current_file, size, unzipped_chunks in tqdm(
+                iter_members(zipped_chunks, stats=archive_stats)
+            ):
+                member_count += 1
+
+                if member_count <= skip_members:
+                    continue
+
+                event = b"".join(unzipped_chunks)
+                if is_loaded_event(event, min_event_reference):
+                    skipped_events += 1
+                    continue
+                events.append(event)
+                batch_count += 1
+
+                if batch_count >= batch_limit:
+                    future = executor.submit(
+                        decode_events, events, db_template, typed_columns
+                    )
+                    enqueue((future, member_count))
+                    events = []
+                    batch_count = 0
+                    batch_limit = sizer.next_size(in_flight)
+
+            if events:
+                future = executor.submit(
+                    decode_events, events, db_template, typed_columns
+                )
+                enqueue((future, member_count))
+            enqueue(None)
+        except Exception as e:
+            logger.error(f"Error during batch processing at file {current_file}: {e}")
+            failed.set()
+            executor.shutdown(cancel_futures=True)
+            raise
+        finally:
+            consumer.join()
+
+    if errors:
+        raise errors[0]
+
+    if skipped_events:
+        logger.info(f"Skipped {skipped_events} events already loaded")
+    logger.success("Data processing complete - all batches have been processed")
+
+
+@profiled
 def process_data(
-    url: str, batch_size: int, conn, schema_name: str, table_name: str
+    url: str,
+    batch_size: Union[int, BatchSizer],
+    conn,
+    schema_name: str,
+    table_name: str,
+    db_template: Optional[dict] = None,
+    workers: int = 0,
+    resumable: bool = False,
+    incremental: bool = False,
+    typed_columns: Optional[dict] = None,
 ) -> None:
     """
     Main function to fetch and process data stream with PyArrow.
 
     Args:
         url: URL to fetch the zipped data from (e.g., "https://opendata.manage-roadworks.service.gov.uk/permit/2024/03.zip")
-        batch_size: Number of items to process in each batch
-        conn: Database connection
+        batch_size: Number of items to process in each batch, or a
+            BatchSizer that adapts it to insert latency and memory
+        conn: Database connection or ParquetStager
         schema: Schema name
         table: Table name
+        db_template: Optional table template to enable columnar decoding
+        workers: Number of decode worker processes - 0 keeps the serial path
+        resumable: Checkpoint every batch and skip members committed by a
+            previous run of the same url and table
+        incremental: Skip events at or below the event_reference high-water
+            mark of the last completed load and merge only new rows
+        typed_columns: Optional dictionary of column names and DuckDB types
+            parsed from strings at load time, so the table can declare them
+            as typed columns instead of VARCHAR
     """
     logger.info(
         f"Starting data stream processing from {url} with batch size {batch_size}"
     )
 
-    # Fetch data in chunks
-    with requests.get(url, stream=True, timeout=15) as response:
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch data: HTTP {response.status_code}")
-            raise Exception(f"HTTP error: {response.status_code}")
-
-        # Process the chunks
-        zipped_chunks = response.iter_content(chunk_size=1048576)
-        batch_processor(zipped_chunks, batch_size, conn, schema_name, table_name)
+    if resumable and isinstance(conn, ParquetStager):
+        raise ValueError("Staged loads are replayed from Parquet, not resumed")
+    if incremental and (resumable or isinstance(conn, ParquetStager)):
+        raise ValueError("Incremental loads merge into the table directly")
+
+    checkpoint = None
+    skip_members = 0
+    if resumable:
+        checkpoint = LoadCheckpoint(conn, url, schema_name, table_name)
+        skip_members = checkpoint.resume_position()
+        if skip_members is None:
+            return
+
+    high_water_mark = None
+    min_event_reference = None
+    merge_key = None
+    if incremental:
+        high_water_mark = HighWaterMark(conn, schema_name, table_name)
+        min_event_reference = high_water_mark.load()
+        merge_key = "event_reference"
+        logger.info(f"Loading events after event_reference {min_event_reference}")
+
+    # Stream the archive and decompress events as the chunks arrive
+    with ArchiveStream(url, timeout=15) as archive:
+        zipped_chunks = archive.chunks()
+        if workers > 0:
+            parallel_batch_processor(
+                zipped_chunks,
+                batch_size,
+                conn,
+                schema_name,
+                table_name,
+                db_template,
+                workers,
+                checkpoint,
+                skip_members,
+                min_event_reference,
+                merge_key,
+                typed_columns,
+                archive.stats,
+            )
+        else:
+            batch_processor(
+                zipped_chunks,
+                batch_size,
+                conn,
+                schema_name,
+                table_name,
+                db_template,
+                checkpoint,
+                skip_members,
+                min_event_reference,
+                merge_key,
+                typed_columns,
+                archive.stats,
+            )
+
+    if checkpoint is not None:
+        checkpoint.mark_complete()
+    if high_water_mark is not None:
+        high_water_mark.advance()
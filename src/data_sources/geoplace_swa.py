@@ -5,12 +5,13 @@ from .data_source_config import (
     TimeRange,
     DataSourceConfig,
 )
+from .link_cache import CachedDownloadLinks, DownloadLinkCache
 import requests
 from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
 
-class GeoplaceSwa(DataSourceConfig):
+class GeoplaceSwa(CachedDownloadLinks, DataSourceConfig):
     """
     Configuration class for Geoplace SWA data source.
     Implements the DataSourceConfigProtocol.
@@ -21,6 +22,7 @@ class GeoplaceSwa(DataSourceConfig):
         processor_type: DataProcessorType,
         time_range: TimeRange,
         batch_limit: Optional[int] = None,
+        link_cache: Optional[DownloadLinkCache] = None,
     ):
         """
         Initialise a Geoplace SWA configuration.
@@ -29,6 +31,8 @@ class GeoplaceSwa(DataSourceConfig):
             processor_type: The type of data processor to use
             time_range: The time range for the data
             batch_limit: Optional limit for batch processing
+            link_cache: Optional on-disk link cache, read from the
+                environment when not given
             source_type: The type of data source
         """
 
@@ -36,6 +40,7 @@ class GeoplaceSwa(DataSourceConfig):
         self._time_range = time_range
         self.batch_limit = batch_limit
         self._source_type = DataSourceType.GEOPLACE_SWA
+        self.link_cache = link_cache or DownloadLinkCache.from_env()
 
     @property
     def processor_type(self) -> DataProcessorType:
@@ -54,9 +59,8 @@ class GeoplaceSwa(DataSourceConfig):
         """Get the base URL for the configured data source."""
         return self.source_type.base_url
 
-    @property
-    def download_links(self) -> list[str]:
-        """Get the download links for the configured data source."""
+    def resolve_download_links(self) -> list[str]:
+        """Scrape the download link from the GeoPlace page."""
         try:
             response = requests.get(self.base_url)
             response.raise_for_status()
@@ -113,7 +117,7 @@ class GeoplaceSwa(DataSourceConfig):
             f"base_url={self.base_url}, "
             f"time_range={self.time_range.value}, "
             f"batch_limit={self.batch_limit}, "
-            f"download_links={self.download_links}, "
+            f"download_links={self.describe_download_links()}, "
             f"schema_name={self.schema_name}, "
             f"table_names={self.table_names}, "
             f"db_template={self.db_template}"
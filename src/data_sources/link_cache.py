@@ -0,0 +1,135 @@
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from loguru import logger
+
+
+class DownloadLinkCache:
+    """
+    On-disk JSON cache of resolved download links shared across runs.
+
+    Entries older than ttl_seconds are ignored, so a stale link is resolved
+    again rather than served from disk.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        """
+        Initialise a download link cache.
+
+        Args:
+            path: Path of the JSON cache file
+            ttl_seconds: Age after which a cached entry is ignored
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_env(cls) -> Optional["DownloadLinkCache"]:
+        """
+        Build a cache from DOWNLOAD_LINK_CACHE and DOWNLOAD_LINK_CACHE_TTL.
+
+        Returns:
+            A DownloadLinkCache, or None when DOWNLOAD_LINK_CACHE is not set
+        """
+        path = os.getenv("DOWNLOAD_LINK_CACHE")
+        if not path:
+            return None
+        return cls(path, float(os.getenv("DOWNLOAD_LINK_CACHE_TTL", 3600)))
+
+    def read_entries(self) -> dict:
+        try:
+            with open(self.path) as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable link cache {self.path}: {e}")
+            return {}
+
+    def get(self, key: str) -> Optional[list[str]]:
+        """
+        Fetch cached links for a key if they are still fresh.
+
+        Args:
+            key: Cache key for the data source
+
+        Returns:
+            The cached links, or None if missing or expired
+        """
+        entry = self.read_entries().get(key)
+        if entry is None or time.time() - entry["resolved_at"] > self.ttl_seconds:
+            return None
+        return entry["links"]
+
+    def set(self, key: str, links: list[str]):
+        """
+        Store resolved links for a key.
+
+        Args:
+            key: Cache key for the data source
+            links: Resolved download links
+        """
+        entries = self.read_entries()
+        entries[key] = {"links": links, "resolved_at": time.time()}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(entries, cache_file)
+        os.replace(temp_path, self.path)
+
+
+class CachedDownloadLinks(ABC):
+    """
+    Mixin for data source configs whose download links need a network call.
+
+    Subclasses must implement resolve_download_links or they can't be
+    instantiated. The resolved links are kept on the instance and, when a
+    DownloadLinkCache is configured, on disk.
+    """
+
+    link_cache: Optional[DownloadLinkCache] = None
+    _download_links: Optional[list[str]] = None
+
+    @abstractmethod
+    def resolve_download_links(self) -> list[str]:
+        """Resolve the download links from the network."""
+
+    @property
+    def link_cache_key(self) -> str:
+        return f"{self.source_type.code}:{self.base_url}"
+
+    @property
+    def download_links(self) -> list[str]:
+        """Get the download links, resolving them on first access only."""
+        if self._download_links is None:
+            if self.link_cache is not None:
+                self._download_links = self.link_cache.get(self.link_cache_key)
+            if self._download_links is None:
+                self.refresh_download_links()
+        return self._download_links
+
+    def refresh_download_links(self) -> list[str]:
+        """
+        Resolve the download links again, bypassing every cache.
+
+        Returns:
+            The freshly resolved download links
+        """
+        self._download_links = self.resolve_download_links()
+        if self.link_cache is not None:
+            self.link_cache.set(self.link_cache_key, self._download_links)
+        return self._download_links
+
+    def describe_download_links(self) -> str:
+        """Describe the download links without resolving them."""
+        if self._download_links is None:
+            return "[not yet resolved]"
+        links_str = ", ".join(self._download_links[:2])
+        if len(self._download_links) > 2:
+            links_str += f", ... ({len(self._download_links)} total)"
+        return f"[{links_str}]"
@@ -6,9 +6,10 @@ from .data_source_config import (
     TimeRange,
     DataSourceConfig,
 )
+from .link_cache import CachedDownloadLinks, DownloadLinkCache
 
 
-class OsOpenUsrn(DataSourceConfig):
+class OsOpenUsrn(CachedDownloadLinks, DataSourceConfig):
     """
     Configuration class for Street Manager data source.
     Implements the DataSourceConfigProtocol.
@@ -19,6 +20,7 @@ class OsOpenUsrn(DataSourceConfig):
         processor_type: DataProcessorType,
         time_range: TimeRange,
         batch_limit: Optional[int] = None,
+        link_cache: Optional[DownloadLinkCache] = None,
     ):
         """
         Initialise a Street Manager configuration.
@@ -27,6 +29,8 @@ class OsOpenUsrn(DataSourceConfig):
             processor_type: The type of data processor to use
             time_range: The time range for the data
             batch_limit: Optional limit for batch processing
+            link_cache: Optional on-disk link cache, read from the
+                environment when not given
             year: Specific year for historic data (defaults to previous year)
             start_month: Starting month for historic data (1-12, defaults to 1)
             end_month: Ending month for historic data (non-inclusive, 1-13, defaults to 13)
@@ -35,6 +39,7 @@ class OsOpenUsrn(DataSourceConfig):
         self._time_range = time_range
         self.batch_limit = batch_limit
         self._source_type = DataSourceType.OS_OPEN_USRN
+        self.link_cache = link_cache or DownloadLinkCache.from_env()
 
     @property
     def processor_type(self) -> DataProcessorType:
@@ -53,8 +58,8 @@ class OsOpenUsrn(DataSourceConfig):
         """Get the base URL for the configured data source."""
         return self.source_type.base_url
 
-    @property
-    def download_links(self) -> list[str]:
+    def resolve_download_links(self) -> list[str]:
+        """Follow the OS Downloads redirect to the current GeoPackage."""
         response = requests.head(self.base_url, allow_redirects=True)
         return [response.url]
 
@@ -83,17 +88,13 @@ class OsOpenUsrn(DataSourceConfig):
 
     def __str__(self) -> str:
         """String representation of the configuration."""
-        links_str = ", ".join(self.download_links[:2])
-        if len(self.download_links) > 2:
-            links_str += f", ... ({len(self.download_links)} total)"
-
         return (
             f"StreetManagerConfig(processor={self.processor_type.value}, "
             f"source={self.source_type.code}, "
             f"base_url={self.base_url}, "
             f"time_range={self.time_range.value}, "
             f"batch_limit={self.batch_limit}, "
-            f"download_links=[{links_str}]), "
+            f"download_links={self.describe_download_links()}), "
             f"schema_name={self.schema_name}, "
             f"table_names={self.table_names}, "
             f"db_template={self.db_template}"
@@ -89,6 +89,13 @@ class OsUsrnUprn(DataSourceConfig):
         """
         return "os_open_linked_identifiers"
 
+    @property
+    def usrn_count_table(self) -> str:
+        """
+        Get the name of the usrn to uprn_count table built during the load.
+        """
+        return "usrn_uprn_counts_latest"
+
     @property
     def db_template(self) -> dict:
         return {
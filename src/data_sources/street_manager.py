@@ -7,6 +7,25 @@ from .data_source_config import (
     DataSourceConfig,
 )
 
+# Column types used by typed loads - Street Manager publishes these values
+# as JSON strings, so they are parsed once at load time instead of being
+# cast by every downstream query
+TYPED_COLUMNS = {
+    "event_time": "TIMESTAMP",
+    "current_traffic_management_update_date": "TIMESTAMP",
+    "proposed_start_date": "TIMESTAMP",
+    "proposed_end_date": "TIMESTAMP",
+    "actual_start_date_time": "TIMESTAMP",
+    "actual_end_date_time": "TIMESTAMP",
+    "usrn": "BIGINT",
+    "promoter_swa_code": "INTEGER",
+    "collaborative_working": "BOOLEAN",
+    "is_ttro_required": "BOOLEAN",
+    "is_covid_19_response": "BOOLEAN",
+    "is_traffic_sensitive": "BOOLEAN",
+    "is_deemed": "BOOLEAN",
+}
+
 
 class StreetManager(DataSourceConfig):
     """
@@ -22,6 +41,7 @@ class StreetManager(DataSourceConfig):
         year: Optional[int] = None,
         start_month: Optional[int] = None,
         end_month: Optional[int] = None,
+        typed: bool = False,
     ):
         """
         Initialise a Street Manager configuration.
@@ -33,6 +53,8 @@ class StreetManager(DataSourceConfig):
             year: Specific year for historic data (defaults to previous year)
             start_month: Starting month for historic data (1-12, defaults to 1)
             end_month: Ending month for historic data (non-inclusive, 1-13, defaults to 13)
+            typed: Load dates, booleans and usrn as typed columns instead
+                of VARCHAR
         """
         self._processor_type = processor_type
         self._time_range = time_range
@@ -43,6 +65,7 @@ class StreetManager(DataSourceConfig):
         self.year = year if year is not None else datetime.now().year - 1
         self.start_month = start_month if start_month is not None else 1
         self.end_month = end_month if end_month is not None else 13
+        self.typed = typed
 
     @property
     def processor_type(self) -> DataProcessorType:
@@ -168,9 +191,20 @@ class StreetManager(DataSourceConfig):
             return f"raw_data_{self.year}"
         return f"raw_data_{date.today().year}"
 
+    @property
+    def typed_columns(self) -> dict:
+        """
+        Get the columns parsed from strings at load time.
+
+        Returns:
+            Dictionary of column names and their DuckDB types - empty unless
+            the config is typed
+        """
+        return dict(TYPED_COLUMNS) if self.typed else {}
+
     @property
     def db_template(self) -> dict:
-        return {
+        template = {
             "version": "BIGINT",
             "event_reference": "BIGINT",
             "event_type": "VARCHAR",
@@ -218,6 +252,8 @@ class StreetManager(DataSourceConfig):
             "close_footway": "VARCHAR",
             "close_footway_ref": "VARCHAR",
         }
+        template.update(self.typed_columns)
+        return template
 
     def __str__(self) -> str:
         """String representation of the configuration."""
@@ -231,6 +267,7 @@ class StreetManager(DataSourceConfig):
             f"base_url={self.base_url}, "
             f"time_range={self.time_range.value}, "
             f"batch_limit={self.batch_limit}, "
+            f"typed={self.typed}, "
             f"download_links=[{links_str}]), "
             f"schema_name={self.schema_name}, "
             f"table_names={self.table_names}, "
@@ -238,12 +275,13 @@ class StreetManager(DataSourceConfig):
         )
 
     @classmethod
-    def create_default_latest(cls) -> "StreetManager":
+    def create_default_latest(cls, typed: bool = False) -> "StreetManager":
         """Create a default Street Manager configuration."""
         return cls(
             processor_type=DataProcessorType.MOTHERDUCK,
             time_range=TimeRange.LATEST,
             batch_limit=150000,
+            typed=typed,
         )
 
     @classmethod
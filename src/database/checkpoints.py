@@ -0,0 +1,239 @@
+from typing import Optional
+from loguru import logger
+
+
+class LoadCheckpoint:
+    """
+    Tracks how far a load has got for a single (url, schema, table).
+
+    The state is kept in a DuckDB table in the same database as the loaded
+    data, so a batch insert and its checkpoint update can be committed in
+    one transaction and a restarted run never re-inserts committed rows.
+    """
+
+    schema = "pipeline_metadata"
+    table = "load_checkpoints"
+
+    def __init__(self, conn, url: str, schema_name: str, table_name: str):
+        """
+        Initialise a load checkpoint.
+
+        Args:
+            conn: DuckDB connection used for the load
+            url: Source URL being loaded
+            schema_name: Target schema name
+            table_name: Target table name
+        """
+        self.conn = conn
+        self.url = url
+        self.schema_name = schema_name
+        self.table_name = table_name
+
+    @property
+    def key(self) -> list[str]:
+        return [self.url, self.schema_name, self.table_name]
+
+    @classmethod
+    def create_table_if_not_exists(cls, conn):
+        """
+        Create the checkpoint schema and table if they don't exist.
+
+        Call this once before loading tables concurrently - creating the
+        schema from several connections at once is a write-write conflict.
+
+        Args:
+            conn: DuckDB connection
+        """
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{cls.schema}";')
+        conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{cls.schema}"."{cls.table}" (
+                url VARCHAR,
+                schema_name VARCHAR,
+                table_name VARCHAR,
+                members_committed BIGINT,
+                rows_committed BIGINT,
+                completed BOOLEAN,
+                updated_at TIMESTAMP
+            );"""
+        )
+
+    def load(self) -> Optional[tuple[int, int, bool]]:
+        """
+        Fetch the stored checkpoint.
+
+        Returns:
+            Tuple of (members committed, rows committed, completed) or None
+        """
+        return self.conn.execute(
+            f"""SELECT members_committed, rows_committed, completed
+                FROM "{self.schema}"."{self.table}"
+                WHERE url = ? AND schema_name = ? AND table_name = ?""",
+            self.key,
+        ).fetchone()
+
+    def reset(self):
+        """Replace any stored checkpoint with an empty one."""
+        self.conn.execute(
+            f"""DELETE FROM "{self.schema}"."{self.table}"
+                WHERE url = ? AND schema_name = ? AND table_name = ?""",
+            self.key,
+        )
+        self.conn.execute(
+            f"""INSERT INTO "{self.schema}"."{self.table}"
+                VALUES (?, ?, ?, 0, 0, false, current_timestamp)""",
+            self.key,
+        )
+
+    def save(self, members_committed: int, rows_added: int):
+        """
+        Record a committed batch - call inside the batch insert transaction.
+
+        Args:
+            members_committed: Number of archive members consumed so far
+            rows_added: Number of rows inserted by the batch
+        """
+        self.conn.execute(
+            f"""UPDATE "{self.schema}"."{self.table}"
+                SET members_committed = ?,
+                    rows_committed = rows_committed + ?,
+                    updated_at = current_timestamp
+                WHERE url = ? AND schema_name = ? AND table_name = ?""",
+            [members_committed, rows_added] + self.key,
+        )
+
+    def mark_complete(self):
+        """Flag the load as finished."""
+        self.conn.execute(
+            f"""UPDATE "{self.schema}"."{self.table}"
+                SET completed = true, updated_at = current_timestamp
+                WHERE url = ? AND schema_name = ? AND table_name = ?""",
+            self.key,
+        )
+
+    def resume_position(self) -> Optional[int]:
+        """
+        Work out where a load should restart from.
+
+        The target table must hold exactly the committed rows for a
+        checkpoint to be trusted. Otherwise the table is emptied and the
+        load starts again from the first member.
+
+        Returns:
+            Number of archive members to skip, or None if the load is complete
+        """
+        self.create_table_if_not_exists(self.conn)
+        state = self.load()
+        table_rows = self.conn.execute(
+            f'SELECT COUNT(*) FROM "{self.schema_name}"."{self.table_name}"'
+        ).fetchone()[0]
+
+        if state is not None and state[1] == table_rows:
+            members_committed, rows_committed, completed = state
+            if completed:
+                logger.info(
+                    f"{self.schema_name}.{self.table_name} already loaded from {self.url}"
+                )
+                return None
+            logger.info(
+                f"Resuming {self.schema_name}.{self.table_name} after "
+                f"{members_committed} members ({rows_committed} rows)"
+            )
+            return members_committed
+
+        if table_rows:
+            logger.warning(
+                f"{self.schema_name}.{self.table_name} holds {table_rows} rows not "
+                f"covered by a checkpoint - clearing it before loading"
+            )
+            self.conn.execute(f'DELETE FROM "{self.schema_name}"."{self.table_name}"')
+        self.reset()
+        return 0
+
+
+class HighWaterMark:
+    """
+    Highest event reference stored by the last completed incremental load
+    of a table.
+
+    The mark only advances once a load finishes, so events below it are
+    known to be loaded even if the archive is not in event order.
+    """
+
+    schema = LoadCheckpoint.schema
+    table = "high_water_marks"
+
+    def __init__(
+        self, conn, schema_name: str, table_name: str, column: str = "event_reference"
+    ):
+        """
+        Initialise a high-water mark.
+
+        Args:
+            conn: DuckDB connection used for the load
+            schema_name: Target schema name
+            table_name: Target table name
+            column: Monotonic column the mark is taken from
+        """
+        self.conn = conn
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.column = column
+
+    @classmethod
+    def create_table_if_not_exists(cls, conn):
+        """
+        Create the high-water mark schema and table if they don't exist.
+
+        Args:
+            conn: DuckDB connection
+        """
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{cls.schema}";')
+        conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{cls.schema}"."{cls.table}" (
+                schema_name VARCHAR,
+                table_name VARCHAR,
+                column_name VARCHAR,
+                high_water_mark BIGINT,
+                updated_at TIMESTAMP
+            );"""
+        )
+
+    def load(self) -> Optional[int]:
+        """
+        Fetch the stored mark.
+
+        Returns:
+            The highest value loaded by the last completed load, or None
+        """
+        self.create_table_if_not_exists(self.conn)
+        row = self.conn.execute(
+            f"""SELECT high_water_mark FROM "{self.schema}"."{self.table}"
+                WHERE schema_name = ? AND table_name = ? AND column_name = ?""",
+            [self.schema_name, self.table_name, self.column],
+        ).fetchone()
+        return row[0] if row else None
+
+    def advance(self) -> Optional[int]:
+        """
+        Store the highest value now in the target table - call once the
+        load has completed.
+
+        Returns:
+            The new mark
+        """
+        mark = self.conn.execute(
+            f'SELECT MAX("{self.column}") FROM "{self.schema_name}"."{self.table_name}"'
+        ).fetchone()[0]
+        key = [self.schema_name, self.table_name, self.column]
+        self.conn.execute(
+            f"""DELETE FROM "{self.schema}"."{self.table}"
+                WHERE schema_name = ? AND table_name = ? AND column_name = ?""",
+            key,
+        )
+        self.conn.execute(
+            f"""INSERT INTO "{self.schema}"."{self.table}"
+                VALUES (?, ?, ?, ?, current_timestamp)""",
+            key + [mark],
+        )
+        logger.info(f"{self.schema_name}.{self.table_name} high-water mark is {mark}")
+        return mark
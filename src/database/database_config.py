@@ -17,14 +17,18 @@ class DatabaseProtocol(Protocol):
         """Create a schema if it doesn't already exist."""
         ...
 
-    def create_table(self, schema: str, table: str, columns: Dict[str, str]) -> bool:
+    def create_table(
+        self, schema: str, table: str, columns: Dict[str, str], replace: bool = True
+    ) -> bool:
         """Create a table with specified schema and columns."""
         ...
 
-    def create_table_from_data_source(self, config: DataSourceConfig) -> bool:
+    def create_table_from_data_source(
+        self, config: DataSourceConfig, replace: bool = True
+    ) -> bool:
         """Create tables based on a data source configuration."""
         ...
 
-    def setup_for_data_source(self, config: DataSourceConfig):
+    def setup_for_data_source(self, config: DataSourceConfig, replace: bool = True):
         """Complete setup for a data source - create schema and tables."""
         ...
@@ -1,8 +1,12 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
 import duckdb
 from loguru import logger
-from typing import Dict, Optional
 from data_sources.data_source_config import DataSourceConfig, DataProcessorType
 from database.database_config import DatabaseProtocol
+from metrics import metrics
 
 
 class MotherDuckManager(DatabaseProtocol):
@@ -12,19 +16,41 @@ class MotherDuckManager(DatabaseProtocol):
 
     This class combines connection management with table creation capabilities,
     allowing for a streamlined workflow when working with different data sources.
+
+    The connection is opened on first use and shared. Processors that run at
+    the same time should each borrow a cursor with cursor() rather than use
+    the shared connection directly.
     """
 
-    def __init__(self, token: str, database: str):
+    def __init__(self, token: str, database: str, max_cursors: int = 4):
         """
         Initialize the MotherDuck manager.
 
         Args:
             token: MotherDuck authentication token
             database: Database name to connect to
+            max_cursors: Maximum number of cursors borrowed at the same time
         """
         self.token = token
         self.database = database
-        self.connection = None
+        self.max_cursors = max_cursors
+        self._connection: Optional[duckdb.DuckDBPyConnection] = None
+        self._idle_cursors: list[duckdb.DuckDBPyConnection] = []
+        self._cursor_slots = threading.BoundedSemaphore(max_cursors)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def connection(self) -> duckdb.DuckDBPyConnection:
+        """Shared MotherDuck connection, opened on first use."""
+        if self._connection is None:
+            self.connect()
+        return self._connection
+
+    @connection.setter
+    def connection(self, connection: Optional[duckdb.DuckDBPyConnection]):
+        self._connection = connection
+        self._generation += 1
 
     def connect(self) -> Optional[duckdb.DuckDBPyConnection]:
         """
@@ -39,14 +65,75 @@ class MotherDuckManager(DatabaseProtocol):
 
         try:
             connection_string = f"md:{self.database}?motherduck_token={self.token}"
-            self.connection = duckdb.connect(connection_string)
+            with metrics.stage("connect"):
+                self.connection = duckdb.connect(connection_string)
             logger.success("MotherDuck Connection Made")
             return self.connection
         except (duckdb.ConnectionException, duckdb.Error) as e:
             logger.warning(f"An error occurred with MotherDuck: {e}")
             raise e
 
-    def create_table(self, schema: str, table: str, columns: Dict[str, str]) -> bool:
+    def is_healthy(self) -> bool:
+        """
+        Check that the shared connection is open and answering queries.
+
+        Returns:
+            Boolean indicating the connection can be used
+        """
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute("SELECT 1").fetchone()
+            return True
+        except duckdb.Error as e:
+            logger.warning(f"MotherDuck connection failed health check: {e}")
+            return False
+
+    def reconnect(self) -> Optional[duckdb.DuckDBPyConnection]:
+        """
+        Drop the shared connection and its idle cursors and connect again.
+
+        Returns:
+            The new DuckDB connection
+        """
+        self.close()
+        return self.connect()
+
+    @contextmanager
+    def cursor(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """
+        Borrow a cursor on the shared connection.
+
+        Cursors are pooled and handed back on exit. A cursor can be used from
+        its own thread, so each concurrent processor should borrow one. The
+        connection is health checked and reopened if needed before lending.
+
+        Yields:
+            DuckDB cursor
+        """
+        with self._cursor_slots:
+            with self._lock:
+                if not self.is_healthy():
+                    self.reconnect()
+                if self._idle_cursors:
+                    cursor = self._idle_cursors.pop()
+                else:
+                    cursor = self.connection.cursor()
+                generation = self._generation
+
+            try:
+                yield cursor
+            finally:
+                with self._lock:
+                    # Cursors of a replaced connection are not pooled again
+                    if generation == self._generation:
+                        self._idle_cursors.append(cursor)
+                    else:
+                        cursor.close()
+
+    def create_table(
+        self, schema: str, table: str, columns: Dict[str, str], replace: bool = True
+    ) -> bool:
         """
         Create a table in MotherDuck with specified schema and columns.
 
@@ -54,15 +141,18 @@ class MotherDuckManager(DatabaseProtocol):
             schema: Schema name (must already exist)
             table: Table name to create
             columns: Dictionary of column names and their types
+            replace: Replace an existing table - when False an existing
+                table and its rows are kept
 
         Returns:
             Boolean indicating success
-        """
-        if self.connection is None:
-            self.connect()
 
-        if not self.connection:
-            return False
+        Raises:
+            ValueError: If an existing table that is kept has different
+                column types, e.g. a VARCHAR table loaded with --typed
+        """
+        if not replace:
+            self.check_column_types(self.connection, schema, table, columns)
 
         # Build column definitions from dictionary
         column_defs = ",\n                ".join(
@@ -71,7 +161,10 @@ class MotherDuckManager(DatabaseProtocol):
         logger.info(f"Creating table {schema}.{table} with columns: {column_defs}")
 
         try:
-            table_command = f"""CREATE OR REPLACE TABLE "{schema}"."{table}" (
+            create_clause = (
+                "CREATE OR REPLACE TABLE" if replace else "CREATE TABLE IF NOT EXISTS"
+            )
+            table_command = f"""{create_clause} "{schema}"."{table}" (
                 {column_defs}
             );"""
             self.connection.execute(table_command)
@@ -81,12 +174,64 @@ class MotherDuckManager(DatabaseProtocol):
             logger.error(f"Error creating table: {e}")
             raise
 
-    def create_table_from_data_source(self, config: DataSourceConfig) -> bool:
+    @staticmethod
+    def check_column_types(
+        conn,
+        schema: str,
+        table: str,
+        columns: Dict[str, str],
+        remedy: str = "main.py without --resume or --incremental, backfill.py --reload",
+    ):
+        """
+        Check that an existing table has the columns and types expected.
+
+        CREATE TABLE IF NOT EXISTS keeps whatever layout a table was created
+        with, so a load into a kept table would otherwise silently cast to
+        the old types.
+
+        Args:
+            conn: DuckDB connection
+            schema: Schema name
+            table: Table name
+            columns: Dictionary of column names and their expected types
+            remedy: How to rebuild the table, included in the error
+
+        Raises:
+            ValueError: If the table exists and a column is missing or has
+                a different type
+        """
+        existing = dict(
+            conn.execute(
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_catalog = current_database() "
+                "AND table_schema = ? AND table_name = ?",
+                [schema, table],
+            ).fetchall()
+        )
+        if not existing:
+            return
+
+        mismatched = {
+            name: f"{existing.get(name, 'missing')} != {column_type}"
+            for name, column_type in columns.items()
+            if existing.get(name) != column_type.upper()
+        }
+        if mismatched:
+            raise ValueError(
+                f"Table {schema}.{table} exists with different column types "
+                f"{mismatched} - rebuild it ({remedy}) or load it in the mode "
+                f"it was created with"
+            )
+
+    def create_table_from_data_source(
+        self, config: DataSourceConfig, replace: bool = True
+    ) -> bool:
         """
         Create tables based on a data source configuration.
 
         Args:
             config: DataSourceConfig object containing schema and table information
+            replace: Replace existing tables
 
         Returns:
             Boolean indicating success
@@ -111,10 +256,13 @@ class MotherDuckManager(DatabaseProtocol):
         for table_name in config.table_names:
             try:
                 table_success = self.create_table(
-                    schema, table_name, config.db_template
+                    schema, table_name, config.db_template, replace
                 )
                 if not table_success:
                     success = False
+            except ValueError:
+                # A kept table with the wrong column types can't be loaded
+                raise
             except Exception as e:
                 logger.error(f"Failed to create table {schema}.{table_name}: {e}")
                 success = False
@@ -131,12 +279,6 @@ class MotherDuckManager(DatabaseProtocol):
         Returns:
             Boolean indicating success
         """
-        if self.connection is None:
-            self.connect()
-
-        if not self.connection:
-            return False
-
         try:
             self.connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{schema}";')
             logger.success(f"Schema '{schema}' created or already exists")
@@ -145,27 +287,109 @@ class MotherDuckManager(DatabaseProtocol):
             logger.error(f"Error creating schema: {e}")
             raise
 
-    def setup_for_data_source(self, config: DataSourceConfig):
+    def setup_for_data_source(self, config: DataSourceConfig, replace: bool = True):
         """
         Complete setup for a data source - create schema and tables.
 
         Args:
             config: DataSourceConfig object
+            replace: Replace existing tables - keep them for resumable loads
         """
         # Create schema
         self.create_schema_if_not_exists(config.schema_name)
-        self.create_table_from_data_source(config)
+        self.create_table_from_data_source(config, replace)
+
+    @staticmethod
+    def shadow_table_name(table: str) -> str:
+        return f"{table}__shadow"
+
+    def setup_shadow_for_data_source(self, config: DataSourceConfig) -> list[str]:
+        """
+        Create empty shadow tables to load a data source into.
+
+        The live tables are left untouched until swap_in_shadow_tables.
+
+        Args:
+            config: DataSourceConfig object
+
+        Returns:
+            Shadow table names in the order of config.table_names
+        """
+        self.create_schema_if_not_exists(config.schema_name)
+        shadow_tables = []
+        for table_name in config.table_names:
+            shadow_table = self.shadow_table_name(table_name)
+            self.create_table(config.schema_name, shadow_table, config.db_template)
+            shadow_tables.append(shadow_table)
+        return shadow_tables
+
+    def swap_in_shadow_tables(
+        self,
+        config: DataSourceConfig,
+        connection: Optional[duckdb.DuckDBPyConnection] = None,
+    ):
+        """
+        Replace the live tables of a data source with their loaded shadows.
+
+        The drop and rename run in one transaction, so readers see either
+        the old table or the fully loaded one and never an empty table.
+
+        Args:
+            config: DataSourceConfig object
+            connection: Connection or cursor to swap on - defaults to the
+                shared connection
+        """
+        connection = connection or self.connection
+        schema = config.schema_name
+        try:
+            with metrics.stage("swap"):
+                connection.execute("BEGIN TRANSACTION")
+                for table_name in config.table_names:
+                    shadow_table = self.shadow_table_name(table_name)
+                    connection.execute(
+                        f'DROP TABLE IF EXISTS "{schema}"."{table_name}"'
+                    )
+                    connection.execute(
+                        f'ALTER TABLE "{schema}"."{shadow_table}" RENAME TO "{table_name}"'
+                    )
+                connection.execute("COMMIT")
+            logger.success(f"Swapped in loaded tables for {schema}")
+        except Exception as e:
+            connection.execute("ROLLBACK")
+            logger.error(f"Error swapping in shadow tables for {schema}: {e}")
+            raise
+
+    def drop_shadow_tables(
+        self,
+        config: DataSourceConfig,
+        connection: Optional[duckdb.DuckDBPyConnection] = None,
+    ):
+        """
+        Drop the shadow tables of a data source after a failed load.
+
+        Args:
+            config: DataSourceConfig object
+            connection: Connection or cursor to drop on - defaults to the
+                shared connection
+        """
+        connection = connection or self.connection
+        for table_name in config.table_names:
+            connection.execute(
+                f'DROP TABLE IF EXISTS "{config.schema_name}".'
+                f'"{self.shadow_table_name(table_name)}"'
+            )
 
     def close(self):
-        """Close the MotherDuck connection."""
-        if self.connection:
-            self.connection.close()
+        """Close the idle cursors and the MotherDuck connection."""
+        while self._idle_cursors:
+            self._idle_cursors.pop().close()
+        if self._connection:
+            self._connection.close()
             self.connection = None
             logger.info("MotherDuck Connection Closed")
 
     def __enter__(self):
-        """Context manager entry point."""
-        self.connect()
+        """Context manager entry point - the connection is opened on first use."""
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -0,0 +1,130 @@
+from loguru import logger
+
+from database.motherduck import MotherDuckManager
+from database.throttling import writer_slot
+
+
+class PermitHistory:
+    """
+    Long-lived Street Manager permit history across every loaded month.
+
+    Each month is written as one contiguous block sorted by usrn and
+    permit_reference_number, so min/max zone maps prune scans on year and
+    month and keep usrn and permit lookups to a few row groups.
+    """
+
+    schema = "raw_data_history"
+    table = "permits"
+
+    def __init__(self, conn):
+        """
+        Initialise the permit history.
+
+        Args:
+            conn: DuckDB connection
+        """
+        self.conn = conn
+
+    @classmethod
+    def create_table_if_not_exists(cls, conn, db_template: dict):
+        """
+        Create the history schema and table if they don't exist.
+
+        Args:
+            conn: DuckDB connection
+            db_template: Street Manager table template
+
+        Raises:
+            ValueError: If the history table exists with other column types,
+                e.g. VARCHAR columns when loading with --typed
+        """
+        column_defs = ",\n                ".join(
+            [f"{col_name} {col_type}" for col_name, col_type in db_template.items()]
+        )
+        conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{cls.schema}";')
+        conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{cls.schema}"."{cls.table}" (
+                year INTEGER,
+                month INTEGER,
+                {column_defs}
+            );"""
+        )
+        # INSERT ... BY NAME would otherwise cast new months to the old types
+        MotherDuckManager.check_column_types(
+            conn,
+            cls.schema,
+            cls.table,
+            {"year": "INTEGER", "month": "INTEGER", **db_template},
+            remedy=f"drop {cls.schema}.{cls.table} and backfill again with --reload",
+        )
+
+    @staticmethod
+    def table_month(table_name: str) -> tuple[int, int]:
+        """
+        Get the year and month of a monthly Street Manager table.
+
+        Args:
+            table_name: Table name such as "03_2024"
+
+        Returns:
+            Tuple of (year, month)
+        """
+        month, year = table_name.split("_")
+        return int(year), int(month)
+
+    def has_month(self, table_name: str) -> bool:
+        """
+        Check whether a monthly table has been copied into the history.
+
+        Args:
+            table_name: Monthly table name
+
+        Returns:
+            Boolean indicating the month is present
+        """
+        year, month = self.table_month(table_name)
+        return self.conn.execute(
+            f"""SELECT EXISTS (
+                SELECT 1 FROM "{self.schema}"."{self.table}"
+                WHERE year = ? AND month = ?
+            )""",
+            [year, month],
+        ).fetchone()[0]
+
+    def replace_month(self, schema: str, table_name: str) -> int:
+        """
+        Copy a loaded month into the history, replacing any earlier copy.
+
+        Args:
+            schema: Schema of the monthly table
+            table_name: Monthly table name
+
+        Returns:
+            Number of rows copied
+        """
+        year, month = self.table_month(table_name)
+        with writer_slot(self.conn):
+            self.conn.execute("BEGIN TRANSACTION")
+            try:
+                self.conn.execute(
+                    f"""DELETE FROM "{self.schema}"."{self.table}"
+                        WHERE year = ? AND month = ?""",
+                    [year, month],
+                )
+                copied = self.conn.execute(
+                    f"""INSERT INTO "{self.schema}"."{self.table}" BY NAME
+                        SELECT ? AS year, ? AS month, *
+                        FROM "{schema}"."{table_name}"
+                        ORDER BY usrn, permit_reference_number""",
+                    [year, month],
+                ).fetchone()[0]
+                self.conn.execute("COMMIT")
+            except Exception as e:
+                self.conn.execute("ROLLBACK")
+                logger.error(
+                    f"Error copying {schema}.{table_name} to permit history: {e}"
+                )
+                raise
+
+        logger.success(f"Copied {copied} rows of {month:02d}/{year} to permit history")
+        return copied
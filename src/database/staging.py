@@ -0,0 +1,198 @@
+import glob
+import os
+import shutil
+from typing import Optional
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+
+from metrics import metrics
+
+
+class ParquetStager:
+    """
+    Stand-in for a MotherDuck connection that writes every batch a processor
+    would insert to compressed local Parquet files instead.
+
+    Files are written to <directory>/<schema>/<table>/part-NNNNN.parquet and
+    are uploaded separately with load_staged_table, so parsing never waits
+    on remote writes and a load can be replayed without re-downloading.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        compression: str = "zstd",
+        row_group_size: int = 122880,
+    ):
+        """
+        Initialise a Parquet stager.
+
+        Args:
+            directory: Root directory for staged files
+            compression: Parquet compression codec
+            row_group_size: Maximum number of rows per Parquet row group
+        """
+        self.directory = directory
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.part_counts: dict[tuple[str, str], int] = {}
+        self._connection: Optional[duckdb.DuckDBPyConnection] = None
+
+    @property
+    def connection(self) -> duckdb.DuckDBPyConnection:
+        """Local DuckDB connection for staging query results."""
+        if self._connection is None:
+            self._connection = duckdb.connect()
+        return self._connection
+
+    def table_directory(self, schema: str, table: str) -> str:
+        return os.path.join(self.directory, schema, table)
+
+    def reset(self, schema: str, table: str):
+        """
+        Remove previously staged files for a table.
+
+        Args:
+            schema: Schema name
+            table: Table name
+        """
+        shutil.rmtree(self.table_directory(schema, table), ignore_errors=True)
+        self.part_counts.pop((schema, table), None)
+
+    def next_part_path(self, schema: str, table: str) -> str:
+        directory = self.table_directory(schema, table)
+        os.makedirs(directory, exist_ok=True)
+        part = self.part_counts.get((schema, table), 0)
+        self.part_counts[(schema, table)] = part + 1
+        return os.path.join(directory, f"part-{part:05d}.parquet")
+
+    def stage(self, data, schema: str, table: str) -> int:
+        """
+        Write a batch to the next Parquet part file of a table.
+
+        Args:
+            data: PyArrow Table or pandas DataFrame
+            schema: Schema name
+            table: Table name
+
+        Returns:
+            Number of rows staged
+        """
+        if isinstance(data, pd.DataFrame):
+            data = pa.Table.from_pandas(data, preserve_index=False)
+
+        path = self.next_part_path(schema, table)
+        pq.write_table(
+            data,
+            path,
+            compression=self.compression,
+            row_group_size=self.row_group_size,
+        )
+        logger.success(f"Staged {len(data)} rows for {schema}.{table} in {path}")
+        return len(data)
+
+    def stage_query(
+        self, query: str, schema: str, table: str, parameters: Optional[dict] = None
+    ) -> int:
+        """
+        Write the result of a local DuckDB query to the next Parquet part file.
+
+        Args:
+            query: SELECT statement run on the local staging connection
+            schema: Schema name
+            table: Table name
+            parameters: Optional named query parameters
+
+        Returns:
+            Number of rows staged
+        """
+        path = self.next_part_path(schema, table)
+        staged = self.connection.execute(
+            f"""COPY ({query}) TO '{path}' (
+                FORMAT parquet,
+                COMPRESSION {self.compression},
+                ROW_GROUP_SIZE {self.row_group_size}
+            )""",
+            parameters,
+        ).fetchone()[0]
+        logger.success(f"Staged {staged} rows for {schema}.{table} in {path}")
+        return staged
+
+    def close(self):
+        """Close the local staging connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def load_staged_table(
+    conn, directory: str, schema: str, table: str, target_table: Optional[str] = None
+) -> int:
+    """
+    Upload every staged Parquet file of a table to MotherDuck in one insert.
+
+    Columns are matched by name, so staged files only need to carry the
+    columns the processor would have inserted, and part files whose schemas
+    differ are unioned by name.
+
+    Args:
+        conn: MotherDuck connection
+        directory: Root staging directory
+        schema: Schema name
+        table: Table name the files were staged under
+        target_table: Table to insert into - defaults to table
+
+    Returns:
+        Number of rows inserted
+    """
+    pattern = os.path.join(directory, schema, table, "*.parquet")
+    if not glob.glob(pattern):
+        raise FileNotFoundError(f"No staged files found for {schema}.{table}")
+
+    target_table = target_table or table
+    try:
+        with metrics.stage("load_staged"):
+            inserted = conn.execute(
+                f"""INSERT INTO "{schema}"."{target_table}" BY NAME
+                    SELECT * FROM read_parquet($pattern, union_by_name = true)""",
+                {"pattern": pattern},
+            ).fetchone()[0]
+        metrics.record("load_staged", rows=inserted)
+        logger.success(f"Loaded {inserted} staged rows into {schema}.{target_table}")
+        return inserted
+    except Exception as e:
+        logger.error(f"Error loading staged files into {schema}.{target_table}: {e}")
+        raise
+
+
+def replace_table_from_staged(conn, directory: str, schema: str, table: str) -> int:
+    """
+    Create or replace a table from its staged Parquet files in one statement.
+
+    Args:
+        conn: MotherDuck connection
+        directory: Root staging directory
+        schema: Schema name
+        table: Table name
+
+    Returns:
+        Number of rows in the new table
+    """
+    pattern = os.path.join(directory, schema, table, "*.parquet")
+    if not glob.glob(pattern):
+        raise FileNotFoundError(f"No staged files found for {schema}.{table}")
+
+    with metrics.stage("load_staged"):
+        conn.execute(
+            f"""CREATE OR REPLACE TABLE "{schema}"."{table}" AS
+                SELECT * FROM read_parquet($pattern, union_by_name = true)""",
+            {"pattern": pattern},
+        )
+    rows = conn.execute(f'SELECT COUNT(*) FROM "{schema}"."{table}"').fetchone()[0]
+    metrics.record("load_staged", rows=rows)
+    logger.success(f"Replaced {schema}.{table} with {rows} staged rows")
+    return rows
@@ -0,0 +1,56 @@
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class ThrottledConnection:
+    """
+    Wraps a DuckDB connection so that writes share a limited number of
+    writer slots with every other wrapped connection.
+
+    A slot is held for each execute call, or for a whole unit of work such
+    as a transaction with writer_slot(), so that a transaction is never
+    left open while it waits for a slot.
+
+    All other attributes are passed through to the wrapped connection.
+    """
+
+    def __init__(self, connection, writer_slots: threading.BoundedSemaphore):
+        self._connection = connection
+        self._writer_slots = writer_slots
+        self._local = threading.local()
+
+    @contextmanager
+    def writer_slot(self):
+        """Hold a writer slot until the block exits - nested calls share it."""
+        if getattr(self._local, "holding", False):
+            yield
+            return
+
+        with self._writer_slots:
+            self._local.holding = True
+            try:
+                yield
+            finally:
+                self._local.holding = False
+
+    def execute(self, *args, **kwargs):
+        with self.writer_slot():
+            return self._connection.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def writer_slot(conn):
+    """
+    Hold a writer slot of a throttled connection for a unit of work.
+
+    Args:
+        conn: DuckDB connection, ThrottledConnection or ParquetStager
+
+    Returns:
+        Context manager - does nothing unless conn is a ThrottledConnection
+    """
+    if isinstance(conn, ThrottledConnection):
+        return conn.writer_slot()
+    return nullcontext()
@@ -1,4 +1,18 @@
+import argparse
+import json
+import os
+import subprocess
+from functools import partial
+from typing import Optional
+
+from database.checkpoints import HighWaterMark, LoadCheckpoint
 from database.motherduck import MotherDuckManager
+from database.permit_history import PermitHistory
+from database.staging import (
+    ParquetStager,
+    load_staged_table,
+    replace_table_from_staged,
+)
 from loguru import logger
 
 from auth.get_credentials import get_secrets
@@ -13,16 +27,362 @@ from data_processors.os_usrn_uprn import process_data as process_os_usrn_uprn_da
 from data_processors.os_open_usrn import process_data as process_os_open_usrn_data
 from data_processors.geoplace_swa import process_data as process_geoplace_swa_data
 from data_processors.street_manager import process_data as process_street_manager_data
+from data_processors.batching import BatchSizer
+
+from metrics import metrics
+from orchestrator import DagScheduler, Task
+from profiling import profiler
+
+# dbt selections that can start as soon as their source tables are loaded -
+# everything else in the project waits for all four sources
+DBT_MODEL_INPUTS = {
+    "dft_data_joins": ["geoplace_swa"],
+    "uprn_usrn_count": ["os_open_usrn", "os_usrn_uprn"],
+}
+
+
+def run_street_manager(
+    config: StreetManager,
+    conn,
+    table_name: str,
+    resumable: bool = False,
+    incremental: bool = False,
+    decode_workers: int = 0,
+):
+    process_street_manager_data(
+        url=config.download_links[0],
+        batch_size=BatchSizer.from_env(config.batch_limit or 200000),
+        conn=conn,
+        schema_name=config.schema_name,
+        table_name=table_name,
+        db_template=config.db_template,
+        resumable=resumable,
+        incremental=incremental,
+        typed_columns=config.typed_columns,
+        workers=decode_workers,
+    )
+
+
+def load_street_manager(
+    config: StreetManager,
+    conn,
+    table_name: str,
+    resumable: bool = False,
+    incremental: bool = False,
+    decode_workers: int = 0,
+):
+    """Load the Street Manager month and copy it into the permit history."""
+    run_street_manager(config, conn, table_name, resumable, incremental, decode_workers)
+    PermitHistory(conn).replace_month(config.schema_name, table_name)
+
+
+def run_geoplace_swa(config: GeoplaceSwa, conn, table_name: str):
+    process_geoplace_swa_data(
+        url=config.download_links[0],
+        conn=conn,
+        schema_name=config.schema_name,
+        table_name=table_name,
+    )
+
+
+def run_os_open_usrn(config: OsOpenUsrn, conn, table_name: str):
+    process_os_open_usrn_data(
+        url=config.download_links[0],
+        conn=conn,
+        batch_size=BatchSizer.from_env(config.batch_limit or 250000),
+        schema_name=config.schema_name,
+        table_name=table_name,
+    )
+
+
+def run_os_usrn_uprn(config: OsUsrnUprn, conn, table_name: str):
+    process_os_usrn_uprn_data(
+        url=config.download_links[0],
+        conn=conn,
+        batch_limit=BatchSizer.from_env(config.batch_limit or 250000),
+        schema_name=config.schema_name,
+        table_name=table_name,
+        db_template=config.db_template,
+        count_table=config.usrn_count_table,
+    )
+
+
+def run_staged(
+    configs: list, token: str, database: str, staging_dir: str, replay: bool
+):
+    """
+    Stage every data source to local Parquet files, then upload them.
+
+    Args:
+        configs: Data source configs in load order
+        token: MotherDuck token
+        database: MotherDuck database name
+        staging_dir: Root directory for staged Parquet files
+        replay: Skip processing and upload the files already staged
+    """
+    if not replay:
+        stager = ParquetStager(staging_dir)
+        try:
+            for config in configs:
+                table_name = config.table_names[0]
+                stager.reset(config.schema_name, table_name)
+                if isinstance(config, OsUsrnUprn):
+                    stager.reset(config.schema_name, config.usrn_count_table)
+                with metrics.scope(config.source_type.code):
+                    if isinstance(config, StreetManager):
+                        run_street_manager(config, stager, table_name, resumable=False)
+                    elif isinstance(config, GeoplaceSwa):
+                        run_geoplace_swa(config, stager, table_name)
+                    elif isinstance(config, OsOpenUsrn):
+                        run_os_open_usrn(config, stager, table_name)
+                    else:
+                        run_os_usrn_uprn(config, stager, table_name)
+        finally:
+            stager.close()
+
+    with MotherDuckManager(token, database) as motherduck_manager:
+        for config in configs:
+            shadow_tables = motherduck_manager.setup_shadow_for_data_source(config)
+            with (
+                metrics.scope(f"upload_{config.source_type.code}"),
+                motherduck_manager.cursor() as cursor,
+            ):
+                load_staged_table(
+                    cursor,
+                    staging_dir,
+                    config.schema_name,
+                    config.table_names[0],
+                    target_table=shadow_tables[0],
+                )
+                motherduck_manager.swap_in_shadow_tables(config, cursor)
+                if isinstance(config, OsUsrnUprn):
+                    replace_table_from_staged(
+                        cursor,
+                        staging_dir,
+                        config.schema_name,
+                        config.usrn_count_table,
+                    )
+                if isinstance(config, StreetManager):
+                    PermitHistory.create_table_if_not_exists(cursor, config.db_template)
+                    PermitHistory(cursor).replace_month(
+                        config.schema_name, config.table_names[0]
+                    )
+
+
+def load_source(motherduck_manager: MotherDuckManager, run, config, shadow: bool):
+    """
+    Load a data source on its own cursor.
+
+    Args:
+        motherduck_manager: Shared MotherDuck manager
+        run: Runner for the data source
+        config: Data source config
+        shadow: Load into the shadow table created by
+            setup_shadow_for_data_source and swap it in once loaded
+    """
+    with motherduck_manager.cursor() as cursor:
+        table_name = config.table_names[0]
+        if not shadow:
+            run(config, cursor, table_name)
+            return
+
+        try:
+            run(config, cursor, motherduck_manager.shadow_table_name(table_name))
+        except Exception:
+            motherduck_manager.drop_shadow_tables(config, cursor)
+            raise
+        motherduck_manager.swap_in_shadow_tables(config, cursor)
+
+
+def run_dbt(
+    project_dir: str,
+    name: str,
+    command: list[str],
+    token: str,
+    database: str,
+    dbt_vars: Optional[dict] = None,
+):
+    """
+    Run a dbt command against MotherDuck.
+
+    Each invocation gets its own target directory so that several can run
+    at the same time.
+
+    Args:
+        project_dir: dbt project directory
+        name: Name of the invocation, used for its target directory
+        command: dbt command and selection arguments
+        token: MotherDuck token
+        database: MotherDuck database name
+        dbt_vars: Optional project variables passed with --vars
+    """
+    target_path = os.path.join("target", name)
+    env = {**os.environ, "MOTHERDUCK_TOKEN": token, "MOTHERDB": database}
+    if dbt_vars:
+        command = [*command, "--vars", json.dumps(dbt_vars)]
+    subprocess.run(
+        ["dbt", *command, "--target-path", target_path],
+        cwd=project_dir,
+        env=env,
+        check=True,
+    )
+
+
+def run_pipeline(
+    configs: dict,
+    motherduck_manager: MotherDuckManager,
+    token: str,
+    database: str,
+    dbt_project: Optional[str] = None,
+    max_downloads: int = 2,
+    incremental: bool = False,
+    resumable: bool = False,
+    typed: bool = False,
+    decode_workers: int = 0,
+) -> dict[str, dict]:
+    """
+    Load every data source concurrently and run dbt models once their inputs
+    are loaded.
+
+    Args:
+        configs: Data source configs keyed by source code
+        motherduck_manager: Shared MotherDuck manager
+        token: MotherDuck token
+        database: MotherDuck database name
+        dbt_project: Optional dbt project directory - dbt is skipped if None
+        max_downloads: Maximum number of sources loading at once
+        incremental: Merge only Street Manager events newer than the last
+            completed load
+        resumable: Resume the Street Manager month from its checkpoint -
+            a month whose checkpoint is complete is not loaded again
+        typed: Street Manager was loaded with typed columns, so the dbt
+            models skip their casts
+        decode_workers: Street Manager decode worker processes - 0 decodes
+            on the loading thread
+
+    Returns:
+        Dictionary of task name to its status and timings
+    """
+    scheduler = DagScheduler(
+        resource_limits={"download": max_downloads, "dbt": 2}, max_workers=6
+    )
+    runners = {
+        "street_manager": partial(
+            load_street_manager,
+            resumable=resumable,
+            incremental=incremental,
+            decode_workers=decode_workers,
+        ),
+        "geoplace_swa": run_geoplace_swa,
+        "os_open_usrn": run_os_open_usrn,
+        "os_usrn_uprn": run_os_usrn_uprn,
+    }
+    for name, config in configs.items():
+        scheduler.add(
+            Task(
+                name,
+                partial(
+                    load_source,
+                    motherduck_manager,
+                    runners[name],
+                    config,
+                    # Street Manager resumes or merges into its live table
+                    shadow=not isinstance(config, StreetManager),
+                ),
+                resources=["download"],
+            )
+        )
+
+    if dbt_project:
+        dbt = partial(
+            run_dbt,
+            dbt_project,
+            token=token,
+            database=database,
+            dbt_vars={"typed_permits": True} if typed else None,
+        )
+        for model, inputs in DBT_MODEL_INPUTS.items():
+            scheduler.add(
+                Task(
+                    f"dbt_{model}",
+                    partial(dbt, f"dbt_{model}", ["run", "--select", model]),
+                    depends_on=inputs,
+                    resources=["dbt"],
+                )
+            )
+        scheduler.add(
+            Task(
+                "dbt_remaining_models",
+                partial(
+                    dbt, "dbt_remaining_models", ["run", "--exclude", *DBT_MODEL_INPUTS]
+                ),
+                depends_on=[*configs, *(f"dbt_{model}" for model in DBT_MODEL_INPUTS)],
+                resources=["dbt"],
+            )
+        )
+        scheduler.add(
+            Task(
+                "dbt_test",
+                partial(dbt, "dbt_test", ["test"]),
+                depends_on=["dbt_remaining_models"],
+                resources=["dbt"],
+            )
+        )
+
+    return scheduler.run()
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Open Street Works data pipeline")
+    parser.add_argument("--dbt-project", help="Run dbt models from this project")
+    parser.add_argument("--max-downloads", type=int, default=2)
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Merge only Street Manager events newer than the last completed load",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=os.getenv("RESUME_LOADS", "").lower() in ("1", "true"),
+        help="Resume the Street Manager month from its checkpoint instead of "
+        "rebuilding it - a completed month is not loaded again",
+    )
+    parser.add_argument(
+        "--decode-workers",
+        type=int,
+        default=int(os.getenv("DECODE_WORKERS", "0")),
+        help="Decode Street Manager batches in this many worker processes "
+        "while the previous batch is inserted - 0 decodes serially",
+    )
+    parser.add_argument(
+        "--typed",
+        action="store_true",
+        help="Load Street Manager dates, flags, usrn and promoter_swa_code as "
+        "typed columns",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=os.getenv("METRICS_FILE"),
+        help="Write per-stage timings and throughput to this JSON file",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        help="Write CPU stack samples and memory timelines per source here",
+    )
+    args = parser.parse_args()
+    if args.resume and args.incremental:
+        parser.error("--resume and --incremental can not be used together")
+    if args.profile_dir:
+        profiler.enable(args.profile_dir)
+
     # MotherDuck Credentials
     secrets = get_secrets(secret_name)
     token = secrets["motherduck_token"]
     database = "sm_permit"
 
     # Create Data Source Configs
-    street_manager_config = StreetManager.create_default_latest()
+    street_manager_config = StreetManager.create_default_latest(typed=args.typed)
     geoplace_swa_config = GeoplaceSwa.create_default_latest()
     os_open_usrn_config = OsOpenUsrn.create_default_latest()
     os_usrn_uprn_config = OsUsrnUprn.create_default_latest()
@@ -32,44 +392,74 @@ def main():
     logger.info(f"os_open_usrn_config: {os_open_usrn_config}")
     logger.info(f"os_usrn_uprn_config: {os_usrn_uprn_config}")
 
-    # Process Data
-    with MotherDuckManager(token, database) as motherduck_manager_street_manager:
-        motherduck_manager_street_manager.setup_for_data_source(street_manager_config)
-        process_street_manager_data(
-            url=street_manager_config.download_links[0],
-            batch_size=street_manager_config.batch_limit or 200000,
-            conn=motherduck_manager_street_manager.connection,
-            schema_name=street_manager_config.schema_name,
-            table_name=street_manager_config.table_names[0],
-        )
+    results = {}
+    try:
+        # Optionally stage to local Parquet first and upload each table in one insert
+        staging_dir = os.getenv("STAGING_DIR")
+        if staging_dir:
+            run_staged(
+                [
+                    street_manager_config,
+                    geoplace_swa_config,
+                    os_open_usrn_config,
+                    os_usrn_uprn_config,
+                ],
+                token,
+                database,
+                staging_dir,
+                replay=os.getenv("STAGING_REPLAY", "").lower() in ("1", "true"),
+            )
+            return
 
-    with MotherDuckManager(token, database) as motherduck_manager_geoplace_swa:
-        motherduck_manager_geoplace_swa.setup_for_data_source(geoplace_swa_config)
-        process_geoplace_swa_data(
-            url=geoplace_swa_config.download_links[0],
-            conn=motherduck_manager_geoplace_swa.connection,
-            schema_name=geoplace_swa_config.schema_name,
-            table_name=geoplace_swa_config.table_names[0],
-        )
+        # Process Data - sources load concurrently over one shared connection
+        with MotherDuckManager(token, database) as motherduck_manager:
+            # Tables are created up front - concurrent DDL would conflict
+            # The Street Manager month is rebuilt on every run unless it is
+            # resumed from a checkpoint or merged into incrementally
+            motherduck_manager.setup_for_data_source(
+                street_manager_config,
+                replace=not (args.resume or args.incremental),
+            )
+            PermitHistory.create_table_if_not_exists(
+                motherduck_manager.connection, street_manager_config.db_template
+            )
+            LoadCheckpoint.create_table_if_not_exists(motherduck_manager.connection)
+            HighWaterMark.create_table_if_not_exists(motherduck_manager.connection)
+            # The other sources load into shadow tables so readers never see
+            # an empty or partial table
+            motherduck_manager.setup_shadow_for_data_source(geoplace_swa_config)
+            motherduck_manager.setup_shadow_for_data_source(os_open_usrn_config)
+            motherduck_manager.setup_shadow_for_data_source(os_usrn_uprn_config)
 
-    with MotherDuckManager(token, database) as motherduck_manager_os_open_usrn:
-        motherduck_manager_os_open_usrn.setup_for_data_source(os_open_usrn_config)
-        process_os_open_usrn_data(
-            url=os_open_usrn_config.download_links[0],
-            conn=motherduck_manager_os_open_usrn.connection,
-            batch_size=os_open_usrn_config.batch_limit or 250000,
-            schema_name=os_open_usrn_config.schema_name,
-            table_name=os_open_usrn_config.table_names[0],
-        )
+            results = run_pipeline(
+                {
+                    "street_manager": street_manager_config,
+                    "geoplace_swa": geoplace_swa_config,
+                    "os_open_usrn": os_open_usrn_config,
+                    "os_usrn_uprn": os_usrn_uprn_config,
+                },
+                motherduck_manager,
+                token,
+                database,
+                dbt_project=args.dbt_project,
+                max_downloads=args.max_downloads,
+                incremental=args.incremental,
+                resumable=args.resume,
+                typed=args.typed,
+                decode_workers=args.decode_workers,
+            )
 
-    with MotherDuckManager(token, database) as motherduck_manager_os_usrn_uprn:
-        process_os_usrn_uprn_data(
-            url=os_usrn_uprn_config.download_links[0],
-            conn=motherduck_manager_os_usrn_uprn.connection,
-            batch_limit=os_usrn_uprn_config.batch_limit or 250000,
-            schema_name=os_usrn_uprn_config.schema_name,
-            table_name=os_usrn_uprn_config.table_names[0],
-        )
+        for name, result in results.items():
+            logger.info(f"{name}: {result}")
+        failed = [
+            name for name, result in results.items() if result["status"] != "succeeded"
+        ]
+        if failed:
+            raise RuntimeError(f"Pipeline tasks did not succeed: {failed}")
+    finally:
+        if args.metrics_file:
+            metrics.write(args.metrics_file, extra={"tasks": results})
+            logger.info(f"Wrote pipeline metrics to {args.metrics_file}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,301 @@
+import bisect
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 60000]
+
+
+class StageMetrics:
+    """
+    Totals for one pipeline stage.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.max_latency = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(
+        self,
+        seconds: Optional[float] = None,
+        rows: int = 0,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ):
+        self.rows += rows
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        if seconds is None:
+            return
+        self.calls += 1
+        self.seconds += seconds
+        self.max_latency = max(self.max_latency, seconds)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+
+    def as_dict(self) -> dict:
+        labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [
+            f">{LATENCY_BUCKETS_MS[-1]}ms"
+        ]
+        seconds = self.seconds
+        return {
+            "calls": self.calls,
+            "seconds": round(seconds, 3),
+            "rows": self.rows,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "rows_per_second": round(self.rows / seconds) if seconds else None,
+            "mb_per_second": (
+                round(max(self.bytes_in, self.bytes_out) / 1024 / 1024 / seconds, 2)
+                if seconds
+                else None
+            ),
+            "max_latency_ms": round(self.max_latency * 1000, 1),
+            "latency_histogram": {
+                label: count for label, count in zip(labels, self.histogram) if count
+            },
+        }
+
+
+class StageTimer:
+    """
+    Times many small calls of a stage and records them as one call.
+
+    Entering and leaving the timer only touches thread-local state, so it
+    is cheap enough to wrap every event or chunk. The accumulated time is
+    recorded when flush() is called, e.g. once per batch. Like stage(),
+    time spent in nested stages is left out.
+
+    A timer is used by the thread that created it.
+    """
+
+    def __init__(self, metrics: "PipelineMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.seconds = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self.metrics._local.__dict__.setdefault("stack", []).append(0.0)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = time.perf_counter() - self._start
+        stack = self.metrics._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        self.seconds += elapsed - nested
+
+    def flush(self, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0):
+        """
+        Record the time accumulated since the last flush as one call.
+
+        Args:
+            rows: Rows handled since the last flush
+            bytes_in: Bytes read since the last flush
+            bytes_out: Bytes produced since the last flush
+        """
+        if self.seconds or rows or bytes_in or bytes_out:
+            self.metrics.record(self.name, self.seconds, rows, bytes_in, bytes_out)
+        self.seconds = 0.0
+
+
+class PipelineMetrics:
+    """
+    Process wide registry of per-stage timings and throughput.
+
+    Stage times are exclusive - time spent in a nested stage on the same
+    thread is counted against the nested stage only, so a download that
+    happens while unzipping is not counted twice. Stage names are prefixed
+    with the scope of the current thread, e.g. "street_manager/insert".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._listeners: list[Callable[[str, float, int], None]] = []
+        self.reset()
+
+    def add_listener(self, listener: Callable[[str, float, int], None]):
+        """
+        Call a function every time a timed stage call is recorded.
+
+        Args:
+            listener: Callable taking (stage name, seconds, rows), called on
+                the thread that recorded the stage
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, float, int], None]):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def reset(self):
+        """Drop every recorded stage and restart the run clock."""
+        with self._lock:
+            self.stages: dict[str, StageMetrics] = {}
+            self.started = time.perf_counter()
+
+    def current_scope(self) -> Optional[str]:
+        return getattr(self._local, "scope", None)
+
+    @contextmanager
+    def scope(self, name: Optional[str]):
+        """
+        Prefix the stages recorded on this thread with a scope name.
+
+        Args:
+            name: Scope name, usually the data source - None leaves stage
+                names unprefixed
+        """
+        previous = self.current_scope()
+        self._local.scope = name
+        try:
+            yield
+        finally:
+            self._local.scope = previous
+
+    def stage_name(self, name: str) -> str:
+        scope = self.current_scope()
+        return f"{scope}/{name}" if scope else name
+
+    def record(
+        self,
+        name: str,
+        seconds: Optional[float] = None,
+        rows: int = 0,
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+    ):
+        """
+        Add to the totals of a stage.
+
+        Args:
+            name: Stage name
+            seconds: Optional wall time of one call of the stage
+            rows: Rows handled
+            bytes_in: Bytes read
+            bytes_out: Bytes produced
+        """
+        scoped_name = self.stage_name(name)
+        with self._lock:
+            stage = self.stages.get(scoped_name)
+            if stage is None:
+                stage = self.stages[scoped_name] = StageMetrics()
+            stage.add(seconds, rows, bytes_in, bytes_out)
+            listeners = list(self._listeners) if seconds is not None else []
+        for listener in listeners:
+            listener(name, seconds, rows)
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0, bytes_in: int = 0, bytes_out: int = 0):
+        """
+        Time a block as one call of a stage.
+
+        Args:
+            name: Stage name
+            rows: Rows handled by the block
+            bytes_in: Bytes read by the block
+            bytes_out: Bytes produced by the block
+        """
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.record(name, elapsed - nested, rows, bytes_in, bytes_out)
+
+    def timer(self, name: str) -> StageTimer:
+        """
+        Create a timer that records many small calls of a stage at once.
+
+        Args:
+            name: Stage name
+
+        Returns:
+            StageTimer - record its totals with flush()
+        """
+        return StageTimer(self, name)
+
+    def timed_iter(self, name: str, items: Iterable, rows: bool = False) -> Iterator:
+        """
+        Time how long an iterator takes to produce each item.
+
+        Args:
+            name: Stage name
+            items: Iterable of byte chunks, or of batches when rows is True
+            rows: Count the length of each item as rows instead of bytes
+
+        Returns:
+            Iterator over the same items
+        """
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            if rows:
+                self.record(name, rows=len(item))
+            else:
+                self.record(name, bytes_out=len(item))
+            yield item
+
+    def as_dict(self) -> dict:
+        """
+        Summarise the run.
+
+        Returns:
+            Dictionary of run seconds, process peak RSS and per-stage totals
+        """
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform != "darwin":
+            peak_rss *= 1024
+        with self._lock:
+            stages = {
+                name: stage.as_dict() for name, stage in sorted(self.stages.items())
+            }
+        return {
+            "run_seconds": round(time.perf_counter() - self.started, 3),
+            "peak_rss_mb": round(peak_rss / 1024 / 1024, 1),
+            "stages": stages,
+        }
+
+    def write(self, path: str, extra: Optional[dict] = None):
+        """
+        Write the run summary as JSON.
+
+        Args:
+            path: File path to write to
+            extra: Optional extra top-level entries, e.g. task results
+        """
+        summary = {**self.as_dict(), **(extra or {})}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as metrics_file:
+            json.dump(summary, metrics_file, indent=2)
+
+
+# Shared by the processors, the MotherDuck manager and the entry points
+metrics = PipelineMetrics()
@@ -0,0 +1,177 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional
+
+from loguru import logger
+
+from metrics import metrics
+
+
+class Task:
+    """
+    A named unit of work in a load DAG.
+
+    A task starts once every task it depends on has succeeded and a slot is
+    free in each resource pool it uses.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], object],
+        depends_on: Iterable[str] = (),
+        resources: Iterable[str] = (),
+    ):
+        """
+        Initialise a task.
+
+        Args:
+            name: Unique task name
+            run: Callable doing the work
+            depends_on: Names of tasks that must succeed first
+            resources: Names of the resource pools the task holds a slot in
+        """
+        self.name = name
+        self.run = run
+        self.depends_on = list(depends_on)
+        self.resources = list(resources)
+
+
+class DagScheduler:
+    """
+    Runs tasks concurrently in dependency order.
+
+    Tasks whose dependencies failed are skipped rather than run. Every task
+    gets a result dictionary recording its status and timings.
+    """
+
+    def __init__(
+        self, resource_limits: Optional[dict[str, int]] = None, max_workers: int = 4
+    ):
+        """
+        Initialise a DAG scheduler.
+
+        Args:
+            resource_limits: Maximum concurrent tasks per resource pool -
+                pools that are not listed are unlimited
+            max_workers: Maximum number of tasks running at once
+        """
+        self.resource_limits = resource_limits or {}
+        self.max_workers = max_workers
+        self.tasks: dict[str, Task] = {}
+
+    def add(self, task: Task) -> Task:
+        """
+        Add a task to the DAG.
+
+        Args:
+            task: Task to add
+
+        Returns:
+            The added task
+        """
+        if task.name in self.tasks:
+            raise ValueError(f"Duplicate task name: {task.name}")
+        self.tasks[task.name] = task
+        return task
+
+    def validate(self):
+        """Check every dependency exists and the tasks form no cycle."""
+        for task in self.tasks.values():
+            missing = [name for name in task.depends_on if name not in self.tasks]
+            if missing:
+                raise ValueError(f"Task {task.name} depends on unknown tasks {missing}")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle through task {name}")
+            visiting.add(name)
+            for dependency in self.tasks[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.tasks:
+            visit(name)
+
+    def run(self) -> dict[str, dict]:
+        """
+        Run every task, starting each one as soon as it is ready.
+
+        Returns:
+            Dictionary of task name to a result dictionary with the status
+            (succeeded, failed or skipped) and start, end and elapsed seconds
+        """
+        self.validate()
+        pools = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in self.resource_limits.items()
+        }
+        run_start = time.perf_counter()
+        results: dict[str, dict] = {}
+
+        def execute(task: Task) -> dict:
+            held = [pools[name] for name in sorted(task.resources) if name in pools]
+            for pool in held:
+                pool.acquire()
+            try:
+                start = time.perf_counter()
+                logger.info(f"Starting task {task.name}")
+                try:
+                    # Stages recorded by the task are grouped under its name
+                    with metrics.scope(task.name):
+                        task.run()
+                    status, error = "succeeded", None
+                except Exception as e:
+                    logger.error(f"Task {task.name} failed: {e}")
+                    status, error = "failed", str(e)
+                end = time.perf_counter()
+            finally:
+                for pool in reversed(held):
+                    pool.release()
+
+            result = {
+                "status": status,
+                "started_at": round(start - run_start, 2),
+                "finished_at": round(end - run_start, 2),
+                "seconds": round(end - start, 2),
+            }
+            if error is not None:
+                result["error"] = error
+            return result
+
+        pending = dict(self.tasks)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    states = [
+                        results.get(dep, {}).get("status") for dep in task.depends_on
+                    ]
+                    if any(state in ("failed", "skipped") for state in states):
+                        logger.warning(f"Skipping task {name} - a dependency failed")
+                        results[name] = {"status": "skipped"}
+                        del pending[name]
+                    elif all(state == "succeeded" for state in states):
+                        running[executor.submit(execute, task)] = name
+                        del pending[name]
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+                    logger.info(
+                        f"Task {name} {results[name]['status']} "
+                        f"in {results[name]['seconds']}s"
+                    )
+
+        return {name: results[name] for name in self.tasks}
@@ -0,0 +1,287 @@
+import csv
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import psutil
+from loguru import logger
+
+from metrics import metrics
+
+# Stages that mark the end of a batch - memory is snapshotted after each one
+BATCH_STAGES = ("insert", "stage_parquet", "bulk_load", "write_counts")
+
+
+class SourceProfile:
+    """
+    Stack samples and memory timeline collected for one process_data call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.memory: list[tuple[float, float, float, str]] = []
+
+
+class Profiler:
+    """
+    Opt-in sampling profiler for the data processors.
+
+    While enabled, a background thread samples the Python stack of every
+    thread running a profiled process_data call and the resident memory of
+    the process and its worker processes. Each call writes two files to the
+    profile directory:
+
+    - <source>.folded: collapsed stacks, one "frame;frame;frame count" line
+      per distinct stack, readable by flamegraph.pl, inferno or speedscope
+    - <source>.memory.csv: RSS timeline with a snapshot after every batch
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        interval: float = 0.01,
+        memory_interval: float = 0.1,
+    ):
+        """
+        Initialise the profiler.
+
+        Args:
+            directory: Directory to write profiles to - profiling is off if None
+            interval: Seconds between stack samples
+            memory_interval: Seconds between memory timeline samples
+        """
+        self.directory = directory
+        self.interval = interval
+        self.memory_interval = memory_interval
+        self.process = psutil.Process()
+        self._lock = threading.Lock()
+        self._threads: dict[int, SourceProfile] = {}
+        self._active: dict[str, SourceProfile] = {}
+        self._sampler: Optional[tuple[threading.Thread, threading.Event]] = None
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        """
+        Create a profiler from the PROFILE_DIR and PROFILE_INTERVAL variables.
+
+        Returns:
+            Profiler, disabled unless PROFILE_DIR is set
+        """
+        return cls(
+            os.getenv("PROFILE_DIR") or None,
+            float(os.getenv("PROFILE_INTERVAL", "0.01")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def enable(self, directory: str, interval: Optional[float] = None):
+        """
+        Turn profiling on for process_data calls that start after this.
+
+        Args:
+            directory: Directory to write profiles to
+            interval: Optional seconds between stack samples
+        """
+        self.directory = directory
+        if interval:
+            self.interval = interval
+
+    def current_profile(self) -> Optional[SourceProfile]:
+        with self._lock:
+            return self._threads.get(threading.get_ident())
+
+    @contextmanager
+    def track(self, profile: Optional[SourceProfile]):
+        """
+        Sample the current thread as part of a profile.
+
+        Used by threads a processor starts, so their stacks are included.
+
+        Args:
+            profile: Profile to add samples to - None does nothing
+        """
+        if profile is None:
+            yield
+            return
+
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._threads.get(ident)
+            self._threads[ident] = profile
+        try:
+            yield
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._threads.pop(ident, None)
+                else:
+                    self._threads[ident] = previous
+
+    @contextmanager
+    def profile(self, name: str):
+        """
+        Profile the current thread until the block exits, then write the files.
+
+        Args:
+            name: Source name, used for the file names - concurrent profiles
+                of the same source are numbered
+        """
+        with self._lock:
+            unique_name = name
+            suffix = 1
+            while unique_name in self._active:
+                suffix += 1
+                unique_name = f"{name}-{suffix}"
+            profile = self._active[unique_name] = SourceProfile(unique_name)
+            if self._sampler is None:
+                stopped = threading.Event()
+                thread = threading.Thread(
+                    target=self.sample, args=(stopped,), name="profiler", daemon=True
+                )
+                thread.start()
+                self._sampler = (thread, stopped)
+                metrics.add_listener(self.on_stage)
+        self.snapshot(profile, "start")
+
+        try:
+            with self.track(profile):
+                yield profile
+        finally:
+            with self._lock:
+                del self._active[unique_name]
+                sampler = None
+                if not self._active:
+                    sampler, self._sampler = self._sampler, None
+                    metrics.remove_listener(self.on_stage)
+            if sampler is not None:
+                thread, stopped = sampler
+                stopped.set()
+                thread.join()
+            self.snapshot(profile, "end")
+            self.write(profile)
+
+    def memory_mb(self) -> tuple[float, float]:
+        """
+        Measure resident memory.
+
+        Returns:
+            Tuple of (process RSS, RSS of child processes) in MB
+        """
+        rss = self.process.memory_info().rss
+        children = 0
+        for child in self.process.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return rss / 1024 / 1024, children / 1024 / 1024
+
+    def snapshot(self, profile: SourceProfile, event: str = ""):
+        rss, children = self.memory_mb()
+        profile.memory.append(
+            (time.perf_counter() - profile.started, rss, children, event)
+        )
+
+    def on_stage(self, name: str, seconds: float, rows: int):
+        """Metrics listener that snapshots memory after every batch."""
+        if name not in BATCH_STAGES:
+            return
+        profile = self.current_profile()
+        if profile is not None:
+            self.snapshot(profile, f"{name} {rows} rows")
+
+    def sample(self, stopped: threading.Event):
+        """Sampler thread loop - runs until the last profile finishes."""
+        next_memory = 0.0
+        while not stopped.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+                active = list(self._active.values())
+            for ident, profile in threads:
+                frame = frames.get(ident)
+                if frame is not None:
+                    profile.stacks[folded_stack(frame)] += 1
+
+            if time.perf_counter() >= next_memory:
+                next_memory = time.perf_counter() + self.memory_interval
+                for profile in active:
+                    self.snapshot(profile)
+
+    def write(self, profile: SourceProfile):
+        """
+        Write the collapsed stacks and memory timeline of a profile.
+
+        Args:
+            profile: Finished profile
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        stacks_path = os.path.join(self.directory, f"{profile.name}.folded")
+        with open(stacks_path, "w") as stacks_file:
+            for stack, count in profile.stacks.most_common():
+                stacks_file.write(f"{stack} {count}\n")
+
+        memory_path = os.path.join(self.directory, f"{profile.name}.memory.csv")
+        with open(memory_path, "w", newline="") as memory_file:
+            writer = csv.writer(memory_file)
+            writer.writerow(["seconds", "rss_mb", "children_rss_mb", "event"])
+            for seconds, rss, children, event in profile.memory:
+                writer.writerow(
+                    [f"{seconds:.3f}", f"{rss:.1f}", f"{children:.1f}", event]
+                )
+
+        logger.info(
+            f"Wrote {sum(profile.stacks.values())} stack samples and "
+            f"{len(profile.memory)} memory samples for {profile.name} "
+            f"to {self.directory}"
+        )
+
+
+def folded_stack(frame) -> str:
+    """
+    Collapse a frame and its callers into a flamegraph stack string.
+
+    Args:
+        frame: Innermost frame
+
+    Returns:
+        Frames from outermost to innermost as "module:function" joined by ";"
+    """
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names)).replace(" ", "_")
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Profile a processor's process_data when profiling is enabled.
+
+    Profiles are named after the metrics scope of the caller, e.g. the task
+    or backfill month, falling back to the processor module name.
+    """
+    source = func.__module__.rsplit(".", 1)[-1]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return func(*args, **kwargs)
+        with profiler.profile(metrics.current_scope() or source):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# Shared by the processors and the entry points - enabled by PROFILE_DIR
+profiler = Profiler.from_env()
@@ -0,0 +1,74 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+
+class FakeResponse:
+    """Minimal stand in for a streamed requests response."""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+        self.headers = {"content-length": str(len(content))}
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+
+@pytest.fixture
+def fake_response():
+    """Class used to fake requests responses for a payload of bytes."""
+    return FakeResponse
+
+
+def street_manager_event(i: int) -> dict:
+    """Build a Street Manager style nested event."""
+    return {
+        "event_reference": i,
+        "event_type": "WORK_START",
+        "event_time": "2024-03-01T09:00:00.000Z",
+        "object_type": "PERMIT",
+        "object_reference": f"ABC-{i}",
+        "version": 1,
+        "object_data": {
+            "permit_reference_number": f"ABC-{i}-01",
+            "usrn": str(10000000 + i),
+            "promoter_swa_code": "0016",
+            "proposed_start_date": "2024-03-01",
+            "is_ttro_required": "No" if i % 2 else None,
+        },
+    }
+
+
+def zip_events(events: list[dict], indent=None) -> list[bytes]:
+    """Zip one JSON file per event and return the archive as chunks."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for i, event in enumerate(events):
+            zip_file.writestr(f"event_{i}.json", json.dumps(event, indent=indent))
+    data = buffer.getvalue()
+    return [data[i : i + 4096] for i in range(0, len(data), 4096)]
+
+
+@pytest.fixture
+def make_event():
+    """Function building a Street Manager event from its number."""
+    return street_manager_event
+
+
+@pytest.fixture
+def make_zip_chunks():
+    """Function zipping Street Manager events into archive chunks."""
+    return zip_events
@@ -0,0 +1,49 @@
+import io
+import zipfile
+
+from data_processors import artifact_cache
+from data_processors.archive import ArchiveStats, ArchiveStream, iter_members
+
+
+def make_archive() -> bytes:
+    """Zip a couple of members with different extensions."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("readme.txt", b"not wanted" * 100)
+        zip_file.writestr("data/first.csv", b"a,b\n1,2\n")
+        zip_file.writestr("second.csv", b"a,b\n3,4\n")
+    return buffer.getvalue()
+
+
+def test_iter_members_filters_and_drains_skipped_members():
+    """Filtered and unread members should not stop later members being read"""
+    data = make_archive()
+    stats = ArchiveStats()
+    chunks = [data[i : i + 64] for i in range(0, len(data), 64)]
+
+    names = [name for name, _, _ in iter_members(chunks, (".csv",), stats)]
+
+    assert names == ["data/first.csv", "second.csv"]
+    assert stats.members == 2
+    assert stats.uncompressed_bytes == 1000 + 16
+
+
+def test_archive_stream_spools_first_member(tmp_path, fake_response, monkeypatch):
+    """Only the first matching member is written to disk"""
+    data = make_archive()
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(data)
+    )
+    progress = []
+
+    with ArchiveStream(
+        "https://example.com/archive.zip",
+        chunk_size=64,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    ) as stream:
+        path = stream.spool_first(".csv", str(tmp_path))
+
+    assert open(path, "rb").read() == b"a,b\n1,2\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["first.csv"]
+    assert progress[-1] == (len(data), len(data))
+    assert stream.stats.as_dict()["compressed_bytes"] == len(data)
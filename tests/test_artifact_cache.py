@@ -0,0 +1,76 @@
+import pytest
+
+from data_processors import artifact_cache
+from data_processors.artifact_cache import ArtifactCache
+
+
+@pytest.fixture
+def server(fake_response, monkeypatch):
+    """Fake upstream that honours If-None-Match and counts payload bytes."""
+    state = {"bodies": {}, "payload_bytes": 0}
+
+    def get(url, stream=True, timeout=None, headers=None):
+        body = state["bodies"][url]
+        etag = f'"{len(body)}-{hash(body)}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            response = fake_response(b"")
+            response.status_code = 304
+            return response
+        state["payload_bytes"] += len(body)
+        response = fake_response(body)
+        response.headers["ETag"] = etag
+        return response
+
+    monkeypatch.setattr(artifact_cache.requests, "get", get)
+    return state
+
+
+def read(cache: ArtifactCache, url: str) -> bytes:
+    with cache.get(url) as response:
+        response.raise_for_status()
+        return b"".join(response.iter_content(chunk_size=7))
+
+
+def test_unchanged_download_is_served_from_cache(tmp_path, server):
+    """A second fetch of an unchanged file should transfer no payload"""
+    cache = ArtifactCache(str(tmp_path))
+    server["bodies"]["https://example.com/a.zip"] = b"a" * 100
+
+    assert read(cache, "https://example.com/a.zip") == b"a" * 100
+    assert read(cache, "https://example.com/a.zip") == b"a" * 100
+    assert server["payload_bytes"] == 100
+
+    # A changed file is downloaded again and replaces the cached copy
+    server["bodies"]["https://example.com/a.zip"] = b"b" * 50
+    assert read(cache, "https://example.com/a.zip") == b"b" * 50
+    assert server["payload_bytes"] == 150
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, server):
+    """Entries are dropped oldest first once the cache is over its size"""
+    cache = ArtifactCache(str(tmp_path), max_bytes=250)
+    for name in ("a", "b", "c"):
+        server["bodies"][f"https://example.com/{name}.zip"] = name.encode() * 100
+
+    read(cache, "https://example.com/a.zip")
+    read(cache, "https://example.com/b.zip")
+    read(cache, "https://example.com/a.zip")
+    read(cache, "https://example.com/c.zip")
+
+    assert set(cache.read_index()) == {
+        "https://example.com/a.zip",
+        "https://example.com/c.zip",
+    }
+    assert len(list((tmp_path / "objects").iterdir())) == 2
+
+
+def test_partially_read_download_is_not_cached(tmp_path, server):
+    """A body abandoned part way must not end up in the cache"""
+    cache = ArtifactCache(str(tmp_path))
+    server["bodies"]["https://example.com/a.zip"] = b"a" * 100
+
+    with cache.get("https://example.com/a.zip") as response:
+        next(response.iter_content(chunk_size=10))
+
+    assert cache.lookup("https://example.com/a.zip") is None
+    assert list((tmp_path / "objects").iterdir()) == []
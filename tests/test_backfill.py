@@ -0,0 +1,118 @@
+import threading
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+import backfill
+from database.checkpoints import LoadCheckpoint
+from database.motherduck import MotherDuckManager
+from database.throttling import ThrottledConnection
+from data_processors.street_manager import commit_batch
+from data_sources.street_manager import StreetManager
+
+
+@pytest.fixture
+def local_motherduck(tmp_path, monkeypatch):
+    """Point every MotherDuckManager at the same local DuckDB file."""
+    database_path = str(tmp_path / "backfill.duckdb")
+
+    def connect(self):
+        self.connection = duckdb.connect(database_path)
+        return self.connection
+
+    monkeypatch.setattr(MotherDuckManager, "connect", connect)
+    return database_path
+
+
+def fake_process_data(
+    url, batch_size, conn, schema_name, table_name, db_template, resumable, **kwargs
+):
+    """Insert one row per month instead of downloading the archive."""
+    conn.execute(
+        f'INSERT INTO "{schema_name}"."{table_name}" (event_reference) VALUES (1)'
+    )
+
+
+def test_backfill_loads_each_month_and_skips_loaded(local_motherduck, monkeypatch):
+    """Every month should be loaded once and skipped on the next run"""
+    monkeypatch.setattr(backfill, "process_data", fake_process_data)
+    config = StreetManager.create_default_historic_2024()
+
+    first_run = backfill.run_historic_backfill(config, "token", "db")
+    second_run = backfill.run_historic_backfill(config, "token", "db")
+
+    assert [result["table"] for result in first_run] == config.table_names
+    assert all(result["status"] == "loaded" for result in first_run)
+    assert all(result["rows"] == 1 for result in first_run)
+    assert all(result["status"] == "skipped" for result in second_run)
+
+    # Every month lands once in the permit history, even after the rerun
+    history = (
+        duckdb.connect(local_motherduck)
+        .execute(
+            "SELECT year, month, COUNT(*) FROM raw_data_history.permits "
+            "GROUP BY ALL ORDER BY month"
+        )
+        .fetchall()
+    )
+    assert history == [(2024, month, 1) for month in range(1, 13)]
+
+
+def test_backfill_passes_decode_workers_to_each_month(local_motherduck, monkeypatch):
+    """The decode pool size should reach process_data for every month"""
+    workers = []
+
+    def recording_process_data(*args, **kwargs):
+        workers.append(kwargs["workers"])
+        fake_process_data(*args, **kwargs)
+
+    monkeypatch.setattr(backfill, "process_data", recording_process_data)
+    config = StreetManager.create_default_historic_2024()
+
+    backfill.run_historic_backfill(config, "token", "db", decode_workers=3)
+
+    assert workers == [3] * len(config.table_names)
+
+
+def test_backfill_rejects_latest_config(local_motherduck):
+    """Backfill only makes sense for HISTORIC configs"""
+    with pytest.raises(ValueError):
+        backfill.run_historic_backfill(
+            StreetManager.create_default_latest(), "token", "db"
+        )
+
+
+def test_writer_slot_held_for_whole_batch_transaction(monkeypatch):
+    """A checkpointed batch should keep one writer slot from BEGIN to COMMIT"""
+    writer_slots = threading.BoundedSemaphore(1)
+    conn = ThrottledConnection(duckdb.connect(), writer_slots)
+    conn.execute("CREATE TABLE permits (event_reference BIGINT)")
+    LoadCheckpoint.create_table_if_not_exists(conn)
+    checkpoint = LoadCheckpoint(conn, "https://example.com/2024.zip", "main", "permits")
+
+    slot_free_during_save = []
+    save = LoadCheckpoint.save
+
+    def checked_save(self, *args):
+        free = writer_slots.acquire(blocking=False)
+        if free:
+            writer_slots.release()
+        slot_free_during_save.append(free)
+        return save(self, *args)
+
+    monkeypatch.setattr(LoadCheckpoint, "save", checked_save)
+
+    commit_batch(
+        pa.table({"event_reference": pa.array([1, 2], pa.int64())}),
+        conn,
+        "main",
+        "permits",
+        checkpoint,
+        members_committed=2,
+    )
+
+    assert slot_free_during_save == [False]
+    assert conn.execute("SELECT COUNT(*) FROM permits").fetchone() == (2,)
+    # The slot is free again once the batch is committed
+    assert writer_slots.acquire(blocking=False)
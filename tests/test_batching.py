@@ -0,0 +1,59 @@
+from data_processors.batching import BatchSizer, as_batch_sizer
+
+GIB = 1024**3
+
+
+def test_batches_grow_when_fast_and_shrink_when_slow():
+    """Quick inserts grow the batch and slow ones shrink it towards the target"""
+    sizer = BatchSizer(1000, memory_budget=64 * GIB, target_seconds=10)
+
+    sizer.observe(1000, 100_000, 1.0)
+    assert sizer.next_size() == 1500
+
+    sizer.observe(1500, 150_000, 30.0)
+    assert sizer.next_size() == 500
+
+    # A short final batch says nothing about full batches
+    sizer.observe(10, 1_000, 60.0)
+    assert sizer.next_size() == 500
+
+    for _ in range(20):
+        sizer.observe(sizer.next_size(), 100 * sizer.next_size(), 0.1)
+    assert sizer.next_size() == sizer.maximum == 8000
+
+
+def test_memory_budget_caps_and_shrinks_batches():
+    """Batches are capped by the memory left under the budget"""
+    sizer = BatchSizer(100_000, minimum=100)
+    rss = sizer.process.memory_info().rss
+
+    # 10 MB of headroom at 1 KB per row, three copies of each batch
+    sizer.memory_budget = rss + 10 * 1024 * 1024
+    sizer.observe(100_000, 100_000 * 1024, 1.0)
+    assert 3000 <= sizer.next_size() <= 3500
+    assert sizer.next_size(in_flight=2) <= 1750
+
+    # Over budget the batch halves whatever the latency
+    sizer.memory_budget = rss // 2
+    sizer.observe(3200, 3200 * 1024, 1.0)
+    assert sizer._size == 1600
+    assert sizer.next_size() == 100
+
+
+def test_fixed_sizes(monkeypatch):
+    """Integers and ADAPTIVE_BATCHING=false keep the configured size"""
+    fixed = as_batch_sizer(250)
+    fixed.observe(250, 250, 0.001)
+    assert fixed.next_size() == 250
+    assert str(fixed) == "250"
+
+    monkeypatch.setenv("ADAPTIVE_BATCHING", "false")
+    assert not BatchSizer.from_env(150000).adaptive
+
+    monkeypatch.setenv("ADAPTIVE_BATCHING", "true")
+    monkeypatch.setenv("BATCH_MEMORY_BUDGET_MB", "512")
+    monkeypatch.setenv("BATCH_MAX_ROWS", "400000")
+    sizer = BatchSizer.from_env(150000)
+    assert sizer.adaptive
+    assert sizer.memory_budget == 512 * 1024 * 1024
+    assert (sizer.minimum, sizer.maximum) == (9375, 400000)
@@ -0,0 +1,16 @@
+from benchmarks.run import run_benchmarks
+
+
+def test_benchmarks_load_every_fixture(tmp_path):
+    """Every processor should load its whole synthetic fixture offline"""
+    results = run_benchmarks(scale=0.005, fixture_dir=str(tmp_path))
+
+    assert {name: result["rows"] for name, result in results.items()} == {
+        "street_manager": 100,
+        "os_open_usrn": 250,
+        "os_usrn_uprn": 1000,
+        "geoplace_swa": 15,
+    }
+    for result in results.values():
+        assert result["rows_per_second"] > 0
+        assert result["peak_rss_mb"] > 0
@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from data_sources import os_open_usrn
+from data_sources.link_cache import CachedDownloadLinks, DownloadLinkCache
+from data_sources.os_open_usrn import OsOpenUsrn
+
+
+class CountingHead:
+    """Stand-in for requests.head that counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, url, allow_redirects):
+        self.calls += 1
+        return type("Response", (), {"url": f"https://example.com/{self.calls}.zip"})
+
+
+def test_links_resolved_once_per_instance(monkeypatch):
+    """Logging a config should not resolve links and reads should reuse them"""
+    head = CountingHead()
+    monkeypatch.setattr(os_open_usrn.requests, "head", head)
+    monkeypatch.delenv("DOWNLOAD_LINK_CACHE", raising=False)
+    config = OsOpenUsrn.create_default_latest()
+
+    assert "not yet resolved" in str(config)
+    assert head.calls == 0
+
+    assert config.download_links == ["https://example.com/1.zip"]
+    assert config.download_links[0] == "https://example.com/1.zip"
+    assert "https://example.com/1.zip" in str(config)
+    assert head.calls == 1
+
+    assert config.refresh_download_links() == ["https://example.com/2.zip"]
+    assert head.calls == 2
+
+
+def test_disk_cache_shared_across_instances_until_expired(tmp_path, monkeypatch):
+    """A fresh on-disk entry should be reused and an expired one resolved again"""
+    head = CountingHead()
+    monkeypatch.setattr(os_open_usrn.requests, "head", head)
+    monkeypatch.setenv("DOWNLOAD_LINK_CACHE", str(tmp_path / "links.json"))
+    monkeypatch.setenv("DOWNLOAD_LINK_CACHE_TTL", "60")
+
+    first = OsOpenUsrn.create_default_latest().download_links
+    second = OsOpenUsrn.create_default_latest().download_links
+    assert first == second == ["https://example.com/1.zip"]
+    assert head.calls == 1
+
+    cache = DownloadLinkCache(str(tmp_path / "links.json"), ttl_seconds=60)
+    monkeypatch.setattr(time, "time", lambda: 10**12)
+    assert cache.get(OsOpenUsrn.create_default_latest().link_cache_key) is None
+    assert OsOpenUsrn.create_default_latest().download_links == [
+        "https://example.com/2.zip"
+    ]
+
+
+def test_config_without_link_resolver_cannot_be_created():
+    """A subclass missing resolve_download_links should fail on creation"""
+
+    class NoResolver(CachedDownloadLinks):
+        pass
+
+    with pytest.raises(TypeError, match="resolve_download_links"):
+        NoResolver()
@@ -0,0 +1,124 @@
+import pandas as pd
+
+from benchmarks.fixtures import write_swa_workbook
+from data_processors import artifact_cache, geoplace_swa
+
+
+def original_clean_name_geoplace(x: str) -> str:
+    """The sequential name cleaning that normalise_account_names replaced."""
+    x = x.replace("LONDON BOROUGH OF", "").strip()
+    x = x.replace("COUNTY COUNCIL", "").strip()
+    x = x.replace("BOROUGH COUNCIL", "").strip()
+    x = x.replace("CITY COUNCIL", "").strip()
+    x = x.replace("COUNCIL", "").strip()
+    x = x.replace("ROYAL BOROUGH OF", "").strip()
+    x = x.replace("COUNCIL OF THE", "").strip()
+    x = x.replace("CITY OF", "").strip()
+    x = x.replace("COUNTY", "").strip()
+    x = x.replace("BOROUGH", "").strip()
+    x = x.replace("CITY", "").strip()
+    x = x.replace("METROPOLITAN", "").strip()
+    x = x.replace("DISTRICT", "").strip()
+    x = x.replace("CORPORATION", "").strip()
+    x = x.replace("OF", "").strip()
+    x = str(x).lower()
+    return x
+
+
+def original_account_names(names: pd.Series) -> pd.Series:
+    """The original column cleaning, with its overrides applied one by one."""
+    df = pd.DataFrame({"account_name": names})
+    df.loc[:, "account_name"] = df.loc[:, "account_name"].apply(
+        original_clean_name_geoplace
+    )
+    df.loc[df["account_name"] == "peter", "account_name"] = "peterborough"
+    df.loc[
+        df["account_name"] == "bournemouth, christchurch and poole", "account_name"
+    ] = "bournemouth christchurch and poole"
+    df.loc[df["account_name"] == "brighton & hove", "account_name"] = (
+        "brighton and hove"
+    )
+    df.loc[df["account_name"] == "telford & wrekin", "account_name"] = (
+        "telford and wrekin"
+    )
+    df.loc[df["account_name"] == "hammersmith & fulham", "account_name"] = (
+        "hammersmith and fulham"
+    )
+    df.loc[df["account_name"] == "cheshire east", "account_name"] = "east cheshire"
+    df.loc[df["account_name"] == "cheshire west and chester", "account_name"] = (
+        "west cheshire"
+    )
+    df.loc[df["account_name"] == "east riding  yorkshire", "account_name"] = (
+        "eastridingyorkshire"
+    )
+    return df["account_name"]
+
+
+ACCOUNT_NAMES = [
+    "LONDON BOROUGH OF HAMMERSMITH & FULHAM",
+    "LONDON BOROUGH OF CAMDEN",
+    "PETERBOROUGH CITY COUNCIL",
+    "EAST RIDING OF YORKSHIRE COUNCIL",
+    "ROYAL BOROUGH OF KENSINGTON AND CHELSEA",
+    "COUNCIL OF THE ISLES OF SCILLY",
+    "WIGAN METROPOLITAN BOROUGH COUNCIL",
+    "ISLE OF WIGHT COUNCIL",
+    "CITY OF LONDON CORPORATION",
+    "CITY OF YORK COUNCIL",
+    "BOURNEMOUTH, CHRISTCHURCH AND POOLE COUNCIL",
+    "BRIGHTON & HOVE CITY COUNCIL",
+    "TELFORD & WREKIN COUNCIL",
+    "CHESHIRE EAST COUNCIL",
+    "CHESHIRE WEST AND CHESTER COUNCIL",
+    "KENT COUNTY COUNCIL",
+    "NORTHAMPTON BOROUGH COUNCIL",
+    "BIRMINGHAM CITY COUNCIL",
+    "RHONDDA CYNON TAF COUNTY BOROUGH COUNCIL",
+    "SOUTH CAMBRIDGESHIRE DISTRICT COUNCIL",
+    "  GREATER LONDON AUTHORITY  ",
+    "OFFICE OF RAIL AND ROAD",
+    "THAMES WATER UTILITIES LTD",
+    "",
+]
+
+
+def test_account_names_match_original_cleaning():
+    """The vectorised transform should give the original output for every name"""
+    names = pd.Series(ACCOUNT_NAMES, index=range(10, 10 + len(ACCOUNT_NAMES)))
+
+    normalised = geoplace_swa.normalise_account_names(names)
+
+    assert normalised.tolist() == original_account_names(names).tolist()
+    assert normalised.index.equals(names.index)
+    assert names.map(geoplace_swa.clean_name_geoplace).tolist() == normalised.tolist()
+
+
+def test_account_names_keep_missing_values():
+    """Missing names should stay missing rather than being cleaned"""
+    names = pd.Series(["KENT COUNTY COUNCIL", None])
+
+    assert geoplace_swa.normalise_account_names(names).tolist() == ["kent", None]
+
+
+def test_fetch_swa_codes_keeps_empty_cells_missing(
+    tmp_path, fake_response, monkeypatch
+):
+    """Codes should be read as text with empty cells left as NULL"""
+    path = write_swa_workbook(str(tmp_path / "swa.xlsx"), 4)
+    with open(path, "rb") as workbook:
+        content = workbook.read()
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(content)
+    )
+
+    df = geoplace_swa.fetch_swa_codes("https://example.com/swa.xlsx")
+
+    assert df["swa_code"].tolist() == ["0000", "0001", "0002", "0003"]
+    assert (
+        df["account_name"]
+        .isin(
+            ["camden", "kent", "manchester", "greenwich", "york", "brighton and hove"]
+        )
+        .all()
+    )
+    assert df["website"].isna().all()
@@ -0,0 +1,82 @@
+import json
+import threading
+import time
+
+from metrics import PipelineMetrics
+
+
+def test_nested_stages_are_timed_exclusively():
+    """Time spent in a nested stage should not be counted by its parent"""
+    metrics = PipelineMetrics()
+    with metrics.stage("outer", rows=10):
+        time.sleep(0.02)
+        with metrics.stage("inner"):
+            time.sleep(0.05)
+
+    stages = metrics.as_dict()["stages"]
+    assert stages["outer"]["calls"] == 1
+    assert stages["outer"]["rows"] == 10
+    assert 0.015 <= stages["outer"]["seconds"] < 0.05
+    assert stages["inner"]["seconds"] >= 0.045
+
+
+def test_scopes_prefix_stages_per_thread():
+    """Stages should be grouped under the scope of the thread recording them"""
+    metrics = PipelineMetrics()
+
+    def load(name):
+        with metrics.scope(name):
+            metrics.record("insert", 0.001, rows=5)
+
+    threads = [threading.Thread(target=load, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.record("connect", 0.2)
+
+    stages = metrics.as_dict()["stages"]
+    assert sorted(stages) == ["a/insert", "b/insert", "connect"]
+    assert stages["a/insert"]["latency_histogram"] == {"<=1ms": 1}
+    assert stages["connect"]["latency_histogram"] == {"<=500ms": 1}
+
+
+def test_timed_iter_counts_bytes_and_writes_summary(tmp_path):
+    """Timed iterators should pass items through and record their size"""
+    metrics = PipelineMetrics()
+    chunks = list(metrics.timed_iter("download", [b"abc", b"de"]))
+    batches = list(metrics.timed_iter("read", [[1, 2], [3]], rows=True))
+
+    path = tmp_path / "out" / "metrics.json"
+    metrics.write(str(path), extra={"tasks": {"download": {"status": "succeeded"}}})
+    summary = json.loads(path.read_text())
+
+    assert chunks == [b"abc", b"de"]
+    assert batches == [[1, 2], [3]]
+    assert summary["stages"]["download"]["calls"] == 3
+    assert summary["stages"]["download"]["bytes_out"] == 5
+    assert summary["stages"]["read"]["rows"] == 3
+    assert summary["peak_rss_mb"] > 0
+    assert summary["tasks"] == {"download": {"status": "succeeded"}}
+
+
+def test_timer_records_many_calls_once_per_flush():
+    """A timer should accumulate calls locally and record them on flush"""
+    metrics = PipelineMetrics()
+    timer = metrics.timer("json_decode")
+    for _ in range(5):
+        with timer:
+            time.sleep(0.002)
+    with timer:
+        with metrics.stage("nested"):
+            time.sleep(0.03)
+    assert "json_decode" not in metrics.as_dict()["stages"]
+
+    timer.flush(rows=6, bytes_in=60)
+    timer.flush()
+
+    stage = metrics.as_dict()["stages"]["json_decode"]
+    assert stage["calls"] == 1
+    assert stage["rows"] == 6
+    assert stage["bytes_in"] == 60
+    assert 0.01 <= stage["seconds"] < 0.03
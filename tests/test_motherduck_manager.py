@@ -2,7 +2,9 @@ import pytest
 import duckdb
 
 from database.motherduck import MotherDuckManager
+from database.permit_history import PermitHistory
 from data_sources.os_usrn_uprn import OsUsrnUprn
+from data_sources.street_manager import StreetManager
 
 
 @pytest.fixture
@@ -51,3 +53,142 @@ def test_setup_for_data_source(mock_motherduck_manager):
         print(f"Tables in {test_config.schema_name}: {all_tables}")
 
         assert len(all_tables) == 1
+
+
+def test_connection_opened_lazily(monkeypatch):
+    """Entering the manager should not connect until the connection is used"""
+    connects = []
+
+    def connect(self):
+        connects.append(self.database)
+        self.connection = duckdb.connect(database=":memory:")
+        return self.connection
+
+    monkeypatch.setattr(MotherDuckManager, "connect", connect)
+
+    with MotherDuckManager("fake_token", "test_db") as manager:
+        assert connects == []
+        manager.create_schema_if_not_exists("raw")
+        manager.create_schema_if_not_exists("staging")
+    assert connects == ["test_db"]
+
+
+def test_cursors_are_pooled_and_reconnect_on_failure(monkeypatch):
+    """Borrowed cursors should share the connection and survive a dropped one"""
+    database_paths = iter([":memory:", ":memory:"])
+
+    def connect(self):
+        self.connection = duckdb.connect(database=next(database_paths))
+        return self.connection
+
+    monkeypatch.setattr(MotherDuckManager, "connect", connect)
+    manager = MotherDuckManager("fake_token", "test_db", max_cursors=2)
+
+    with manager.cursor() as first, manager.cursor() as second:
+        first.execute("CREATE TABLE permits (id INTEGER)")
+        first.execute("INSERT INTO permits VALUES (1)")
+        assert second.execute("SELECT COUNT(*) FROM permits").fetchone()[0] == 1
+    with manager.cursor() as reused:
+        assert reused in (first, second)
+
+    # Simulate the MotherDuck connection dropping
+    manager._connection.close()
+    assert not manager.is_healthy()
+
+    with manager.cursor() as cursor:
+        assert cursor not in (first, second)
+        assert cursor.execute("SELECT 1").fetchone()[0] == 1
+    assert manager.is_healthy()
+    manager.close()
+
+
+def test_shadow_tables_swap_in_atomically(mock_motherduck_manager):
+    """The live table should keep its rows until the loaded shadow is swapped in"""
+    manager = mock_motherduck_manager
+    config = OsUsrnUprn.create_default_latest()
+    schema, table = config.schema_name, config.table_names[0]
+    manager.setup_for_data_source(config)
+    manager.connection.execute(
+        f'INSERT INTO "{schema}"."{table}" (correlation_id) VALUES (\'old\')'
+    )
+
+    shadow_tables = manager.setup_shadow_for_data_source(config)
+    manager.connection.execute(
+        f'INSERT INTO "{schema}"."{shadow_tables[0]}" (correlation_id) '
+        "VALUES ('new_1'), ('new_2')"
+    )
+    live_rows = f'SELECT correlation_id FROM "{schema}"."{table}" ORDER BY 1'
+    assert manager.connection.execute(live_rows).fetchall() == [("old",)]
+
+    manager.swap_in_shadow_tables(config)
+
+    assert manager.connection.execute(live_rows).fetchall() == [
+        ("new_1",),
+        ("new_2",),
+    ]
+    tables = manager.connection.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_schema = ?",
+        [schema],
+    ).fetchall()
+    assert tables == [(table,)]
+
+
+def test_dropped_shadow_leaves_live_table(mock_motherduck_manager):
+    """A failed load should drop its shadow and keep the live table"""
+    manager = mock_motherduck_manager
+    config = OsUsrnUprn.create_default_latest()
+    schema, table = config.schema_name, config.table_names[0]
+    manager.setup_for_data_source(config)
+    manager.connection.execute(
+        f'INSERT INTO "{schema}"."{table}" (correlation_id) VALUES (\'old\')'
+    )
+
+    manager.setup_shadow_for_data_source(config)
+    manager.drop_shadow_tables(config)
+
+    assert manager.connection.execute(
+        f'SELECT COUNT(*) FROM "{schema}"."{table}"'
+    ).fetchone() == (1,)
+    with pytest.raises(duckdb.CatalogException):
+        manager.swap_in_shadow_tables(config)
+    assert manager.connection.execute(
+        f'SELECT COUNT(*) FROM "{schema}"."{table}"'
+    ).fetchone() == (1,)
+
+
+def test_kept_table_with_other_column_types_fails(mock_motherduck_manager):
+    """Keeping a VARCHAR table for a typed load should fail, not load as VARCHAR"""
+    manager = mock_motherduck_manager
+    untyped = StreetManager.create_default_latest()
+    typed = StreetManager.create_default_latest(typed=True)
+    manager.setup_for_data_source(untyped)
+
+    manager.setup_for_data_source(untyped, replace=False)
+    with pytest.raises(ValueError, match="usrn"):
+        manager.setup_for_data_source(typed, replace=False)
+
+    manager.setup_for_data_source(typed)
+    manager.setup_for_data_source(typed, replace=False)
+    schema, table = typed.schema_name, typed.table_names[0]
+    assert manager.connection.execute(
+        "SELECT data_type FROM information_schema.columns "
+        "WHERE table_schema = ? AND table_name = ? AND column_name = 'usrn'",
+        [schema, table],
+    ).fetchone() == ("BIGINT",)
+
+
+def test_history_table_with_other_column_types_fails(local_duckdb_connection):
+    """A VARCHAR permit history should not silently take typed months"""
+    untyped = StreetManager.create_default_latest()
+    typed = StreetManager.create_default_latest(typed=True)
+    PermitHistory.create_table_if_not_exists(
+        local_duckdb_connection, untyped.db_template
+    )
+    PermitHistory.create_table_if_not_exists(
+        local_duckdb_connection, untyped.db_template
+    )
+
+    with pytest.raises(ValueError, match="is_deemed"):
+        PermitHistory.create_table_if_not_exists(
+            local_duckdb_connection, typed.db_template
+        )
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from orchestrator import DagScheduler, Task
+
+
+def test_tasks_start_when_their_dependencies_succeed():
+    """A task should start as soon as its own inputs finish, not all of them"""
+    slow_source_done = threading.Event()
+    order = []
+
+    def slow_source():
+        time.sleep(0.3)
+        order.append("slow_source")
+        slow_source_done.set()
+
+    def fast_model():
+        assert not slow_source_done.is_set()
+        order.append("fast_model")
+
+    scheduler = DagScheduler(max_workers=4)
+    scheduler.add(Task("slow_source", slow_source))
+    scheduler.add(Task("fast_source", lambda: order.append("fast_source")))
+    scheduler.add(Task("fast_model", fast_model, depends_on=["fast_source"]))
+    scheduler.add(
+        Task(
+            "joined_model",
+            lambda: order.append("joined_model"),
+            depends_on=["slow_source", "fast_model"],
+        )
+    )
+
+    results = scheduler.run()
+
+    assert all(result["status"] == "succeeded" for result in results.values())
+    assert order.index("fast_model") < order.index("slow_source")
+    assert order[-1] == "joined_model"
+    assert results["slow_source"]["seconds"] >= 0.3
+
+
+def test_resource_limits_and_failed_dependencies():
+    """Resource pools should cap concurrency and failures should skip dependants"""
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def download():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    def broken():
+        raise RuntimeError("download failed")
+
+    scheduler = DagScheduler(resource_limits={"download": 2}, max_workers=4)
+    for i in range(4):
+        scheduler.add(Task(f"source_{i}", download, resources=["download"]))
+    scheduler.add(Task("broken", broken))
+    scheduler.add(Task("model", lambda: None, depends_on=["broken", "source_0"]))
+    scheduler.add(Task("report", lambda: None, depends_on=["model"]))
+
+    results = scheduler.run()
+
+    assert peak[0] == 2
+    assert results["broken"]["status"] == "failed"
+    assert results["broken"]["error"] == "download failed"
+    assert results["model"]["status"] == "skipped"
+    assert results["report"]["status"] == "skipped"
@@ -0,0 +1,75 @@
+import io
+import os
+import zipfile
+
+import duckdb
+import fiona
+import pytest
+from fiona.crs import CRS
+from shapely import wkt
+from shapely.geometry import LineString, mapping
+
+from data_processors.batching import BatchSizer
+from database.motherduck import MotherDuckManager
+from data_sources.os_open_usrn import OsOpenUsrn
+from data_processors import artifact_cache, os_open_usrn
+
+
+@pytest.fixture
+def open_usrn_zip(tmp_path):
+    """Zip a small OS Open USRN style GeoPackage with one missing geometry."""
+    gpkg_path = os.path.join(tmp_path, "osopenusrn.gpkg")
+    schema = {
+        "geometry": "LineString",
+        "properties": {"street_type": "str", "usrn": "int"},
+    }
+    with fiona.open(
+        gpkg_path, "w", driver="GPKG", schema=schema, crs=CRS.from_epsg(27700)
+    ) as dst:
+        for i in range(7):
+            line = LineString([(i, 0), (i + 0.123456789, 1)])
+            dst.write(
+                {
+                    "geometry": None if i == 3 else mapping(line),
+                    "properties": {"street_type": "Designated Street Name", "usrn": i},
+                }
+            )
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.write(gpkg_path, "osopenusrn.gpkg")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "batch_size",
+    [3, BatchSizer(2, minimum=1, maximum=4, target_seconds=60)],
+    ids=["fixed", "adaptive"],
+)
+def test_load_geopackage_open_usrns(
+    open_usrn_zip, fake_response, monkeypatch, batch_size
+):
+    """Every feature is loaded with the same WKT as shapely.wkt.dumps"""
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(open_usrn_zip)
+    )
+    config = OsOpenUsrn.create_default_latest()
+    manager = MotherDuckManager("fake_token", "test_db")
+    manager.connection = duckdb.connect(database=":memory:")
+    manager.setup_for_data_source(config)
+
+    os_open_usrn.load_geopackage_open_usrns(
+        "https://example.com/osopenusrn.zip",
+        manager.connection,
+        batch_size,
+        config.schema_name,
+        config.table_names[0],
+    )
+
+    rows = manager.connection.execute(
+        f"SELECT usrn, street_type, geometry FROM {config.schema_name}.{config.table_names[0]} ORDER BY usrn"
+    ).fetchall()
+    assert [row[0] for row in rows] == list(range(7))
+    assert rows[3][2] is None
+    expected = wkt.dumps(LineString([(1, 0), (1.123456789, 1)]))
+    assert rows[1] == (1, "Designated Street Name", expected)
@@ -0,0 +1,175 @@
+import io
+import zipfile
+
+import duckdb
+import pytest
+
+from database.motherduck import MotherDuckManager
+from data_sources.os_usrn_uprn import OsUsrnUprn
+from data_processors import artifact_cache, os_usrn_uprn
+
+HEADER = (
+    "CORRELATION_ID,IDENTIFIER_1,VERSION_NUMBER_1,VERSION_DATE_1,"
+    "IDENTIFIER_2,VERSION_NUMBER_2,VERSION_DATE_2,CONFIDENCE"
+)
+
+
+@pytest.fixture
+def lids_zip():
+    """Zip a small LIDS style CSV with one row that cannot be typed."""
+    rows = [
+        f"{i}-corr,{100000 + i},1,20240101,{20000000 + i % 3},2,20240102,8"
+        for i in range(10)
+    ]
+    rows[4] = "4-corr,not-a-uprn,1,20240101,20000001,2,20240102,8"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("lids.csv", "\n".join([HEADER] + rows) + "\n")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def manager():
+    """MotherDuckManager backed by an in-memory DuckDB with the LIDS table."""
+    config = OsUsrnUprn.create_default_latest()
+    manager = MotherDuckManager("fake_token", "test_db")
+    manager.connection = duckdb.connect(database=":memory:")
+    manager.setup_for_data_source(config)
+    yield manager, config
+    manager.close()
+
+
+def test_bulk_load_skips_and_reports_bad_rows(
+    manager, lids_zip, fake_response, monkeypatch
+):
+    """The native CSV load types rows from db_template and reports rejects"""
+    manager, config = manager
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(lids_zip)
+    )
+
+    os_usrn_uprn.process_data(
+        "https://example.com/lids.zip",
+        manager.connection,
+        3,
+        config.schema_name,
+        config.table_names[0],
+        config.db_template,
+    )
+
+    rows = manager.connection.execute(
+        f"SELECT identifier_1, identifier_2 FROM {config.schema_name}.{config.table_names[0]} ORDER BY identifier_1"
+    ).fetchall()
+    assert len(rows) == 9
+    assert (100000, 20000000) in rows
+    assert all(identifier_1 != 100004 for identifier_1, _ in rows)
+
+
+def test_bulk_load_reports_only_its_own_rejects(manager, lids_zip, tmp_path):
+    """A second load on the same connection should not repeat earlier rejects"""
+    manager, config = manager
+    with zipfile.ZipFile(io.BytesIO(lids_zip)) as zip_file:
+        zip_file.extract("lids.csv", tmp_path)
+    clean_csv = tmp_path / "clean.csv"
+    clean_csv.write_text(
+        HEADER + "\n" + "0-corr,100000,1,20240101,20000000,2,20240102,8\n"
+    )
+
+    args = (manager.connection, config.schema_name, config.table_names[0])
+    _, first = os_usrn_uprn.bulk_load_csv(
+        str(tmp_path / "lids.csv"), *args, config.db_template
+    )
+    _, second = os_usrn_uprn.bulk_load_csv(str(clean_csv), *args, config.db_template)
+
+    assert len(first) == 1
+    assert second == []
+    assert manager.connection.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name LIKE 'reject_%'"
+    ).fetchone() == (0,)
+
+
+def test_batched_load_streams_csv_member(manager, lids_zip, fake_response, monkeypatch):
+    """The batched load reads rows straight out of the streamed zip member"""
+    manager, config = manager
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(lids_zip)
+    )
+    monkeypatch.setattr(os_usrn_uprn.time, "sleep", lambda seconds: None)
+
+    os_usrn_uprn.process_data(
+        "https://example.com/lids.zip",
+        manager.connection,
+        3,
+        config.schema_name,
+        config.table_names[0],
+    )
+
+    # The batch holding the bad row fails as a whole, the others are loaded
+    rows = manager.connection.execute(
+        f"SELECT identifier_1 FROM {config.schema_name}.{config.table_names[0]} ORDER BY identifier_1"
+    ).fetchall()
+    assert [row[0] - 100000 for row in rows] == [0, 1, 2, 6, 7, 8, 9]
+
+
+def test_batched_load_with_counts_stops_on_failed_batch(
+    manager, lids_zip, fake_response, monkeypatch
+):
+    """Counts should never be written for a load that skipped a batch"""
+    manager, config = manager
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(lids_zip)
+    )
+    monkeypatch.setattr(os_usrn_uprn.time, "sleep", lambda seconds: None)
+
+    with pytest.raises(duckdb.ConversionException):
+        os_usrn_uprn.process_data(
+            "https://example.com/lids.zip",
+            manager.connection,
+            3,
+            config.schema_name,
+            config.table_names[0],
+            count_table=config.usrn_count_table,
+        )
+
+    # Batches before the bad row are loaded, then the load stops
+    rows = manager.connection.execute(
+        f"SELECT identifier_1 FROM {config.schema_name}.{config.table_names[0]} ORDER BY identifier_1"
+    ).fetchall()
+    assert [row[0] - 100000 for row in rows] == [0, 1, 2]
+    assert manager.connection.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?",
+        [config.usrn_count_table],
+    ).fetchone() == (0,)
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_usrn_counts_built_during_load(manager, fake_response, monkeypatch, native):
+    """Both load paths should write the UPRN count of every USRN"""
+    manager, config = manager
+    rows = [
+        f"{i}-corr,{100000 + i},1,20240101,{20000000 + i % 3},2,20240102,8"
+        for i in range(10)
+    ]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("lids.csv", "\n".join([HEADER] + rows) + "\n")
+    lids_archive = buffer.getvalue()
+    monkeypatch.setattr(
+        artifact_cache.requests, "get", lambda *a, **k: fake_response(lids_archive)
+    )
+
+    os_usrn_uprn.process_data(
+        "https://example.com/lids.zip",
+        manager.connection,
+        3,
+        config.schema_name,
+        config.table_names[0],
+        config.db_template if native else None,
+        count_table=config.usrn_count_table,
+    )
+
+    counts = manager.connection.execute(
+        f"SELECT usrn, uprn_count FROM {config.schema_name}.{config.usrn_count_table} "
+        "ORDER BY usrn"
+    ).fetchall()
+    assert counts == [(20000000, 4), (20000001, 3), (20000002, 3)]
@@ -0,0 +1,53 @@
+import csv
+
+from metrics import metrics
+from profiling import Profiler, profiled
+import profiling
+
+
+def busy_loop(seconds: float) -> int:
+    """Spin so the sampler sees this frame."""
+    import time
+
+    total = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+@profiled
+def process_data(batches: int) -> str:
+    for _ in range(batches):
+        with metrics.stage("insert", rows=10):
+            busy_loop(0.05)
+    return "done"
+
+
+def test_profiled_process_data_writes_stacks_and_memory(tmp_path, monkeypatch):
+    """Enabled profiling should write collapsed stacks and a memory timeline"""
+    monkeypatch.setattr(profiling, "profiler", Profiler(str(tmp_path), 0.005))
+
+    with metrics.scope("street_manager"):
+        assert process_data(3) == "done"
+
+    folded = (tmp_path / "street_manager.folded").read_text().splitlines()
+    assert folded
+    assert any("test_profiling:process_data;" in line for line in folded)
+    stack, count = folded[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].endswith(":busy_loop")
+
+    with open(tmp_path / "street_manager.memory.csv", newline="") as memory_file:
+        rows = list(csv.DictReader(memory_file))
+    events = [row["event"] for row in rows if row["event"]]
+    assert events == ["start"] + ["insert 10 rows"] * 3 + ["end"]
+    assert all(float(row["rss_mb"]) > 0 for row in rows)
+
+
+def test_profiling_is_off_by_default(tmp_path, monkeypatch):
+    """Without a profile directory process_data should run untouched"""
+    monkeypatch.setattr(profiling, "profiler", Profiler())
+
+    assert process_data(1) == "done"
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,51 @@
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+from database.motherduck import MotherDuckManager
+from database.staging import ParquetStager, load_staged_table
+from data_sources.street_manager import StreetManager
+from data_processors.street_manager import batch_processor
+
+
+def test_staged_batches_load_in_one_insert(tmp_path, make_event, make_zip_chunks):
+    """Staged Street Manager batches should load the same rows as direct inserts"""
+    config = StreetManager.create_default_latest()
+    manager = MotherDuckManager("fake_token", "test_db")
+    manager.connection = duckdb.connect(database=":memory:")
+    manager.create_schema_if_not_exists("raw")
+    manager.create_table("raw", "direct", config.db_template)
+    manager.create_table("raw", "staged", config.db_template)
+
+    events = [make_event(i) for i in range(25)]
+    batch_processor(make_zip_chunks(events), 10, manager.connection, "raw", "direct")
+
+    stager = ParquetStager(str(tmp_path))
+    batch_processor(make_zip_chunks(events), 10, stager, "raw", "staged")
+    stager.close()
+    assert len(list((tmp_path / "raw" / "staged").glob("*.parquet"))) == 3
+
+    inserted = load_staged_table(manager.connection, str(tmp_path), "raw", "staged")
+
+    direct = manager.connection.execute(
+        "SELECT * FROM raw.direct ORDER BY event_reference"
+    ).fetchall()
+    staged = manager.connection.execute(
+        "SELECT * FROM raw.staged ORDER BY event_reference"
+    ).fetchall()
+    assert inserted == 25
+    assert staged == direct
+    manager.close()
+
+
+def test_reset_removes_staged_parts(tmp_path):
+    """Resetting a table should drop its parts and restart the numbering"""
+    stager = ParquetStager(str(tmp_path))
+    stager.stage(pa.table({"usrn": [1, 2]}), "raw", "usrns")
+    stager.stage(pd.DataFrame({"usrn": [3]}), "raw", "usrns")
+
+    stager.reset("raw", "usrns")
+    path = stager.next_part_path("raw", "usrns")
+
+    assert path.endswith("part-00000.parquet")
+    assert list((tmp_path / "raw" / "usrns").iterdir()) == []
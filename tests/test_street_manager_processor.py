@@ -0,0 +1,280 @@
+import json
+from datetime import datetime
+
+import duckdb
+import pytest
+from stream_unzip import TruncatedDataError
+
+from data_processors import artifact_cache, street_manager
+from database.checkpoints import HighWaterMark, LoadCheckpoint
+from database.motherduck import MotherDuckManager
+from data_sources.street_manager import StreetManager
+from data_processors.street_manager import (
+    batch_processor,
+    events_to_arrow_table,
+    parallel_batch_processor,
+    process_data,
+)
+
+
+@pytest.fixture
+def manager():
+    """
+    MotherDuckManager backed by an in-memory DuckDB with two permit tables -
+    "expected" for a reference load and "loaded" for the load under test.
+    """
+    manager = MotherDuckManager("fake_token", "test_db")
+    manager.connection = duckdb.connect(database=":memory:")
+    config = StreetManager.create_default_latest()
+    manager.create_schema_if_not_exists("raw")
+    manager.create_table("raw", "expected", config.db_template)
+    manager.create_table("raw", "loaded", config.db_template)
+    yield manager, config
+    manager.close()
+
+
+def test_columnar_mode_matches_row_mode(manager, make_event, make_zip_chunks):
+    """Columnar decoding should load exactly the same rows as the row path"""
+    manager, config = manager
+    events = [make_event(i) for i in range(25)]
+
+    batch_processor(make_zip_chunks(events), 10, manager.connection, "raw", "expected")
+    batch_processor(
+        make_zip_chunks(events, indent=2),
+        10,
+        manager.connection,
+        "raw",
+        "loaded",
+        config.db_template,
+    )
+
+    row_mode = manager.connection.execute(
+        "SELECT * FROM raw.expected ORDER BY event_reference"
+    ).fetchall()
+    columnar_mode = manager.connection.execute(
+        "SELECT * FROM raw.loaded ORDER BY event_reference"
+    ).fetchall()
+    assert len(columnar_mode) == 25
+    assert columnar_mode == row_mode
+
+
+def test_columnar_decode_reads_envelope_missing_from_first_event(make_event):
+    """Envelope columns should not depend on which fields the first event has"""
+    config = StreetManager.create_default_latest()
+    events = [make_event(i) for i in range(3)]
+    del events[0]["object_type"]
+
+    table = events_to_arrow_table(
+        [json.dumps(event).encode() for event in events], config.db_template
+    )
+
+    assert table.column("object_type").to_pylist() == [None, "PERMIT", "PERMIT"]
+    assert table.column("usrn").to_pylist() == ["10000000", "10000001", "10000002"]
+
+
+def test_columnar_decode_falls_back_on_type_mismatch(
+    manager, make_event, make_zip_chunks, monkeypatch
+):
+    """Values that do not fit the template types are decoded row by row"""
+    manager, config = manager
+    events = [make_event(i) for i in range(25)]
+    for event in events:
+        event["object_data"]["usrn"] = int(event["object_data"]["usrn"])
+
+    batch_processor(make_zip_chunks(events), 10, manager.connection, "raw", "expected")
+
+    fallback_batches = []
+    row_decode = street_manager.chunks_to_arrow_table
+
+    def counting_row_decode(flattened_data, typed_columns=None):
+        fallback_batches.append(len(flattened_data))
+        return row_decode(flattened_data, typed_columns)
+
+    monkeypatch.setattr(street_manager, "chunks_to_arrow_table", counting_row_decode)
+    batch_processor(
+        make_zip_chunks(events),
+        10,
+        manager.connection,
+        "raw",
+        "loaded",
+        config.db_template,
+    )
+
+    # Every batch hit ArrowInvalid in the columnar reader and was decoded
+    # again by the row path, giving the same rows
+    assert fallback_batches == [10, 10, 5]
+    expected, loaded = (
+        manager.connection.execute(
+            f"SELECT * FROM raw.{table} ORDER BY event_reference"
+        ).fetchall()
+        for table in ("expected", "loaded")
+    )
+    assert loaded == expected
+    assert loaded[1][list(config.db_template).index("usrn")] == "10000001"
+
+
+def test_typed_load_parses_dates_flags_and_usrn(manager, make_event, make_zip_chunks):
+    """Typed loads should store parsed values whichever decode path is used"""
+    manager, _ = manager
+    config = StreetManager.create_default_latest(typed=True)
+    manager.create_table("raw", "typed_row_mode", config.db_template)
+    manager.create_table("raw", "typed_columnar_mode", config.db_template)
+    events = [make_event(i) for i in range(4)]
+
+    batch_processor(
+        make_zip_chunks(events),
+        10,
+        manager.connection,
+        "raw",
+        "typed_row_mode",
+        typed_columns=config.typed_columns,
+    )
+    batch_processor(
+        make_zip_chunks(events),
+        10,
+        manager.connection,
+        "raw",
+        "typed_columnar_mode",
+        config.db_template,
+        typed_columns=config.typed_columns,
+    )
+
+    for table in ("typed_row_mode", "typed_columnar_mode"):
+        rows = manager.connection.execute(
+            f"""SELECT usrn, event_time, proposed_start_date, is_ttro_required,
+                    promoter_swa_code
+                FROM raw.{table} ORDER BY event_reference"""
+        ).fetchall()
+        assert rows[:2] == [
+            (
+                10000000,
+                datetime(2024, 3, 1, 9, 0),
+                datetime(2024, 3, 1),
+                None,
+                16,
+            ),
+            (
+                10000001,
+                datetime(2024, 3, 1, 9, 0),
+                datetime(2024, 3, 1),
+                False,
+                16,
+            ),
+        ]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_parallel_mode_matches_serial_mode(
+    manager, columnar, make_event, make_zip_chunks
+):
+    """The process pool pipeline should keep row count and insert order"""
+    manager, config = manager
+    events = [make_event(i) for i in range(25)]
+    db_template = config.db_template if columnar else None
+
+    batch_processor(
+        make_zip_chunks(events), 4, manager.connection, "raw", "expected", db_template
+    )
+    parallel_batch_processor(
+        make_zip_chunks(events),
+        4,
+        manager.connection,
+        "raw",
+        "loaded",
+        db_template,
+        workers=2,
+    )
+
+    serial = manager.connection.execute("SELECT * FROM raw.expected").fetchall()
+    parallel = manager.connection.execute("SELECT * FROM raw.loaded").fetchall()
+    assert len(parallel) == 25
+    assert parallel == serial
+
+
+def test_resumed_load_skips_committed_members(manager, make_event, make_zip_chunks):
+    """A load interrupted part way should resume without duplicating rows"""
+    manager, config = manager
+    conn = manager.connection
+    events = [make_event(i) for i in range(25)]
+    chunks = make_zip_chunks(events)
+    checkpoint = LoadCheckpoint(conn, "permit/2024/03.zip", "raw", "loaded")
+
+    # Cut the archive short so the first run fails after a few batches
+    assert checkpoint.resume_position() == 0
+    with pytest.raises(TruncatedDataError):
+        batch_processor(
+            chunks[: len(chunks) // 2],
+            5,
+            conn,
+            "raw",
+            "loaded",
+            config.db_template,
+            checkpoint,
+        )
+
+    skip_members = checkpoint.resume_position()
+    assert 0 < skip_members < 25
+    batch_processor(
+        chunks,
+        5,
+        conn,
+        "raw",
+        "loaded",
+        config.db_template,
+        checkpoint,
+        skip_members,
+    )
+    checkpoint.mark_complete()
+
+    loaded = conn.execute(
+        "SELECT event_reference FROM raw.loaded ORDER BY event_reference"
+    ).fetchall()
+    assert loaded == [(i,) for i in range(25)]
+    assert checkpoint.resume_position() is None
+
+
+def test_incremental_load_merges_only_new_events(
+    manager, fake_response, monkeypatch, make_event, make_zip_chunks
+):
+    """Re-running a month should only add the events after the high-water mark"""
+    manager, config = manager
+    conn = manager.connection
+    decoded = []
+
+    def counting_decode(events, db_template, typed_columns=None):
+        decoded.append(len(events))
+        return events_to_arrow_table(events, db_template, typed_columns)
+
+    monkeypatch.setattr(street_manager, "events_to_arrow_table", counting_decode)
+
+    def run(events):
+        permit_archive = b"".join(make_zip_chunks(events))
+        monkeypatch.setattr(
+            artifact_cache.requests,
+            "get",
+            lambda *a, **k: fake_response(permit_archive),
+        )
+        process_data(
+            "permit/2024/03.zip",
+            10,
+            conn,
+            "raw",
+            "loaded",
+            config.db_template,
+            incremental=True,
+        )
+
+    run([make_event(i) for i in range(20)])
+    assert HighWaterMark(conn, "raw", "loaded").load() == 19
+
+    # A crashed run may have loaded part of the tail without moving the mark
+    conn.execute("INSERT INTO raw.loaded (event_reference) VALUES (25)")
+    decoded.clear()
+    run([make_event(i) for i in range(30)])
+
+    loaded = conn.execute(
+        "SELECT event_reference FROM raw.loaded ORDER BY event_reference"
+    ).fetchall()
+    assert loaded == [(i,) for i in range(30)]
+    assert decoded == [10]
+    assert HighWaterMark(conn, "raw", "loaded").load() == 29